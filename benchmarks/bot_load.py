@@ -0,0 +1,687 @@
+"""
+Нагрузочный стенд для обработчиков ботов без сети.
+
+Гоняет настоящие роутеры Telegram (adapters/telegram/handlers) и настоящие
+ScheduleCog/ScheduleButtons Discord с поддельными транспортами:
+  - Bot Telegram получает сессию, которая отвечает на методы API сама,
+    с задержкой --api-ms;
+  - контекст команд, сообщения и interaction Discord — простые заглушки
+    с той же задержкой;
+  - файлы Telegram сессия отдаёт частями сама, вложения Discord — локальный
+    HTTP-сервер, а «скачивание с сайта» для «Обновить» подменено записью
+    сгенерированной выгрузки через --scrape-ms.
+Всё остальное — очереди отправки, пул разбора, кэши, хранилище — настоящее
+и работает во временном DATA_DIR.
+
+    # 5000 студентов жмут «Сегодня» примерно в 07:55
+    python -m benchmarks.bot_load --users 5000 --rate 800 --mix today=80,tomorrow=10,nav=10
+
+    # смешанная нагрузка, 30% из Discord, без лимитов Telegram на отправку
+    python -m benchmarks.bot_load --requests 3000 --rate 300 --discord-share 0.3 --send-rate 100000
+
+Отчёт: гистограмма задержек, p50/p90/p99 по действиям, пропускная
+способность, задержка цикла событий и число вызовов поддельного API.
+Запрос, на котором обработчик упал или записал ошибку в лог, считается
+ошибкой, а не замером задержки; при ошибках прогон завершается с кодом 1.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import time
+import logging
+import random
+import asyncio
+import argparse
+import tempfile
+import statistics
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional
+
+from benchmarks.generate_csv import SIZES, export_bytes
+
+FAKE_TOKEN = "123456:LOAD-TEST"
+
+TELEGRAM_ACTIONS = ("start", "today", "tomorrow", "nav", "group", "notify", "upload", "update")
+DISCORD_ACTIONS = ("today", "tomorrow", "nav", "upload", "update")
+
+DEFAULT_MIX = "today=55,tomorrow=15,nav=15,group=5,notify=3,upload=4,update=3"
+
+# Границы корзин гистограммы, мс
+BUCKETS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 30000]
+
+TELEGRAM_USER_BASE = 10_000
+DISCORD_USER_BASE = 900_000_000_000
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in TELEGRAM_ACTIONS:
+            raise argparse.ArgumentTypeError(f"неизвестное действие {name!r}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+# ----------------------------------------------------------------------
+# Замеры
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: Dict[str, List[float]] = defaultdict(list)
+        self.errors: Counter = Counter()
+        self.started = 0.0
+        self.finished = 0.0
+
+    def add(self, action: str, seconds: float) -> None:
+        self.latencies[action].append(seconds)
+
+    @property
+    def all(self) -> List[float]:
+        return [value for values in self.latencies.values() for value in values]
+
+
+# Ошибки из лога, записанные во время текущего запроса: обработчики ловят
+# исключения сами и только пишут их в лог («Ошибка загрузки файла» и т. п.).
+# Задачи, созданные внутри запроса, копируют контекст и видят тот же список.
+_request_errors: ContextVar[Optional[List[logging.LogRecord]]] = ContextVar("request_errors", default=None)
+
+
+class ErrorLogCollector(logging.Handler):
+    """
+    Привязывает записи уровня ERROR к запросу, во время которого они появились.
+    """
+
+    def __init__(self, recorder: Recorder):
+        super().__init__(logging.ERROR)
+        self.recorder = recorder
+
+    def emit(self, record: logging.LogRecord) -> None:
+        errors = _request_errors.get()
+        if errors is not None:
+            errors.append(record)
+        else:
+            self.recorder.errors[f"вне запросов: {_describe(record)}"] += 1
+
+
+def _describe(record: logging.LogRecord) -> str:
+    if record.exc_info and record.exc_info[0] is not None:
+        return f"{record.name} ({record.exc_info[0].__name__})"
+    return record.name
+
+
+class LoopLagMonitor:
+    """
+    Насколько позже запланированного просыпается цикл событий:
+    прямая мера того, что кто-то блокирует цикл.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples: List[float] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(loop.time() - expected, 0.0))
+
+
+# ----------------------------------------------------------------------
+# Локальный файловый сервер и поддельное скачивание
+
+
+class FileServer:
+    """
+    Отдаёт сгенерированные выгрузки по /attachments/<name> (вложения Discord).
+    """
+
+    def __init__(self, files: Dict[str, bytes]):
+        self.files = files
+        self.base = ""
+        self._runner = None
+
+    async def start(self) -> None:
+        from aiohttp import web
+
+        async def handle(request: web.Request) -> web.Response:
+            data = self.files.get(request.match_info["name"])
+            if data is None:
+                return web.Response(status=404)
+            return web.Response(body=data, content_type="text/csv")
+
+        app = web.Application()
+        app.router.add_get("/attachments/{name}", handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f"http://127.0.0.1:{port}"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+
+
+class FakeDownloads:
+    """
+    Вместо процессов с браузером: пауза --scrape-ms и запись выгрузки класса из ссылки.
+    """
+
+    def __init__(self, files: Dict[str, bytes], delay: float):
+        self.files = files
+        self.delay = delay
+        self.count = 0
+
+    async def download(self, url: str, tmp_path: str, on_progress=None) -> None:
+        self.count += 1
+        if on_progress is not None:
+            await on_progress("open")
+        await asyncio.sleep(self.delay)
+        name = url.rsplit("=", 1)[-1] + ".csv"
+        with open(tmp_path, "wb") as f:
+            f.write(self.files[name])
+
+
+# ----------------------------------------------------------------------
+# Telegram
+
+
+def make_fake_session(api_delay: float, base_url: str, files: Dict[str, bytes]):
+    from aiogram.client.session.base import BaseSession
+    from aiogram.client.telegram import TelegramAPIServer
+    from aiogram.types import File, Message
+
+    class FakeTelegramSession(BaseSession):
+        """
+        Отвечает на методы Bot API без сети: возвращает объекты нужного типа.
+        """
+
+        def __init__(self):
+            super().__init__(api=TelegramAPIServer.from_base(base_url))
+            self.calls: Counter = Counter()
+            self._message_ids = iter(range(1, 1 << 62))
+
+        async def make_request(self, bot, method, timeout=None) -> Any:
+            name = type(method).__name__
+            self.calls[name] += 1
+            await asyncio.sleep(api_delay)
+
+            if name == "GetFile":
+                return File(
+                    file_id=method.file_id,
+                    file_unique_id=method.file_id,
+                    file_path=f"{method.file_id}.csv",
+                )
+            if name in ("SendMessage", "EditMessageText", "EditMessageReplyMarkup"):
+                chat_id = method.chat_id
+                return Message.model_validate({
+                    "message_id": getattr(method, "message_id", None) or next(self._message_ids),
+                    "date": int(time.time()),
+                    "chat": {"id": chat_id, "type": "private"},
+                    "text": getattr(method, "text", None) or "…",
+                }, context={"bot": bot})
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            # file_path из GetFile — имя выгрузки класса
+            data = files[url.rsplit("/", 1)[-1]]
+            for i in range(0, len(data), chunk_size):
+                await asyncio.sleep(0)
+                yield data[i:i + chunk_size]
+
+        async def close(self) -> None:
+            pass
+
+    return FakeTelegramSession()
+
+
+class TelegramDriver:
+    def __init__(self, dp, bot, classes: int, today: date):
+        self.dp = dp
+        self.bot = bot
+        self.classes = classes
+        self.today = today
+        self._update_ids = iter(range(1, 1 << 62))
+
+    def _user(self, user_id: int) -> dict:
+        return {"id": user_id, "is_bot": False, "first_name": "Load"}
+
+    def _message(self, user_id: int, **extra) -> dict:
+        return {
+            "message_id": next(self._update_ids),
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": self._user(user_id),
+            **extra,
+        }
+
+    async def _feed(self, body: dict) -> None:
+        from aiogram.types import Update
+
+        body["update_id"] = next(self._update_ids)
+        update = Update.model_validate(body, context={"bot": self.bot})
+        await self.dp.feed_update(self.bot, update)
+
+    async def _callback(self, user_id: int, data: str) -> None:
+        await self._feed({"callback_query": {
+            "id": str(next(self._update_ids)),
+            "from": self._user(user_id),
+            "chat_instance": str(user_id),
+            "data": data,
+            "message": self._message(user_id, text="menu"),
+        }})
+
+    async def run(self, action: str, user_id: int, rng: random.Random) -> None:
+        if action == "start":
+            await self._feed({"message": self._message(user_id, text="/start")})
+        elif action == "today":
+            await self._callback(user_id, "show_today")
+        elif action == "tomorrow":
+            await self._callback(user_id, "show_tomorrow")
+        elif action == "nav":
+            day = self.today + timedelta(days=rng.randint(-3, 7))
+            await self._callback(user_id, f"day_{day.isoformat()}")
+        elif action == "group":
+            await self._callback(user_id, "toggle_group")
+        elif action == "notify":
+            await self._callback(user_id, "toggle_notifications")
+        elif action == "update":
+            await self._callback(user_id, "update_schedule")
+        elif action == "upload":
+            name = f"class{user_id % self.classes}"
+            await self._feed({"message": self._message(user_id, document={
+                "file_id": name,
+                "file_unique_id": name,
+                "file_name": "Plany.csv",
+                "file_size": 100_000,
+            })})
+
+
+# ----------------------------------------------------------------------
+# Discord
+
+
+class FakeDiscordMessage:
+    def __init__(self, channel: "FakeChannel", content: str = "", author=None, attachments=()):
+        self.channel = channel
+        self.content = content
+        self.author = author
+        self.attachments = list(attachments)
+
+    async def edit(self, **kwargs) -> "FakeDiscordMessage":
+        self.channel.calls["edit"] += 1
+        await asyncio.sleep(self.channel.delay)
+        return self
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int, delay: float, calls: Counter):
+        self.id = channel_id
+        self.delay = delay
+        self.calls = calls
+
+    async def send(self, content: str = "", **kwargs) -> FakeDiscordMessage:
+        self.calls["send"] += 1
+        await asyncio.sleep(self.delay)
+        return FakeDiscordMessage(self, content)
+
+
+class FakeAuthor:
+    bot = False
+
+    def __init__(self, user_id: int):
+        self.id = user_id
+
+
+class FakeContext:
+    def __init__(self, user_id: int, channel: FakeChannel):
+        self.author = FakeAuthor(user_id)
+        self.channel = channel
+
+    async def send(self, content: str = "", **kwargs) -> FakeDiscordMessage:
+        return await self.channel.send(content, **kwargs)
+
+
+class FakeResponse:
+    def __init__(self, delay: float, calls: Counter):
+        self.delay = delay
+        self.calls = calls
+
+    async def send_message(self, content: str = "", **kwargs) -> None:
+        self.calls["interaction.send_message"] += 1
+        await asyncio.sleep(self.delay)
+
+    async def edit_message(self, **kwargs) -> None:
+        self.calls["interaction.edit_message"] += 1
+        await asyncio.sleep(self.delay)
+
+
+class FakeInteraction:
+    def __init__(self, user_id: int, delay: float, calls: Counter):
+        self.user = FakeAuthor(user_id)
+        self.response = FakeResponse(delay, calls)
+
+
+class FakeAttachment:
+    def __init__(self, url: str, size: int):
+        self.url = url
+        self.size = size
+        self.filename = "Plany.csv"
+
+
+class FakeDiscordBot:
+    async def process_commands(self, message) -> None:
+        pass
+
+
+class DiscordDriver:
+    def __init__(self, classes: int, today: date, api_delay: float, files_base: str):
+        from src.adapters.discord.cogs.schedule import ScheduleCog
+
+        self.cog = ScheduleCog(FakeDiscordBot())
+        self.classes = classes
+        self.today = today
+        self.delay = api_delay
+        self.files_base = files_base
+        self.calls: Counter = Counter()
+
+    def _ctx(self, user_id: int) -> FakeContext:
+        # Личные сообщения: свой канал у каждого пользователя
+        return FakeContext(user_id, FakeChannel(user_id, self.delay, self.calls))
+
+    async def run(self, action: str, user_id: int, rng: random.Random) -> None:
+        from src.adapters.discord.cogs.schedule import ScheduleButtons, ScheduleCog
+
+        if action == "today":
+            await ScheduleCog.today.callback(self.cog, self._ctx(user_id))
+        elif action == "tomorrow":
+            await ScheduleCog.tomorrow.callback(self.cog, self._ctx(user_id))
+        elif action == "nav":
+            view = ScheduleButtons(user_id, self.today)
+            label = rng.choice(["← Wczoraj", "Dzisiaj", "Jutro →"])
+            button = next(item for item in view.children if getattr(item, "label", None) == label)
+            await button.callback(FakeInteraction(user_id, self.delay, self.calls))
+            view.stop()
+        elif action == "update":
+            await ScheduleCog.update.callback(self.cog, self._ctx(user_id))
+        elif action == "upload":
+            ctx = self._ctx(user_id)
+            await ScheduleCog.upload.callback(self.cog, ctx)
+            name = f"class{user_id % self.classes}.csv"
+            message = FakeDiscordMessage(
+                ctx.channel, "", ctx.author,
+                [FakeAttachment(f"{self.files_base}/attachments/{name}", 100_000)],
+            )
+            await self.cog.on_message(message)
+
+
+# ----------------------------------------------------------------------
+# Сценарий
+
+
+async def prepare_users(user_ids: List[int], classes: int, files: Dict[str, bytes], with_url: float, seed: int) -> None:
+    """
+    У пользователей уже есть расписание своего класса (как после загрузки),
+    у части — сохранённая ссылка для «Обновить».
+    """
+    from src.core.storage import new_blob_tmp_path, store_blob
+    from src.core.url_store import set_user_url
+    from src.core.services.refresh_service import apply_schedule_blob_async
+
+    digests = []
+    for k in range(classes):
+        tmp_path = new_blob_tmp_path()
+        with open(tmp_path, "wb") as f:
+            f.write(files[f"class{k}.csv"])
+        digests.append(store_blob(tmp_path))
+
+    rng = random.Random(seed)
+    await asyncio.gather(*(
+        apply_schedule_blob_async(user_id, digests[user_id % classes]) for user_id in user_ids
+    ))
+    for user_id in user_ids:
+        if rng.random() < with_url:
+            set_user_url(user_id, f"https://harmonogramy.example/plan?class=class{user_id % classes}")
+
+
+async def run_load(args: argparse.Namespace) -> dict:
+    from src.adapters.telegram.bot_instence import bot
+    from src.core import outbound
+    from src.core.export_replay import close_http_session
+    from src.core.schedule_executor import schedule_executor
+    from src.core.state_store import state_store
+    from src.core.services import refresh_service
+    from src.tg_bot import build_dispatcher
+
+    today = date.today()
+    start = today - timedelta(days=today.weekday() + 7 * (SIZES[args.size] // 2))
+    files = {
+        f"class{k}.csv": export_bytes(SIZES[args.size], args.encoding, seed=k, start=start)
+        for k in range(args.classes)
+    }
+
+    server = FileServer(files)
+    await server.start()
+    refresh_service.download_workers = FakeDownloads(files, args.scrape_ms / 1000)
+    bot.session = make_fake_session(args.api_ms / 1000, server.base, files)
+
+    rng = random.Random(args.seed)
+    discord_count = round(args.users * args.discord_share)
+    tg_users = [TELEGRAM_USER_BASE + i for i in range(args.users - discord_count)]
+    ds_users = [DISCORD_USER_BASE + i for i in range(discord_count)]
+
+    await state_store.start()
+    prepared = time.perf_counter()
+    await prepare_users(tg_users + ds_users, args.classes, files, args.with_url, args.seed)
+    print(f"подготовлено пользователей: {args.users} за {time.perf_counter() - prepared:.1f}s")
+
+    telegram = TelegramDriver(build_dispatcher(), bot, args.classes, today)
+    discord = DiscordDriver(args.classes, today, args.api_ms / 1000, server.base) if ds_users else None
+
+    mix = args.mix
+    tg_actions, tg_weights = zip(*mix.items())
+    ds_mix = {name: weight for name, weight in mix.items() if name in DISCORD_ACTIONS} or {"today": 1}
+    ds_actions, ds_weights = zip(*ds_mix.items())
+
+    recorder = Recorder()
+    collector = ErrorLogCollector(recorder)
+    logging.getLogger().addHandler(collector)
+    lag = LoopLagMonitor()
+    lag.start()
+    loop = asyncio.get_running_loop()
+
+    async def one(platform: str, action: str, user_id: int, scheduled: float, task_rng: random.Random) -> None:
+        driver = telegram if platform == "telegram" else discord
+        logged: List[logging.LogRecord] = []
+        _request_errors.set(logged)
+        try:
+            await driver.run(action, user_id, task_rng)
+        except Exception as e:
+            recorder.errors[f"{platform}/{action}: {type(e).__name__}"] += 1
+            return
+        if logged:
+            recorder.errors[f"{platform}/{action}: {_describe(logged[0])}"] += 1
+            return
+        # Задержка от запланированного прихода запроса: учитывает и ожидание цикла
+        recorder.add(f"{platform}/{action}", loop.time() - scheduled)
+
+    # Открытая модель: запросы приходят по пуассоновскому потоку с --rate в секунду
+    # независимо от того, успевает ли бот
+    tasks = []
+    recorder.started = loop.time()
+    next_at = recorder.started
+    for i in range(args.requests or args.users):
+        if ds_users and rng.random() < args.discord_share:
+            platform, user_id = "discord", rng.choice(ds_users)
+            action = rng.choices(ds_actions, ds_weights)[0]
+        else:
+            platform, user_id = "telegram", rng.choice(tg_users)
+            action = rng.choices(tg_actions, tg_weights)[0]
+
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(platform, action, user_id, next_at, random.Random(i))))
+        next_at += rng.expovariate(args.rate)
+
+    await asyncio.gather(*tasks)
+    recorder.finished = loop.time()
+    await lag.stop()
+    logging.getLogger().removeHandler(collector)
+
+    calls = Counter(bot.session.calls)
+    if discord is not None:
+        calls.update({f"discord.{name}": count for name, count in discord.calls.items()})
+    calls["scrape"] = refresh_service.download_workers.count
+
+    result = {
+        "recorder": recorder,
+        "lag": lag.samples,
+        "calls": calls,
+        "executor": schedule_executor.stats(),
+        "outbound": {"telegram": outbound.telegram_outbound.stats(), "discord": outbound.discord_outbound.stats()},
+    }
+
+    await outbound.stop_outbound()
+    await schedule_executor.stop()
+    await state_store.stop()
+    await close_http_session()
+    await server.stop()
+    return result
+
+
+# ----------------------------------------------------------------------
+# Отчёт
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.1f}"
+
+
+def print_report(result: dict) -> None:
+    recorder: Recorder = result["recorder"]
+    values = recorder.all
+    elapsed = recorder.finished - recorder.started
+
+    failed = sum(recorder.errors.values())
+    print(
+        f"\nзапросов: {len(values)} за {elapsed:.2f}s, {len(values) / elapsed:.1f} req/s"
+        f", с ошибкой: {failed}"
+    )
+
+    print("\nгистограмма задержек (мс):")
+    counts = Counter(bisect_left(BUCKETS, value * 1000) for value in values)
+    widest = max(counts.values()) if counts else 1
+    for i in range(len(BUCKETS) + 1):
+        label = f"≤{BUCKETS[i]}" if i < len(BUCKETS) else f">{BUCKETS[-1]}"
+        count = counts.get(i, 0)
+        if count:
+            print(f"{label:>8} {count:>7} {'█' * max(1, round(40 * count / widest))}")
+
+    print(f"\n{'действие':<22}{'n':>7}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}")
+    rows = sorted(recorder.latencies.items()) + [("всего", values)]
+    for name, latencies in rows:
+        print(
+            f"{name:<22}{len(latencies):>7}{_ms(percentile(latencies, 0.5)):>9}"
+            f"{_ms(percentile(latencies, 0.9)):>9}{_ms(percentile(latencies, 0.99)):>9}"
+            f"{_ms(max(latencies, default=0.0)):>9}"
+        )
+
+    lag = result["lag"]
+    if lag:
+        print(
+            f"\nзадержка цикла событий, мс: p50 {_ms(percentile(lag, 0.5))}, "
+            f"p99 {_ms(percentile(lag, 0.99))}, max {_ms(max(lag))}, "
+            f"среднее {_ms(statistics.fmean(lag))}"
+        )
+
+    if recorder.errors:
+        print("\nошибки (в задержки не вошли):")
+        for name, count in recorder.errors.most_common():
+            print(f"  {name}: {count}")
+
+    print("\nвызовы поддельного API:")
+    for name, count in sorted(result["calls"].items()):
+        print(f"  {name}: {count}")
+    print(f"\nschedule_executor: {result['executor']}")
+    print(f"outbound: {result['outbound']}")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузка на обработчики ботов с поддельными транспортами")
+    parser.add_argument("--users", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=0, help="по умолчанию — по одному на пользователя")
+    parser.add_argument("--rate", type=float, default=500, help="запросов в секунду (пуассоновский поток)")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"веса действий, по умолчанию {DEFAULT_MIX}")
+    parser.add_argument("--discord-share", type=float, default=0.0, help="доля запросов из Discord")
+    parser.add_argument("--classes", type=int, default=40, help="число разных расписаний (групп студентов)")
+    parser.add_argument("--size", choices=sorted(SIZES), default="semester")
+    parser.add_argument("--encoding", choices=("utf-8", "cp1250"), default="cp1250")
+    parser.add_argument("--with-url", type=float, default=0.7, help="доля пользователей с сохранённой ссылкой")
+    parser.add_argument("--api-ms", type=float, default=40, help="задержка поддельного API")
+    parser.add_argument("--scrape-ms", type=float, default=3000, help="длительность поддельного скачивания")
+    parser.add_argument("--send-rate", type=int, help="переопределить TELEGRAM_SEND_RATE/DISCORD_SEND_RATE")
+    parser.add_argument("--data-dir", help="DATA_DIR (по умолчанию — временный каталог)")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+
+    # До первого импорта src: настройки читаются один раз при импорте
+    scratch = None
+    if args.data_dir is None:
+        scratch = tempfile.TemporaryDirectory(prefix="bot-load-")
+        args.data_dir = scratch.name
+    os.environ["DATA_DIR"] = args.data_dir
+    os.environ["TELEGRAM_TOKEN"] = FAKE_TOKEN
+    os.environ.setdefault("REFRESH_INTERVAL", "0")
+    if args.send_rate:
+        os.environ["TELEGRAM_SEND_RATE"] = str(args.send_rate)
+        os.environ["DISCORD_SEND_RATE"] = str(args.send_rate)
+    if "src.config" in sys.modules:
+        raise RuntimeError("benchmarks.bot_load нужно запускать до импорта src")
+
+    try:
+        result = asyncio.run(run_load(args))
+        print_report(result)
+    finally:
+        if scratch is not None:
+            scratch.cleanup()
+
+    if result["recorder"].errors:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+"""
+Генератор синтетических выгрузок Harmonogramy для бенчмарков.
+
+Воспроизводит формат настоящего экспорта (см. src/core/schedule_csv.py):
+две строки шапки, заголовок колонок, дни «Data Zajec: ...», занятия с кодами
+групп WykS / Cw<n>S, польские названия с диакритикой (для cp1250), CRLF.
+Результат детерминирован при одинаковом seed.
+
+    python -m benchmarks.generate_csv out.csv --size semester --encoding cp1250
+    python -m benchmarks.generate_csv out.csv --weeks 3 --groups 4 --seed 7
+"""
+from __future__ import annotations
+
+import random
+import argparse
+from datetime import date, timedelta
+from typing import List, Optional
+
+# Размеры выгрузок в неделях: от одной недели до нескольких семестров
+SIZES = {
+    "week": 1,
+    "month": 4,
+    "semester": 15,
+    "year": 30,
+    "multi": 60,
+}
+
+ENCODINGS = ("utf-8", "cp1250")
+
+DAY_NAMES = ["poniedzialek", "wtorek", "sroda", "czwartek", "piatek", "sobota", "niedziela"]
+MONTHS = [
+    "stycznia", "lutego", "marca", "kwietnia", "maja", "czerwca",
+    "lipca", "sierpnia", "września", "października", "listopada", "grudnia",
+]
+
+SUBJECTS = [
+    "Analiza matematyczna",
+    "Algebra liniowa z geometrią",
+    "Programowanie obiektowe",
+    "Algorytmy i struktury danych",
+    "Bazy danych",
+    "Systemy operacyjne",
+    "Sieci komputerowe",
+    "Inżynieria oprogramowania",
+    "Matematyka dyskretna",
+    "Fizyka dla informatyków",
+    "Język angielski B2",
+    "Grafika komputerowa",
+    "Bezpieczeństwo systemów",
+    "Wychowanie fizyczne",
+]
+ROOMS = ["A-101", "A-204", "B-2.14", "B-3.02", "C-015", "Lab. 3.12", "Lab. 4.07", "Aula Główna", "e-learning"]
+TEACHERS = [
+    "dr Jan Kowalski", "dr hab. Anna Wiśniewska", "mgr Piotr Zieliński",
+    "prof. dr hab. Ewa Nowak", "mgr inż. Łukasz Wójcik", "dr Małgorzata Kamińska",
+]
+CREDITS = ["Egzamin", "Zaliczenie na ocenę", "Zaliczenie"]
+
+# Пары по 1,5 часа, как в расписании университета
+SLOTS = [(8 * 60, 9 * 60 + 30), (9 * 60 + 45, 11 * 60 + 15), (11 * 60 + 30, 13 * 60),
+         (13 * 60 + 15, 14 * 60 + 45), (15 * 60, 16 * 60 + 30), (16 * 60 + 45, 18 * 60 + 15),
+         (18 * 60 + 30, 20 * 60)]
+
+COURSE = "Infor. 1st 1sem"
+COLUMNS = 10
+
+
+def _time(minutes: int) -> str:
+    return f"{minutes // 60}:{minutes % 60:02d}"
+
+
+def _row(*cells: str) -> str:
+    cells = list(cells) + [""] * (COLUMNS - len(cells))
+    return ";".join(cells)
+
+
+def generate_lines(
+    weeks: int,
+    start: date = date(2025, 10, 1),
+    groups: int = 3,
+    seed: int = 0,
+    weekends: bool = False,
+) -> List[str]:
+    """
+    Строки выгрузки (без перевода строки в конце каждой).
+    weekends=True — расписание заочников: занятия и в субботу/воскресенье.
+    """
+    rng = random.Random(seed)
+    exported = start - timedelta(days=rng.randint(1, 14))
+
+    lines = [
+        _row(*[""] * 9, f"{DAY_NAMES[exported.weekday()]}, {exported.day} {MONTHS[exported.month - 1]} {exported.year}"),
+        _row("Plan dla toku: Informatyka, studia I stopnia, stacjonarne, semestr 1"),
+        _row("Czas od", "", "Czas do", "Liczba godzin", "Grupy", "Zajecia", "Sala",
+             "Prowadzacy", "Forma zaliczenia", "Uwagi"),
+    ]
+
+    day = start
+    for _ in range(weeks * 7):
+        if day.weekday() < 5 or weekends:
+            slots = sorted(rng.sample(range(len(SLOTS)), rng.randint(2, 6)))
+            if rng.random() < 0.05:
+                slots = []  # день без занятий (праздник) — заголовок без строк
+            lines.append(_row(f"Data Zajec: {day:%Y.%m.%d} {DAY_NAMES[day.weekday()]} "))
+
+            for slot in slots:
+                begins, ends = SLOTS[slot]
+                subject = rng.choice(SUBJECTS)
+                if rng.random() < 0.35:
+                    codes = ["WykS"]
+                else:
+                    # Упражнения параллельно у нескольких групп в одном слоте
+                    codes = [f"Cw{n}S" for n in range(1, groups + 1) if rng.random() < 0.7] or ["Cw1S"]
+
+                for code in codes:
+                    lines.append(_row(
+                        "",
+                        _time(begins),
+                        _time(ends),
+                        "2h00m",
+                        f"{COURSE} {code} ",
+                        subject,
+                        rng.choice(ROOMS),
+                        rng.choice(TEACHERS),
+                        rng.choice(CREDITS),
+                        "",
+                    ))
+        day += timedelta(days=1)
+
+    return lines
+
+
+def export_bytes(
+    weeks: int,
+    encoding: str = "utf-8",
+    groups: int = 3,
+    seed: int = 0,
+    weekends: bool = False,
+    start: date = date(2025, 10, 1),
+) -> bytes:
+    lines = generate_lines(weeks, start=start, groups=groups, seed=seed, weekends=weekends)
+    return ("\r\n".join(lines) + "\r\n").encode(encoding, errors="replace")
+
+
+def write_export(
+    path: str,
+    weeks: int,
+    encoding: str = "utf-8",
+    groups: int = 3,
+    seed: int = 0,
+    weekends: bool = False,
+    start: date = date(2025, 10, 1),
+) -> int:
+    """
+    Записывает выгрузку в файл и возвращает число строк-занятий.
+    """
+    data = export_bytes(weeks, encoding, groups, seed, weekends, start)
+    with open(path, "wb") as f:
+        f.write(data)
+    return sum(1 for line in data.split(b"\r\n") if line.startswith(b";") and line[1:2].isdigit())
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Синтетическая выгрузка расписания Harmonogramy")
+    parser.add_argument("path")
+    size = parser.add_mutually_exclusive_group()
+    size.add_argument("--size", choices=sorted(SIZES), default="semester")
+    size.add_argument("--weeks", type=int)
+    parser.add_argument("--encoding", choices=ENCODINGS, default="utf-8")
+    parser.add_argument("--groups", type=int, default=3, help="число групп упражнений (Cw<n>S)")
+    parser.add_argument("--weekends", action="store_true", help="занятия и по выходным")
+    parser.add_argument("--seed", type=int, default=0)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    weeks = args.weeks or SIZES[args.size]
+    count = write_export(args.path, weeks, args.encoding, args.groups, args.seed, args.weekends)
+    print(f"{args.path}: {weeks} нед., {count} занятий, {args.encoding}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Микро-бенчмарки горячего пути расписания: разбор CSV, компиляция,
+загрузка скомпилированного файла, индекс дат, фильтр группы и отрисовка.
+
+    python -m benchmarks.micro                   # прогон и сравнение с baseline.json
+    python -m benchmarks.micro --save            # перезаписать baseline.json
+    python -m benchmarks.micro --sizes week --only parse,render
+
+Результаты на разных машинах отличаются, поэтому вместе с замерами
+хранится калибровка — время фиксированной работы на чистом Python;
+baseline масштабируется на отношение калибровок. Регрессия — замедление
+больше --tolerance (по умолчанию 30%); тогда код выхода 1.
+
+Все файлы пишутся во временный DATA_DIR, настоящий src/core/data не трогается.
+"""
+from __future__ import annotations
+
+import os
+import sys
+import json
+import time
+import timeit
+import asyncio
+import argparse
+import tempfile
+import statistics
+from datetime import timedelta
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.generate_csv import SIZES, write_export
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+# Пользователь, от имени которого пишется выгрузка во временном DATA_DIR
+BENCH_USER_ID = 990_000_001
+
+DEFAULT_SIZES = ("week", "semester", "multi")
+
+# Сколько замеров делать, результат — медиана
+REPEAT = 5
+
+
+def calibrate() -> float:
+    """
+    Время фиксированной работы на чистом Python (сек), минимум из нескольких.
+    """
+    def work() -> None:
+        rows = [(i * 7919) % 1000 for i in range(20_000)]
+        rows.sort()
+        "".join(str(value) for value in rows[:5000])
+
+    return min(timeit.repeat(work, number=10, repeat=REPEAT)) / 10
+
+
+def measure(fn: Callable[[], object], min_time: float = 0.1) -> float:
+    """
+    Секунды на один вызов: число вызовов подбирается как в timeit.autorange,
+    из REPEAT замеров берётся медиана.
+    """
+    timer = timeit.Timer(fn)
+    number = 1
+    while True:
+        if timer.timeit(number) >= min_time:
+            break
+        number *= 2
+    return statistics.median(timer.repeat(repeat=REPEAT, number=number)) / number
+
+
+def measure_async(fn: Callable[[], object], number: int = 200) -> float:
+    async def run() -> float:
+        await fn()  # прогрев пула потоков
+        started = time.perf_counter()
+        for _ in range(number):
+            await fn()
+        return (time.perf_counter() - started) / number
+
+    return statistics.median(asyncio.run(run()) for _ in range(REPEAT))
+
+
+class Fixture:
+    """
+    Файл расписания заданного размера у тестового пользователя
+    и скомпилированная версия рядом — как после загрузки.
+    """
+
+    def __init__(self, size: str, encoding: str):
+        from src.core.encoding import write_meta
+        from src.core.storage import ensure_user_dir, get_user_schedule_file, get_user_compiled_file
+        from src.core.services.schedule_service import compile_schedule, parse_lessons
+
+        ensure_user_dir()
+        self.user_id = BENCH_USER_ID
+        self.csv_path = get_user_schedule_file(self.user_id)
+        self.compiled_path = get_user_compiled_file(self.user_id)
+        self.encoding = encoding
+
+        self.count = write_export(self.csv_path, SIZES[size], encoding)
+        write_meta(self.csv_path, encoding=encoding)
+        self.lessons = parse_lessons(self.csv_path, self.user_id, encoding)
+        compile_schedule(self.user_id, self.lessons)
+
+        # Середина выгрузки: рабочий день и неделя с занятиями
+        first = min(lesson.date for lesson in self.lessons)
+        last = max(lesson.date for lesson in self.lessons)
+        middle = first + (last - first) // 2
+        self.day = middle - timedelta(days=middle.weekday())
+        self.week = (self.day, self.day + timedelta(days=6))
+
+    def cleanup(self) -> None:
+        from src.core.schedule_cache import invalidate_schedule
+
+        invalidate_schedule(self.user_id)
+        for path in (self.csv_path, f"{self.csv_path}.meta.json", self.compiled_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+
+def bench_size(size: str, encoding: str, only: Optional[List[str]]) -> Dict[str, float]:
+    from src.core.schedule_cache import schedule_cache, rendered_cache
+    from src.core.schedule_csv import iter_lessons
+    from src.core.timetable import Timetable, load_compiled
+    from src.core.schedule_cache import file_version
+    from src.core.services.schedule_service import (
+        _render, format_schedule, get_schedule_data_for_day, read_schedule, schedule_text,
+    )
+
+    fx = Fixture(size, encoding)
+    try:
+        table = read_schedule(fx.user_id)
+        week_rows = table.rows_between(*fx.week)
+        csv_version = file_version(fx.csv_path)
+        week_lessons = table.lessons(week_rows)
+
+        def read_cold() -> None:
+            schedule_cache.invalidate(fx.user_id)
+            read_schedule(fx.user_id)
+
+        def day_text_cold() -> None:
+            rendered_cache.clear()
+            schedule_text(fx.day, fx.day, fx.user_id)
+
+        cases: Dict[str, Callable[[], object]] = {
+            # CSV -> занятия
+            "parse": lambda: list(iter_lessons(fx.csv_path, fx.encoding)),
+            # занятия -> колоночная таблица + срезы групп
+            "compile": lambda: Timetable.from_lessons(fx.lessons).prepare(),
+            # mmap скомпилированного файла
+            "load": lambda: load_compiled(fx.compiled_path, csv_version).prepare(),
+            # бинарный поиск по дням
+            "index": lambda: table.rows_between(*fx.week),
+            # срез группы 2 за неделю
+            "filter": lambda: table.views.rows(2, week_rows),
+            # текст недели из готовой таблицы
+            "render": lambda: _render(table, week_rows, "bench", 2),
+            # старый путь: список Lesson -> текст
+            "format_schedule": lambda: format_schedule(week_lessons, "bench", fx.user_id),
+            "read_schedule": lambda: read_schedule(fx.user_id),
+            "read_schedule_cold": read_cold,
+            "day_text": lambda: schedule_text(fx.day, fx.day, fx.user_id),
+            "day_text_cold": day_text_cold,
+        }
+
+        results: Dict[str, float] = {}
+        for name, fn in cases.items():
+            if only and name not in only:
+                continue
+            results[f"{size}/{name}"] = measure(fn)
+
+        if not only or "day_text_async" in only:
+            # Через schedule_executor, как из обработчика бота
+            results[f"{size}/day_text_async"] = measure_async(
+                lambda: get_schedule_data_for_day(fx.day, fx.user_id)
+            )
+        return results
+    finally:
+        fx.cleanup()
+
+
+def compare(results: Dict[str, float], calibration: float, baseline: dict, tolerance: float) -> List[str]:
+    """
+    Печатает таблицу сравнения и возвращает имена регрессий.
+    """
+    scale = calibration / baseline["calibration"]
+    regressions = []
+
+    print(f"{'бенчмарк':<32}{'сейчас':>12}{'baseline':>12}{'Δ':>9}")
+    for name, seconds in results.items():
+        base = baseline["results"].get(name)
+        if base is None:
+            print(f"{name:<32}{_fmt(seconds):>12}{'—':>12}")
+            continue
+
+        expected = base * scale
+        delta = seconds / expected - 1
+        mark = ""
+        if delta > tolerance:
+            mark = "  ← регрессия"
+            regressions.append(name)
+        print(f"{name:<32}{_fmt(seconds):>12}{_fmt(expected):>12}{delta:>+9.0%}{mark}")
+
+    print(f"\nкалибровка: {calibration * 1e3:.2f} мс (baseline {baseline['calibration'] * 1e3:.2f} мс)")
+    return regressions
+
+
+def _fmt(seconds: float) -> str:
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds * 1e6:.1f} µs"
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Микро-бенчмарки расписания")
+    parser.add_argument("--sizes", default=",".join(DEFAULT_SIZES), help=f"из {', '.join(SIZES)}")
+    parser.add_argument("--encoding", default="cp1250", choices=("utf-8", "cp1250"))
+    parser.add_argument("--only", help="через запятую: parse, compile, load, index, filter, render, ...")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--save", action="store_true", help="записать результаты как новый baseline")
+    parser.add_argument("--tolerance", type=float, default=0.30)
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    sizes = [s.strip() for s in args.sizes.split(",") if s.strip()]
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+
+    # До первого импорта src: настройки (и DATA_DIR) читаются один раз при импорте
+    if "src.config" in sys.modules:
+        raise RuntimeError("benchmarks.micro нужно запускать до импорта src")
+    scratch = tempfile.TemporaryDirectory(prefix="bench-micro-")
+    os.environ["DATA_DIR"] = scratch.name
+
+    try:
+        calibration = calibrate()
+        results: Dict[str, float] = {}
+        for size in sizes:
+            results.update(bench_size(size, args.encoding, only))
+
+        from src.core.schedule_executor import schedule_executor
+        from src.core.state_store import state_store
+        asyncio.run(schedule_executor.stop())
+        state_store.close()
+    finally:
+        scratch.cleanup()
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            "python": sys.version.split()[0],
+            "encoding": args.encoding,
+            "calibration": calibration,
+            "results": results,
+        }, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+        for name, seconds in results.items():
+            print(f"{name:<32}{_fmt(seconds):>12}")
+        print(f"\nbaseline записан: {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        for name, seconds in results.items():
+            print(f"{name:<32}{_fmt(seconds):>12}")
+        print(f"\n{args.baseline} не найден — запустите с --save")
+        return 0
+
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    regressions = compare(results, calibration, baseline, args.tolerance)
+    if regressions:
+        print(f"Регрессии (> {args.tolerance:.0%}): {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,180 @@
+"""
+Нагрузочный стенд для webhook-режима Telegram без обращения к Telegram.
+
+Отправляет синтетические обновления (команды /start и нажатия кнопок)
+POST-запросами с заголовком секрета и меряет время ответа webhook,
+пропускную способность и время «дренажа» при остановке.
+
+    # поднять WebhookServer в этом же процессе с заглушкой обработчика
+    python -m benchmarks.webhook_load --serve --count 5000 --concurrency 100 --handler-ms 20
+
+    # нагрузить уже запущенный бот (TELEGRAM_MODE=webhook)
+    python -m benchmarks.webhook_load --url http://127.0.0.1:8080/telegram/webhook --secret ...
+
+Во втором случае обработчики бота будут отвечать в Telegram от имени
+синтетических пользователей — запускайте против тестового токена.
+"""
+from __future__ import annotations
+
+import time
+import asyncio
+import argparse
+import statistics
+from typing import List, Optional
+
+import aiohttp
+
+# Подписи строк отчёта
+LABELS = {
+    "requests": "запросов",
+    "seconds": "время, с",
+    "rps": "запросов/с",
+    "statuses": "коды ответа",
+    "p50_ms": "p50, мс",
+    "p95_ms": "p95, мс",
+    "p99_ms": "p99, мс",
+    "mean_ms": "среднее, мс",
+    "drain_seconds": "дренаж, с",
+    "server": "сервер",
+}
+
+
+def make_update(update_id: int, user_id: int, kind: str) -> dict:
+    user = {"id": user_id, "is_bot": False, "first_name": "Load"}
+    chat = {"id": user_id, "type": "private"}
+    message = {"message_id": update_id, "date": int(time.time()), "chat": chat, "from": user}
+
+    if kind == "callback":
+        return {
+            "update_id": update_id,
+            "callback_query": {
+                "id": str(update_id),
+                "from": user,
+                "chat_instance": str(user_id),
+                "data": "show_today",
+                "message": {**message, "text": "menu"},
+            },
+        }
+    return {"update_id": update_id, "message": {**message, "text": "/start"}}
+
+
+def percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(q * len(values)), len(values) - 1)]
+
+
+async def post_updates(url: str, secret: str, count: int, concurrency: int, users: int) -> dict:
+    from src.adapters.telegram.webhook import SECRET_HEADER
+
+    latencies: List[float] = []
+    statuses: dict = {}
+    queue: asyncio.Queue = asyncio.Queue()
+    for i in range(count):
+        queue.put_nowait(i)
+
+    async def worker(session: aiohttp.ClientSession) -> None:
+        while not queue.empty():
+            i = queue.get_nowait()
+            kind = "callback" if i % 2 else "message"
+            body = make_update(i + 1, 10_000 + i % users, kind)
+            started = time.perf_counter()
+            async with session.post(url, json=body, headers={SECRET_HEADER: secret}) as resp:
+                await resp.read()
+                statuses[resp.status] = statuses.get(resp.status, 0) + 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    return {
+        "requests": count,
+        "seconds": round(elapsed, 3),
+        "rps": round(count / elapsed, 1) if elapsed else 0.0,
+        "statuses": statuses,
+        "p50_ms": round(1000 * percentile(latencies, 0.50), 2),
+        "p95_ms": round(1000 * percentile(latencies, 0.95), 2),
+        "p99_ms": round(1000 * percentile(latencies, 0.99), 2),
+        "mean_ms": round(1000 * statistics.fmean(latencies), 2) if latencies else 0.0,
+    }
+
+
+async def serve_and_load(args: argparse.Namespace) -> dict:
+    from aiogram import Bot, Dispatcher, Router
+    from aiogram.types import CallbackQuery, Message
+
+    from src.adapters.telegram.webhook import WebhookServer
+
+    router = Router()
+
+    # Заглушки вместо настоящих обработчиков: только имитация работы
+    @router.message()
+    async def on_message(message: Message) -> None:
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    @router.callback_query()
+    async def on_callback(callback: CallbackQuery) -> None:
+        await asyncio.sleep(args.handler_ms / 1000)
+
+    dp = Dispatcher()
+    dp.include_router(router)
+    bot = Bot("123456:LOAD-TEST")
+
+    server = WebhookServer(
+        dp, bot,
+        path="/telegram/webhook",
+        secret=args.secret,
+        max_concurrent=args.max_concurrent,
+        drain_timeout=60,
+    )
+    await server.start("127.0.0.1", args.port)
+
+    try:
+        url = f"http://127.0.0.1:{args.port}/telegram/webhook"
+        result = await post_updates(url, args.secret, args.count, args.concurrency, args.users)
+    finally:
+        drain_started = time.perf_counter()
+        await server.stop()
+        result_drain = time.perf_counter() - drain_started
+        await bot.session.close()
+
+    result["drain_seconds"] = round(result_drain, 3)
+    result["server"] = server.stats()
+    return result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Нагрузка на webhook Telegram синтетическими обновлениями")
+    parser.add_argument("--url", help="адрес webhook уже запущенного бота")
+    parser.add_argument("--serve", action="store_true", help="поднять WebhookServer с заглушками в этом процессе")
+    parser.add_argument("--secret", default="load-test-secret", help="секрет webhook (заголовок X-Telegram-Bot-Api-Secret-Token)")
+    parser.add_argument("--port", type=int, default=8089, help="порт WebhookServer для --serve")
+    parser.add_argument("--count", type=int, default=2000, help="число отправляемых обновлений")
+    parser.add_argument("--concurrency", type=int, default=50, help="одновременных POST-запросов")
+    parser.add_argument("--users", type=int, default=500, help="число разных синтетических пользователей")
+    parser.add_argument("--handler-ms", type=float, default=10, help="имитация работы обработчика (--serve)")
+    parser.add_argument("--max-concurrent", type=int, default=32, help="WEBHOOK_MAX_CONCURRENT для --serve")
+    args = parser.parse_args(argv)
+
+    if not args.serve and not args.url:
+        parser.error("нужен --url или --serve")
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    if args.serve:
+        result = asyncio.run(serve_and_load(args))
+    else:
+        result = asyncio.run(post_updates(args.url, args.secret, args.count, args.concurrency, args.users))
+
+    for key, value in result.items():
+        print(f"{LABELS.get(key, key):>14}: {value}")
+
+
+if __name__ == "__main__":
+    main()
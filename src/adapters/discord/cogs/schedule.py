@@ -1,18 +1,37 @@
 from __future__ import annotations
 
-import os
 import logging
 import datetime
+from typing import Set
+
 import discord
 from discord.ext import commands
 
-from src.core.url_store import set_user_url, load_urls
-from src.core.storage import get_user_schedule_file
-from src.core.parser import download_schedule
+from src.config import settings
+from src.core.shared_state import shared_state
+from src.core.url_store import set_user_url, get_user_url
+from src.adapters.discord.outbound import send, edit
+from src.core.outbound import ProgressMessage
 from src.core.services.schedule_service import get_schedule_data_for_day  # переместил под src/core/services
+from src.core.services.refresh_service import refresh_user_schedule
+from src.core.services.upload_service import ingest_upload, stream_url, UploadError, UploadTooLarge
 
 log = logging.getLogger("discord.schedule")
 
+PROGRESS_TEXT = {
+    "queued": "w kolejce: {position}, ~{eta:.0f} s",
+    "open": "otwieram stronę",
+    "search": "szukam planu",
+    "download": "pobieram CSV",
+}
+
+
+def _progress_editor(msg: discord.Message, text: str) -> ProgressMessage:
+    return ProgressMessage(
+        lambda content, **kwargs: edit(msg, content=content, **kwargs),
+        text, PROGRESS_TEXT,
+    )
+
 
 class ScheduleButtons(discord.ui.View):
     def __init__(self, user_id: int, current_date: datetime.date):
@@ -27,7 +46,7 @@ class ScheduleButtons(discord.ui.View):
             return
 
         new_date = self.current_date - datetime.timedelta(days=1)
-        schedule = await get_schedule_data_for_day(new_date, self.user_id)
+        schedule = await get_schedule_data_for_day(new_date, self.user_id, platform="discord")
 
         await interaction.response.edit_message(
             content=f"**{new_date.isoformat()}**\n\n{schedule}",
@@ -41,7 +60,7 @@ class ScheduleButtons(discord.ui.View):
             return
 
         new_date = datetime.date.today()
-        schedule = await get_schedule_data_for_day(new_date, self.user_id)
+        schedule = await get_schedule_data_for_day(new_date, self.user_id, platform="discord")
 
         await interaction.response.edit_message(
             content=f"**{new_date.isoformat()}**\n\n{schedule}",
@@ -55,7 +74,7 @@ class ScheduleButtons(discord.ui.View):
             return
 
         new_date = self.current_date + datetime.timedelta(days=1)
-        schedule = await get_schedule_data_for_day(new_date, self.user_id)
+        schedule = await get_schedule_data_for_day(new_date, self.user_id, platform="discord")
 
         await interaction.response.edit_message(
             content=f"**{new_date.isoformat()}**\n\n{schedule}",
@@ -66,12 +85,40 @@ class ScheduleButtons(discord.ui.View):
 class ScheduleCog(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.waiting_for_file: dict[int, bool] = {}
-        self.waiting_for_url: dict[int, bool] = {}
+
+    # Ожидание ссылки/файла хранится в общем состоянии: следующее сообщение
+    # пользователя может попасть в другой процесс (другой шард)
+    WAITING_KINDS = ("url", "file")
+
+    @staticmethod
+    def _waiting_key(kind: str, user_id: int) -> str:
+        return f"discord:waiting_for_{kind}:{user_id}"
+
+    @classmethod
+    async def _waiting(cls, user_id: int) -> Set[str]:
+        """
+        Чего ждём от пользователя — одним запросом на сообщение.
+        """
+        keys = {cls._waiting_key(kind, user_id): kind for kind in cls.WAITING_KINDS}
+        values = await shared_state.aget_many(keys)
+        return {keys[key] for key, value in values.items() if value}
+
+    @classmethod
+    async def _set_waiting(cls, kind: str, user_id: int, waiting: bool) -> None:
+        key = cls._waiting_key(kind, user_id)
+        if waiting:
+            await shared_state.aset(key, True, ttl=settings.pending_input_ttl)
+        else:
+            await shared_state.adelete(key)
+
+    @staticmethod
+    async def _save_upload(user_id: int, attachment: discord.Attachment) -> None:
+        await ingest_upload(user_id, stream_url(attachment.url), declared_size=attachment.size)
 
     @commands.command()
     async def start(self, ctx: commands.Context):
-        await ctx.send(
+        await send(
+            ctx,
             "Cześć! Jestem botem z planem zajęć.\n"
             "Polecenia:\n"
             "`!today` — plan na dziś\n"
@@ -84,41 +131,37 @@ class ScheduleCog(commands.Cog):
     @commands.command()
     async def seturl(self, ctx: commands.Context, url: str):
         if not url.startswith(("http://", "https://")):
-            await ctx.send("❗ Podaj poprawny adres URL, np. https://example.com/schedule.csv")
+            await send(ctx, "❗ Podaj poprawny adres URL, np. https://example.com/schedule.csv")
             return
 
         set_user_url(ctx.author.id, url)
-        await ctx.send("Link zapisany. Użyj `!update` aby pobrać plan.")
+        await send(ctx, "Link zapisany. Użyj `!update` aby pobrać plan.")
 
     @commands.command()
     async def update(self, ctx: commands.Context):
         user_id = ctx.author.id
-        links = load_urls()
+        url = get_user_url(user_id)
 
-        if str(user_id) in links:
-            url = links[str(user_id)]
-            file_path = get_user_schedule_file(user_id)
+        if url:
 
-            msg = await ctx.send("⏳ Aktualizuję plan zajęć...")
+            msg = await send(ctx, "⏳ Aktualizuję plan zajęć...")
+            progress = _progress_editor(msg, "⏳ Aktualizuję plan zajęć...")
 
             try:
-                if os.path.exists(file_path):
-                    os.remove(file_path)
-
-                await download_schedule(url, file_path)
+                await refresh_user_schedule(user_id, url, on_progress=progress.report)
 
-                await msg.edit(content="✅ Plan zaktualizowany.")
+                await progress.finish("✅ Plan zaktualizowany.")
             except Exception as e:
-                await msg.edit(content=f"❌ Błąd:\n{e}")
+                await progress.finish(f"❌ Błąd:\n{e}")
             return
 
-        self.waiting_for_url[user_id] = True
-        await ctx.send("Wklej link do planu zajęć w następnym wiadomości.")
+        await self._set_waiting("url", user_id, True)
+        await send(ctx, "Wklej link do planu zajęć w następnym wiadomości.")
 
     @commands.command()
     async def upload(self, ctx: commands.Context):
-        self.waiting_for_file[ctx.author.id] = True
-        await ctx.send("Prześlij plik CSV w jednej wiadomości.")
+        await self._set_waiting("file", ctx.author.id, True)
+        await send(ctx, "Prześlij plik CSV w jednej wiadomości.")
 
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
@@ -127,72 +170,60 @@ class ScheduleCog(commands.Cog):
 
         user_id = message.author.id
         content = (message.content or "").strip()
+        waiting = await self._waiting(user_id)
 
-        if self.waiting_for_url.get(user_id):
-            file_path = get_user_schedule_file(user_id)
+        if "url" in waiting:
             url = content
 
-            msg = await message.channel.send("⏳ Pobieram plan zajęć...")
+            msg = await send(message.channel, "⏳ Pobieram plan zajęć...")
+            progress = _progress_editor(msg, "⏳ Pobieram plan zajęć...")
 
             try:
                 set_user_url(user_id, url)
 
-                if os.path.exists(file_path):
-                    os.remove(file_path)
+                await refresh_user_schedule(user_id, url, on_progress=progress.report)
 
-                await download_schedule(url, file_path)
-
-                await msg.edit(content="✅ Plan zaktualizowany.")
+                await progress.finish("✅ Plan zaktualizowany.")
             except Exception as e:
-                await msg.edit(content=f"❌ Błąd:\n{e}")
+                await progress.finish(f"❌ Błąd:\n{e}")
 
-            self.waiting_for_url[user_id] = False
+            await self._set_waiting("url", user_id, False)
 
-        if self.waiting_for_file.get(user_id) and message.attachments:
+        if "file" in waiting and message.attachments:
             attachment = message.attachments[0]
             filename = (attachment.filename or "").lower()
 
             if not filename.endswith(".csv"):
-                await message.channel.send("❗ Wyślij plik .csv")
+                await send(message.channel, "❗ Wyślij plik .csv")
             else:
                 try:
-                    file_bytes = await attachment.read()
-
-                    if len(file_bytes) > 5 * 1024 * 1024:
-                        await message.channel.send("❗ Plik jest za duży (>5MB).")
-                    else:
-                        save_path = get_user_schedule_file(user_id)
-
-                        if os.path.exists(save_path):
-                            os.remove(save_path)
+                    await self._save_upload(user_id, attachment)
 
-                        with open(save_path, "wb") as f:
-                            f.write(file_bytes)
+                    await send(message.channel, "✅ Plik z planem zaktualizowany!")
+                except UploadTooLarge as e:
+                    await send(message.channel, f"❗ Plik jest za duży (>{e.limit_mb}MB).")
+                except UploadError as e:
+                    await send(message.channel, f"❌ Błąd:\n{e}")
+                except Exception:
+                    log.exception(f"Błąd zapisu pliku użytkownika {user_id}")
+                    await send(message.channel, "❌ Nie udało się zapisać pliku, spróbuj ponownie.")
 
-                        await message.channel.send("✅ Plik z planem zaktualizowany!")
-                except Exception as e:
-                    await message.channel.send(f"❌ Błąd:\n{e}")
+            await self._set_waiting("file", user_id, False)
 
-            self.waiting_for_file[user_id] = False
-
-        if message.attachments and not self.waiting_for_file.get(user_id):
+        if message.attachments and "file" not in waiting:
             attachment = message.attachments[0]
             filename = (attachment.filename or "").lower()
 
             if filename.endswith(".csv"):
                 try:
-                    file_bytes = await attachment.read()
-                    save_path = get_user_schedule_file(user_id)
-
-                    if os.path.exists(save_path):
-                        os.remove(save_path)
-
-                    with open(save_path, "wb") as f:
-                        f.write(file_bytes)
+                    await self._save_upload(user_id, attachment)
 
-                    await message.channel.send("✅ Plik z planem przesłany.")
-                except Exception as e:
-                    await message.channel.send(f"❌ Błąd:\n{e}")
+                    await send(message.channel, "✅ Plik z planem przesłany.")
+                except UploadError as e:
+                    await send(message.channel, f"❌ Błąd:\n{e}")
+                except Exception:
+                    log.exception(f"Błąd zapisu pliku użytkownika {user_id}")
+                    await send(message.channel, "❌ Nie udało się zapisać pliku, spróbuj ponownie.")
 
         if message.content.startswith(("!", "/")):
             return
@@ -203,16 +234,16 @@ class ScheduleCog(commands.Cog):
     async def today(self, ctx: commands.Context):
         user_id = ctx.author.id
         today = datetime.date.today()
-        text = await get_schedule_data_for_day(today, user_id)
+        text = await get_schedule_data_for_day(today, user_id, platform="discord")
 
-        await ctx.send(f"**{today.isoformat()}**\n\n{text}", view=ScheduleButtons(user_id, today))
+        await send(ctx, f"**{today.isoformat()}**\n\n{text}", view=ScheduleButtons(user_id, today))
 
     @commands.command()
     async def tomorrow(self, ctx: commands.Context):
         user_id = ctx.author.id
         tomorrow = datetime.date.today() + datetime.timedelta(days=1)
-        text = await get_schedule_data_for_day(tomorrow, user_id)
-        await ctx.send(f"**{tomorrow.isoformat()}**\n\n{text}", view=ScheduleButtons(user_id, tomorrow))
+        text = await get_schedule_data_for_day(tomorrow, user_id, platform="discord")
+        await send(ctx, f"**{tomorrow.isoformat()}**\n\n{text}", view=ScheduleButtons(user_id, tomorrow))
 
 
 async def setup(bot: commands.Bot):
@@ -0,0 +1,17 @@
+import discord
+
+from src.core.outbound import discord_outbound, INTERACTIVE
+
+
+# Все исходящие сообщения Discord идут через общую очередь с лимитами по каналам.
+# Ответы на interaction (кнопки) не проходят через очередь: у них свой
+# маршрут и жёсткий срок ответа в 3 секунды.
+
+
+async def send(destination: discord.abc.Messageable, content: str, lane: int = INTERACTIVE, **kwargs) -> discord.Message:
+    channel = getattr(destination, "channel", destination)
+    return await discord_outbound.send(channel.id, lambda: destination.send(content, **kwargs), lane)
+
+
+async def edit(message: discord.Message, **kwargs) -> discord.Message:
+    return await discord_outbound.send(message.channel.id, lambda: message.edit(**kwargs))
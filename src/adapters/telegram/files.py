@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+import asyncio
+from typing import AsyncIterator
+
+from .bot_instence import bot
+from ...core.services.upload_service import CHUNK_SIZE
+
+
+async def stream_file(file_path: str) -> AsyncIterator[bytes]:
+    """
+    Содержимое файла Telegram частями через сессию aiogram: учитываются её прокси
+    и собственный Bot API сервер. Ссылка с токеном наружу не выходит —
+    ошибки сети превращаются в UploadError без текста исключения.
+    """
+    api = bot.session.api
+    if api.is_local:
+        path = api.wrap_local_file.to_local(file_path)
+        f = await asyncio.to_thread(open, path, "rb")
+        try:
+            while chunk := await asyncio.to_thread(f.read, CHUNK_SIZE):
+                yield chunk
+        finally:
+            await asyncio.to_thread(f.close)
+        return
+
+    async for chunk in bot.session.stream_content(
+        url=api.file_url(bot.token, file_path),
+        chunk_size=CHUNK_SIZE,
+        raise_for_status=True,
+    ):
+        yield chunk
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+from typing import Any, Dict, Optional
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, StateType, StorageKey
+
+from ...core.shared_state import SharedState
+
+
+class SharedStateStorage(BaseStorage):
+    """
+    FSM aiogram поверх общего состояния воркеров: шаг диалога
+    («жду ссылку») виден любому процессу, получившему следующее обновление.
+    Незавершённый диалог забывается через ttl секунд.
+    """
+
+    def __init__(self, state: SharedState, ttl: Optional[float] = None):
+        self.state = state
+        self.ttl = ttl
+
+    @staticmethod
+    def _key(key: StorageKey, part: str) -> str:
+        return (
+            f"fsm:{key.bot_id}:{key.chat_id}:{key.user_id}:"
+            f"{key.thread_id or ''}:{key.destiny}:{part}"
+        )
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        value = state.state if isinstance(state, State) else state
+        if value is None:
+            await self.state.adelete(self._key(key, "state"))
+        else:
+            await self.state.aset(self._key(key, "state"), value, self.ttl)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        return await self.state.aget(self._key(key, "state"))
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if not data:
+            await self.state.adelete(self._key(key, "data"))
+        else:
+            await self.state.aset(self._key(key, "data"), dict(data), self.ttl)
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        return dict(await self.state.aget(self._key(key, "data")) or {})
+
+    async def close(self) -> None:
+        pass
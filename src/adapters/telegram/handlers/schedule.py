@@ -1,41 +1,67 @@
+import logging
+
 from aiogram import Router, types
 from aiogram import F
 from aiogram.types import Message
 from aiogram.fsm.context import FSMContext
 from datetime import datetime, timedelta
-import os
 
 from ..bot_instence import bot
-from ....core.storage import user_groups, get_user_schedule_file
+from ..files import stream_file
+from ..outbound import answer, edit_text, edit_reply_markup
+from ....core.outbound import ProgressMessage
 from ..states.schedule_states import ScheduleStates
 from ..kbds.kbds import get_main_keyboard, get_day_navigation_keyboard
-from ....core.services.schedule_service import get_schedule_data_for_day
-from ....core.parser import download_schedule
+from ....core.services.schedule_service import get_schedule_data_for_day, load_schedule
+from ....core.services.refresh_service import refresh_user_schedule
+from ....core.services.upload_service import UploadError, ingest_upload
+from ....core.services.notification_service import reminder_engine
 from .start import send_welcome
-from ....core.url_store import load_urls, set_user_url
-from ....core.storage import user_notifications
+from ....core.url_store import get_user_url, set_user_url
+from ....core.state_store import (
+    get_user_group, set_user_group, get_user_notifications, set_user_notifications,
+)
+
 
+log = logging.getLogger("telegram.schedule")
 
 router = Router()
 
+PROGRESS_TEXT = {
+    "queued": "в очереди: {position}, ~{eta:.0f} с",
+    "open": "открываю сайт",
+    "search": "ищу расписание",
+    "download": "скачиваю CSV",
+}
+
+
+def _progress_editor(loading: Message, text: str) -> ProgressMessage:
+    return ProgressMessage(
+        lambda new_text, **kwargs: edit_text(loading, new_text, **kwargs),
+        text, PROGRESS_TEXT,
+    )
+
 @router.message(F.document)
 async def handle_file_upload(message: Message):
     user_id = message.from_user.id # type: ignore
     doc = message.document
 
     if not doc.file_name.lower().endswith(".csv"): # type: ignore
-        return await message.answer("❗ Отправьте файл в формате .csv")
+        return await answer(message, "❗ Отправьте файл в формате .csv")
 
     try:
         file = await bot.get_file(doc.file_id)
-        save_path = get_user_schedule_file(user_id)
-        await bot.download_file(file.file_path, save_path)
+        await ingest_upload(user_id, stream_file(file.file_path), declared_size=doc.file_size)
 
-        await message.answer("✅ Файл расписания обновлён!")
+        await answer(message, "✅ Файл расписания обновлён!")
         await send_welcome(message)
 
-    except Exception as e:
-        await message.answer(f"❌ Ошибка сохранения файла:\n{e}")
+    except UploadError as e:
+        await answer(message, str(e))
+    except Exception:
+        # Текст исключения может содержать ссылку на файл с токеном бота
+        log.exception(f"Ошибка загрузки файла пользователя {user_id}")
+        await answer(message, "❌ Ошибка сохранения файла, попробуйте ещё раз")
 
 
 @router.callback_query(F.data.startswith("show_"))
@@ -58,7 +84,7 @@ async def show_schedule_callback(callback: types.CallbackQuery):
         else:
             date = today.replace(month=today.month+1, day=1)
     else:
-        return await callback.message.edit_text("⚠️ Неверный timeframe")
+        return await edit_text(callback.message, "⚠️ Неверный timeframe")
 
     text = await get_schedule_data_for_day(date, user_id)
 
@@ -71,35 +97,31 @@ async def show_schedule_callback(callback: types.CallbackQuery):
 
     keyboard = get_day_navigation_keyboard(date, min_d, max_d)
 
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await edit_text(callback.message, text, reply_markup=keyboard)
 
 
 @router.callback_query(lambda c: c.data == "update_schedule")
 async def process_update(callback: types.CallbackQuery, state: FSMContext):
     user_id = callback.from_user.id
-    links = load_urls()
+    url = get_user_url(user_id)
 
-    if str(user_id) in links:
-        url = links[str(user_id)]
-        file_path = get_user_schedule_file(user_id)
+    if url:
 
-        loading = await callback.message.edit_text("⏳ Обновляю расписание...")
+        loading = await edit_text(callback.message, "⏳ Обновляю расписание...")
+        progress = _progress_editor(loading, "⏳ Обновляю расписание...")
 
         try:
-            if os.path.exists(file_path):
-                os.remove(file_path)
+            await refresh_user_schedule(user_id, url, on_progress=progress.report)
 
-            await download_schedule(url, file_path)
-
-            await loading.edit_text("✅ Расписание обновлено!", 
+            await progress.finish("✅ Расписание обновлено!", 
                                     reply_markup=get_main_keyboard(user_id))
         except Exception as e:
-            await loading.edit_text(f"❌ Ошибка:\n{e}")
+            await progress.finish(f"❌ Ошибка:\n{e}")
 
         return
 
     # --- Если ссылки нет — просим ввести ---
-    await callback.message.edit_text("Вставь ссылку на расписание:")
+    await edit_text(callback.message, "Вставь ссылку на расписание:")
     await state.set_state(ScheduleStates.waiting_for_url)
 
 
@@ -111,18 +133,15 @@ async def get_schedule_url(message: Message, state: FSMContext):
 
     set_user_url(user_id, url)
 
-    loading = await message.answer("⏳ Загружаю расписание...")
+    loading = await answer(message, "⏳ Загружаю расписание...")
+    progress = _progress_editor(loading, "⏳ Загружаю расписание...")
 
     try:
-        file_path = get_user_schedule_file(user_id)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-
-        await download_schedule(url, file_path)
+        await refresh_user_schedule(user_id, url, on_progress=progress.report)
 
-        await loading.edit_text("✅ Расписание обновлено!", reply_markup=get_main_keyboard(user_id))
+        await progress.finish("✅ Расписание обновлено!", reply_markup=get_main_keyboard(user_id))
     except Exception as e:
-        await loading.edit_text(f"❌ Ошибка:\n{e}")
+        await progress.finish(f"❌ Ошибка:\n{e}")
 
     await state.clear()
 
@@ -132,22 +151,27 @@ async def get_schedule_url(message: Message, state: FSMContext):
 async def toggle_group(callback: types.CallbackQuery):
     user_id = callback.from_user.id
 
-    new_group = (user_groups.get(user_id, 0) + 1) % 4
-    user_groups[user_id] = new_group
+    # 0 (все) → 1 → … → N → 0, где N — число групп в файле, но не меньше 3
+    group_count = (await load_schedule(user_id)).views.group_count
+    new_group = (get_user_group(user_id) + 1) % (group_count + 1)
+    set_user_group(user_id, new_group)
+    reminder_engine.reschedule(user_id)
 
     await callback.answer(f"Группа: {new_group or 'Все'}")
-    await callback.message.edit_reply_markup(get_main_keyboard(user_id))
+    await edit_reply_markup(callback.message, get_main_keyboard(user_id))
 
 
 @router.callback_query(F.data == "toggle_notifications")
 async def toggle_notifications(callback: types.CallbackQuery):
     user_id = callback.from_user.id
-    user_notifications[user_id] = not user_notifications.get(user_id, False)
+    enabled = not get_user_notifications(user_id)
+    set_user_notifications(user_id, enabled)
+    reminder_engine.reschedule(user_id)
 
     await callback.answer(
-        "Напоминания включены" if user_notifications[user_id] else "Напоминания выключены"
+        "Напоминания включены" if enabled else "Напоминания выключены"
     )
-    await callback.message.edit_reply_markup(get_main_keyboard(user_id))
+    await edit_reply_markup(callback.message, get_main_keyboard(user_id))
 
 
 @router.callback_query(F.data.startswith("day_"))
@@ -165,13 +189,14 @@ async def navigate_day(callback: types.CallbackQuery):
 
     keyboard = get_day_navigation_keyboard(date_val, min_d, max_d)
 
-    await callback.message.edit_text(text, reply_markup=keyboard)
+    await edit_text(callback.message, text, reply_markup=keyboard)
 
 
 @router.callback_query(F.data == "main_menu")
 async def main_menu(callback: types.CallbackQuery):
     user_id = callback.from_user.id
-    await callback.message.edit_text(
+    await edit_text(
+        callback.message,
         "👋 Привет! Выберите опцию ниже.",
         reply_markup=get_main_keyboard(user_id)
     )
\ No newline at end of file
@@ -3,6 +3,7 @@ from aiogram.types import Message
 from aiogram import Router
 
 from ..kbds.kbds import get_main_keyboard
+from ..outbound import answer
 
 
 router = Router()
@@ -15,4 +16,4 @@ async def send_welcome(message: Message):
         "Выберите опцию ниже.\n\n"
         "Для обновления данных отправьте новый файл `Plany.csv`."
     )
-    await message.answer(text, reply_markup=get_main_keyboard(user_id))
\ No newline at end of file
+    await answer(message, text, reply_markup=get_main_keyboard(user_id))
\ No newline at end of file
@@ -1,13 +1,13 @@
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from datetime import timedelta
-from ....core.storage import user_notifications, user_groups
+from ....core.state_store import get_user_notifications, get_user_group
 
 
 def get_main_keyboard(user_id: int) -> InlineKeyboardMarkup:
-    notif_state = user_notifications.get(user_id, False)
+    notif_state = get_user_notifications(user_id)
     notif_text = "🔔 Напоминания ВКЛ" if notif_state else "🔕 Напоминания ВЫКЛ"
 
-    group_num = user_groups.get(user_id, 0)
+    group_num = get_user_group(user_id)
     group_text = "👥 Фильтр: Все группы" if group_num == 0 else f"👥 Фильтр: {group_num} группа"
 
     return InlineKeyboardMarkup(inline_keyboard=[
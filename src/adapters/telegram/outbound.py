@@ -0,0 +1,25 @@
+from aiogram.types import InlineKeyboardMarkup, Message
+
+from .bot_instence import bot
+from ...core.outbound import telegram_outbound, INTERACTIVE
+
+
+# Все исходящие сообщения Telegram идут через общую очередь с лимитами
+
+
+async def answer(message: Message, text: str, **kwargs) -> Message:
+    return await telegram_outbound.send(message.chat.id, lambda: message.answer(text, **kwargs))
+
+
+async def edit_text(message: Message, text: str, **kwargs):
+    return await telegram_outbound.send(message.chat.id, lambda: message.edit_text(text, **kwargs))
+
+
+async def edit_reply_markup(message: Message, reply_markup: InlineKeyboardMarkup):
+    return await telegram_outbound.send(
+        message.chat.id, lambda: message.edit_reply_markup(reply_markup=reply_markup)
+    )
+
+
+async def send_message(chat_id: int, text: str, lane: int = INTERACTIVE, **kwargs) -> Message:
+    return await telegram_outbound.send(chat_id, lambda: bot.send_message(chat_id, text, **kwargs), lane)
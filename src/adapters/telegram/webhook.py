@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import hmac
+import asyncio
+import hashlib
+import logging
+from typing import Optional, Set
+
+from aiohttp import web
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+
+from ...config import settings
+
+
+log = logging.getLogger("telegram.webhook")
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+def webhook_secret(token: str) -> str:
+    """
+    Секрет из WEBHOOK_SECRET, а если он не задан — стабильный хэш токена:
+    одинаковый у всех процессов и между перезапусками.
+    """
+    if settings.webhook_secret:
+        return settings.webhook_secret
+    return hashlib.sha256(f"webhook:{token}".encode()).hexdigest()
+
+
+class WebhookServer:
+    """
+    Приём обновлений Telegram через локальный aiohttp-сервер вместо long polling.
+
+    Запрос с неверным секретом отклоняется, корректный сразу получает 200,
+    а обработка идёт в фоне: одновременно не больше max_concurrent обновлений.
+    При остановке сервер перестаёт принимать новые обновления (503 — Telegram
+    повторит их позже) и дожидается уже принятых не дольше drain_timeout.
+    """
+
+    def __init__(
+        self,
+        dp: Dispatcher,
+        bot: Bot,
+        path: str,
+        secret: str,
+        max_concurrent: int,
+        drain_timeout: float,
+    ):
+        self.dp = dp
+        self.bot = bot
+        self.path = path
+        self.secret = secret
+        self.drain_timeout = drain_timeout
+
+        self._slots = asyncio.Semaphore(max(max_concurrent, 1))
+        self._tasks: Set[asyncio.Task] = set()
+        self._runner: Optional[web.AppRunner] = None
+        self._draining = False
+
+        self.received = 0
+        self.handled = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def make_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle)
+        app.router.add_get("/health", self._health)
+        return app
+
+    async def start(self, host: str, port: int) -> None:
+        self._runner = web.AppRunner(self.make_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        log.info(f"Webhook слушает http://{host}:{port}{self.path}")
+
+    async def stop(self) -> None:
+        self._draining = True
+        if self._tasks:
+            log.info(f"Ожидание обработки {len(self._tasks)} обновлений...")
+            _, pending = await asyncio.wait(set(self._tasks), timeout=self.drain_timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                log.warning(f"Не дождались {len(pending)} обновлений — отменены")
+
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._tasks),
+            "received": self.received,
+            "handled": self.handled,
+            "failed": self.failed,
+            "rejected": self.rejected,
+        }
+
+    async def _health(self, request: web.Request) -> web.Response:
+        return web.json_response({"draining": self._draining, **self.stats()})
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token, self.secret):
+            self.rejected += 1
+            return web.Response(status=401)
+
+        if self._draining:
+            return web.Response(status=503)
+
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except Exception:
+            self.rejected += 1
+            log.debug("Некорректное обновление", exc_info=True)
+            return web.Response(status=400)
+
+        self.received += 1
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return web.Response()
+
+    async def _process(self, update: Update) -> None:
+        async with self._slots:
+            try:
+                await self.dp.feed_update(self.bot, update)
+                self.handled += 1
+            except Exception:
+                self.failed += 1
+                log.exception(f"Ошибка обработки обновления {update.update_id}")
+
+
+async def run_webhook(dp: Dispatcher, bot: Bot, stop_event: asyncio.Event) -> None:
+    """
+    Регистрирует webhook у Telegram, обслуживает обновления до stop_event
+    и корректно завершает работу. Хуки dp.startup/dp.shutdown вызываются
+    так же, как при polling.
+    """
+    if not settings.webhook_base_url:
+        raise RuntimeError("TELEGRAM_MODE=webhook, но WEBHOOK_BASE_URL не задан.")
+
+    server = WebhookServer(
+        dp, bot,
+        path=settings.webhook_path,
+        secret=webhook_secret(bot.token),
+        max_concurrent=settings.webhook_max_concurrent,
+        drain_timeout=settings.webhook_drain_timeout,
+    )
+
+    await dp.emit_startup(bot=bot, dispatcher=dp)
+    try:
+        await server.start(settings.webhook_host, settings.webhook_port)
+        await bot.set_webhook(
+            settings.webhook_base_url.rstrip("/") + settings.webhook_path,
+            secret_token=server.secret,
+            allowed_updates=dp.resolve_used_update_types(),
+        )
+        await stop_event.wait()
+    finally:
+        await server.stop()
+        log.info(f"Webhook остановлен: {server.stats()}")
+        await dp.emit_shutdown(bot=bot, dispatcher=dp)
+        await bot.session.close()
@@ -17,7 +17,8 @@ load_dotenv(dotenv_path=ENV_PATH)
 PROJECT_ROOT: Path = Path(__file__).resolve().parents[1]
 SRC_DIR: Path = PROJECT_ROOT / "src"
 CORE_DIR: Path = SRC_DIR / "core"
-DATA_DIR: Path = CORE_DIR / "data"
+# DATA_DIR — например, смонтированный том или временный каталог тестов
+DATA_DIR: Path = Path(os.getenv("DATA_DIR") or CORE_DIR / "data")
 
 
 def _get_bool(name: str, default: bool = False) -> bool:
@@ -27,6 +28,19 @@ def _get_bool(name: str, default: bool = False) -> bool:
     return raw.strip().lower() in ("1", "true", "yes", "on")
 
 
+def _get_int(name: str, default: int) -> int:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        return default
+    try:
+        return int(raw.strip())
+    except ValueError:
+        logging.getLogger(__name__).warning(
+            "Некорректное значение %s=%r, используется %s", name, raw, default
+        )
+        return default
+
+
 def _get_str(name: str, default: Optional[str] = None) -> Optional[str]:
     raw = os.getenv(name)
     if raw is None:
@@ -41,6 +55,63 @@ class Settings:
     telegram_token: Optional[str]
 
     debug: bool
+    run_adapters: Optional[str]
+    health_port: int
+
+    telegram_mode: str
+    webhook_base_url: Optional[str]
+    webhook_path: str
+    webhook_host: str
+    webhook_port: int
+    webhook_secret: Optional[str]
+    webhook_max_concurrent: int
+    webhook_drain_timeout: int
+
+    schedule_cache_entries: int
+    schedule_cache_mb: int
+    render_cache_entries: int
+    render_cache_mb: int
+    schedule_parser: str
+    schedule_workers: int
+    upload_max_mb: int
+
+    browser_pool_size: int
+    browser_max_uses: int
+    scrape_ready_timeout: int
+    download_workers: int
+
+    scrape_max_concurrent: int
+    scrape_user_cooldown: int
+    scrape_backoff_base: int
+    scrape_backoff_max: int
+    http_pool_size: int
+    replay_timeout: int
+
+    refresh_interval: int
+    refresh_concurrency: int
+    refresh_jitter: int
+    refresh_fresh_for: int
+
+    state_flush_interval_ms: int
+    state_batch_size: int
+
+    reminder_lead_minutes: int
+    reminder_horizon_hours: int
+    schedule_timezone: str
+
+    telegram_send_rate: int
+    telegram_chat_burst: int
+    discord_send_rate: int
+    discord_channel_burst: int
+
+    shared_state_backend: str
+    shared_state_path: Path
+    shared_poll_interval_ms: int
+    shared_lease_seconds: int
+    pending_input_ttl: int
+    discord_autoshard: bool
+    discord_shard_count: int
+    discord_shard_ids: Optional[str]
 
     project_root: Path
     src_dir: Path
@@ -53,6 +124,54 @@ class Settings:
             discord_token=_get_str("DISCORD_TOKEN"),
             telegram_token=_get_str("TELEGRAM_TOKEN"),
             debug=_get_bool("DEBUG", default=False),
+            run_adapters=_get_str("RUN_ADAPTERS"),
+            health_port=_get_int("HEALTH_PORT", 0),
+            telegram_mode=(_get_str("TELEGRAM_MODE", "polling") or "polling").lower(),
+            webhook_base_url=_get_str("WEBHOOK_BASE_URL"),
+            webhook_path=_get_str("WEBHOOK_PATH", "/telegram/webhook"),
+            webhook_host=_get_str("WEBHOOK_HOST", "0.0.0.0"),
+            webhook_port=_get_int("WEBHOOK_PORT", _get_int("PORT", 8080)),
+            webhook_secret=_get_str("WEBHOOK_SECRET"),
+            webhook_max_concurrent=_get_int("WEBHOOK_MAX_CONCURRENT", 32),
+            webhook_drain_timeout=_get_int("WEBHOOK_DRAIN_TIMEOUT", 30),
+            schedule_cache_entries=_get_int("SCHEDULE_CACHE_ENTRIES", 256),
+            schedule_cache_mb=_get_int("SCHEDULE_CACHE_MB", 64),
+            render_cache_entries=_get_int("RENDER_CACHE_ENTRIES", 4096),
+            render_cache_mb=_get_int("RENDER_CACHE_MB", 16),
+            schedule_parser=(_get_str("SCHEDULE_PARSER", "csv") or "csv").lower(),
+            schedule_workers=_get_int("SCHEDULE_WORKERS", 4),
+            upload_max_mb=_get_int("UPLOAD_MAX_MB", 5),
+            browser_pool_size=_get_int("BROWSER_POOL_SIZE", 2),
+            browser_max_uses=_get_int("BROWSER_MAX_USES", 20),
+            scrape_ready_timeout=_get_int("SCRAPE_READY_TIMEOUT", 52),
+            download_workers=_get_int("DOWNLOAD_WORKERS", 2),
+            scrape_max_concurrent=_get_int("SCRAPE_MAX_CONCURRENT", 2),
+            scrape_user_cooldown=_get_int("SCRAPE_USER_COOLDOWN", 60),
+            scrape_backoff_base=_get_int("SCRAPE_BACKOFF_BASE", 30),
+            scrape_backoff_max=_get_int("SCRAPE_BACKOFF_MAX", 15 * 60),
+            http_pool_size=_get_int("HTTP_POOL_SIZE", 20),
+            replay_timeout=_get_int("REPLAY_TIMEOUT", 30),
+            refresh_interval=_get_int("REFRESH_INTERVAL", 6 * 3600),
+            refresh_concurrency=_get_int("REFRESH_CONCURRENCY", 2),
+            refresh_jitter=_get_int("REFRESH_JITTER", 300),
+            refresh_fresh_for=_get_int("REFRESH_FRESH_FOR", 15 * 60),
+            state_flush_interval_ms=_get_int("STATE_FLUSH_INTERVAL_MS", 1000),
+            state_batch_size=_get_int("STATE_BATCH_SIZE", 200),
+            reminder_lead_minutes=_get_int("REMINDER_LEAD_MINUTES", 15),
+            reminder_horizon_hours=_get_int("REMINDER_HORIZON_HOURS", 36),
+            schedule_timezone=_get_str("SCHEDULE_TIMEZONE", "Europe/Warsaw"),
+            telegram_send_rate=_get_int("TELEGRAM_SEND_RATE", 30),
+            telegram_chat_burst=_get_int("TELEGRAM_CHAT_BURST", 3),
+            discord_send_rate=_get_int("DISCORD_SEND_RATE", 50),
+            discord_channel_burst=_get_int("DISCORD_CHANNEL_BURST", 5),
+            shared_state_backend=(_get_str("SHARED_STATE", "memory") or "memory").lower(),
+            shared_state_path=Path(_get_str("SHARED_STATE_PATH") or DATA_DIR / "shared.db"),
+            shared_poll_interval_ms=_get_int("SHARED_POLL_INTERVAL_MS", 500),
+            shared_lease_seconds=_get_int("SHARED_LEASE_SECONDS", 15),
+            pending_input_ttl=_get_int("PENDING_INPUT_TTL", 3600),
+            discord_autoshard=_get_bool("DISCORD_AUTOSHARD", default=False),
+            discord_shard_count=_get_int("DISCORD_SHARD_COUNT", 0),
+            discord_shard_ids=_get_str("DISCORD_SHARD_IDS"),
             project_root=PROJECT_ROOT,
             src_dir=SRC_DIR,
             core_dir=CORE_DIR,
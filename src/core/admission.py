@@ -0,0 +1,254 @@
+from __future__ import annotations
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional, Set, Tuple
+
+from ..config import settings
+
+
+log = logging.getLogger("core.admission")
+
+# Классы приоритета: меньше — раньше
+INTERACTIVE = 0
+BACKGROUND = 1
+
+# Тексты ошибок download_schedule, означающие, что сайт нас блокирует
+BLOCKING_MARKERS = ("блокировка", "блокирует")
+
+# Колбэк позиции в очереди: (позиция с 1, ожидаемое ожидание в секундах)
+QueueCallback = Callable[[int, float], Awaitable[None]]
+
+
+class CooldownError(Exception):
+    def __init__(self, retry_after: float, cooldown: float):
+        self.retry_after = retry_after
+        super().__init__(
+            f"⏳ Обновлять расписание можно не чаще раза в {cooldown:.0f} с. "
+            f"Попробуйте через {retry_after:.0f} с."
+        )
+
+
+def is_blocking_error(error: BaseException) -> bool:
+    text = str(error)
+    return any(marker in text for marker in BLOCKING_MARKERS)
+
+
+class _Ticket:
+    def __init__(self, key: Hashable, priority: int, seq: int):
+        self.key = key
+        self.priority = priority
+        self.seq = seq
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.listeners: List[QueueCallback] = []
+        self.last_position: Optional[int] = None
+
+
+class AdmissionController:
+    """
+    Очередь перед скрейпером:
+      - не больше max_concurrent скачиваний одновременно;
+      - пользователь не может запускать обновление чаще раза в user_cooldown секунд;
+      - интерактивные запросы обслуживаются раньше фоновых;
+      - после ответа-блокировки сайта новые запуски откладываются
+        с экспоненциально растущей паузой.
+    """
+
+    def __init__(self, max_concurrent: int, user_cooldown: float, backoff_base: float, backoff_max: float):
+        self.max_concurrent = max(max_concurrent, 1)
+        self.user_cooldown = max(user_cooldown, 0)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self._heap: List[Tuple[int, int, _Ticket]] = []
+        self._waiting: Dict[Hashable, _Ticket] = {}
+        self._seq = itertools.count()
+        self._running = 0
+
+        self._last_request: Dict[int, float] = {}
+        self._backoff = 0.0
+        self._blocked_until = 0.0
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        # Скользящее среднее длительности скачивания — для оценки ETA
+        self._avg_duration = 30.0
+
+        self._notify_tasks: Set[asyncio.Task] = set()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiting)
+
+    @property
+    def running(self) -> int:
+        return self._running
+
+    # ------------------------------------------------------------------
+    # Ограничение частоты для пользователя
+
+    def check_cooldown(self, user_id: int) -> None:
+        last = self._last_request.get(user_id)
+        if last is None or self.user_cooldown == 0:
+            return
+        remaining = self.user_cooldown - (time.monotonic() - last)
+        if remaining > 0:
+            raise CooldownError(remaining, self.user_cooldown)
+
+    def touch(self, user_id: int) -> None:
+        self._last_request[user_id] = time.monotonic()
+
+    # ------------------------------------------------------------------
+    # Очередь
+
+    def promote(self, key: Hashable, priority: int) -> None:
+        """
+        Повышает приоритет ждущей задачи (например, к фоновому обновлению
+        присоединился пользователь, нажавший кнопку).
+        """
+        ticket = self._waiting.get(key)
+        if ticket is None or ticket.priority <= priority:
+            return
+        ticket.priority = priority
+        heapq.heappush(self._heap, (priority, ticket.seq, ticket))
+        self._notify_positions()
+
+    def renotify(self, key: Hashable) -> None:
+        """
+        Повторно сообщает позицию ждущей задачи (к ней присоединился новый слушатель).
+        """
+        ticket = self._waiting.get(key)
+        if ticket is not None:
+            ticket.last_position = None
+            self._notify_positions()
+
+    @asynccontextmanager
+    async def slot(
+        self,
+        key: Hashable,
+        priority: int = INTERACTIVE,
+        on_queue: Optional[QueueCallback] = None,
+    ) -> AsyncIterator[None]:
+        ticket = _Ticket(key, priority, next(self._seq))
+        if on_queue is not None:
+            ticket.listeners.append(on_queue)
+
+        self._waiting[key] = ticket
+        heapq.heappush(self._heap, (priority, ticket.seq, ticket))
+        self._pump()
+        self._notify_positions()
+
+        try:
+            await ticket.future
+        except asyncio.CancelledError:
+            if ticket.future.done() and not ticket.future.cancelled():
+                # Слот уже выдан, но скачивание не начиналось: исход неизвестен,
+                # пауза из-за блокировки сайта и средняя длительность не меняются
+                self._free_slot()
+            else:
+                self._drop(ticket)
+            raise
+
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            yield
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(time.monotonic() - started, error)
+
+    def _drop(self, ticket: _Ticket) -> None:
+        if self._waiting.get(ticket.key) is ticket:
+            del self._waiting[ticket.key]
+        ticket.future.cancel()
+        self._notify_positions()
+
+    def _ordered_waiting(self) -> List[_Ticket]:
+        return sorted(self._waiting.values(), key=lambda t: (t.priority, t.seq))
+
+    def _pump(self) -> None:
+        now = time.monotonic()
+        if now < self._blocked_until:
+            self._schedule_wakeup(self._blocked_until - now)
+            return
+
+        while self._running < self.max_concurrent and self._heap:
+            priority, _, ticket = heapq.heappop(self._heap)
+            # Устаревшие записи кучи (после promote или отмены) пропускаем
+            if ticket.future.done() or ticket.priority != priority:
+                continue
+            if self._waiting.get(ticket.key) is ticket:
+                del self._waiting[ticket.key]
+            self._running += 1
+            ticket.future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is not None:
+            return
+
+        def wakeup():
+            self._wakeup = None
+            self._pump()
+            self._notify_positions()
+
+        self._wakeup = asyncio.get_running_loop().call_later(delay, wakeup)
+
+    def _release(self, duration: float, error: Optional[BaseException]) -> None:
+        if error is not None and is_blocking_error(error):
+            self._backoff = min(self._backoff * 2 or self.backoff_base, self.backoff_max)
+            self._blocked_until = time.monotonic() + self._backoff
+            log.warning(f"Сайт блокирует запросы — пауза {self._backoff:.0f}s")
+        elif error is None:
+            self._backoff = 0.0
+            if duration > 0:
+                self._avg_duration = 0.8 * self._avg_duration + 0.2 * duration
+
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        self._running -= 1
+        self._pump()
+        self._notify_positions()
+
+    # ------------------------------------------------------------------
+    # Позиция в очереди и ETA
+
+    def eta(self, position: int) -> float:
+        """
+        Оценка ожидания для позиции (с 1): пауза из-за блокировки плюс
+        столько «волн» скачиваний, сколько задач впереди.
+        """
+        blocked = max(self._blocked_until - time.monotonic(), 0)
+        waves = (self._running + position - 1) // self.max_concurrent
+        return blocked + waves * self._avg_duration
+
+    def _notify_positions(self) -> None:
+        for position, ticket in enumerate(self._ordered_waiting(), start=1):
+            if position == ticket.last_position:
+                continue
+            ticket.last_position = position
+            eta = self.eta(position)
+            for listener in ticket.listeners:
+                task = asyncio.create_task(self._notify(listener, position, eta))
+                self._notify_tasks.add(task)
+                task.add_done_callback(self._notify_tasks.discard)
+
+    @staticmethod
+    async def _notify(listener: QueueCallback, position: int, eta: float) -> None:
+        try:
+            await listener(position, eta)
+        except Exception:
+            log.debug("Ошибка в колбэке очереди", exc_info=True)
+
+
+scrape_admission = AdmissionController(
+    max_concurrent=settings.scrape_max_concurrent,
+    user_cooldown=settings.scrape_user_cooldown,
+    backoff_base=settings.scrape_backoff_base,
+    backoff_max=settings.scrape_backoff_max,
+)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from ..config import settings
+
+
+log = logging.getLogger("core.browser_pool")
+
+CHROMIUM_ARGS = [
+    "--disable-dev-shm-usage",
+    "--no-sandbox",
+    "--disable-setuid-sandbox",
+    "--disable-gpu",
+    "--disable-web-security",
+    "--disable-features=IsolateOrigins,site-per-process",
+    "--disable-blink-features=AutomationControlled",
+]
+
+# Сколько close() ждёт возврата выданных контекстов, прежде чем закрыть браузеры
+DRAIN_TIMEOUT = 60
+
+
+class _Slot:
+    def __init__(self, number: int):
+        self.number = number
+        self.browser: Optional[Browser] = None
+        self.uses = 0
+
+    async def close(self) -> None:
+        browser, self.browser = self.browser, None
+        self.uses = 0
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                log.debug(f"Браузер #{self.number} уже закрыт", exc_info=True)
+
+
+class BrowserPool:
+    """
+    Пул прогретых Chromium, общий для процесса бота.
+
+    Каждый слот — отдельный браузер, которому за раз выдаётся один
+    изолированный контекст, так что одновременно идёт не больше size
+    скачиваний. Браузер перезапускается после max_uses контекстов или
+    если он упал.
+    """
+
+    def __init__(self, size: int, max_uses: int):
+        self.size = max(size, 1)
+        self.max_uses = max(max_uses, 1)
+
+        self._playwright: Optional[Playwright] = None
+        self._slots: List[_Slot] = []
+        self._idle: Optional[asyncio.Queue] = None
+        self._lock = asyncio.Lock()
+        self._closed = False
+        self._released: Optional[asyncio.Event] = None
+
+    @property
+    def busy(self) -> int:
+        if self._idle is None:
+            return 0
+        return self.size - self._idle.qsize()
+
+    async def start(self, warm: bool = True) -> None:
+        async with self._lock:
+            if self._idle is not None:
+                return
+
+            self._closed = False
+            self._playwright = await async_playwright().start()
+            self._slots = [_Slot(i) for i in range(self.size)]
+            self._idle = asyncio.Queue()
+            self._released = asyncio.Event()
+            for slot in self._slots:
+                self._idle.put_nowait(slot)
+
+        if warm:
+            for slot in self._slots:
+                try:
+                    await self._launch(slot)
+                except Exception:
+                    log.exception(f"Не удалось прогреть браузер #{slot.number}")
+
+        log.info(f"Пул браузеров запущен: {self.size} шт.")
+
+    async def close(self) -> None:
+        async with self._lock:
+            if self._idle is None:
+                return
+
+            # Новые контексты больше не выдаются; выданные дорабатывают
+            self._closed = True
+            try:
+                await asyncio.wait_for(self._drain(), DRAIN_TIMEOUT)
+            except asyncio.TimeoutError:
+                log.warning(f"Браузеры закрываются, не дождавшись контекстов: {self.busy}")
+
+            for slot in self._slots:
+                await slot.close()
+
+            if self._playwright is not None:
+                await self._playwright.stop()
+
+            self._playwright = None
+            self._slots = []
+            self._idle = None
+            self._released = None
+
+        log.info("Пул браузеров остановлен")
+
+    async def _drain(self) -> None:
+        while self._idle.qsize() < len(self._slots):
+            self._released.clear()
+            await self._released.wait()
+
+    async def _launch(self, slot: _Slot) -> Browser:
+        if slot.browser is not None and slot.browser.is_connected():
+            return slot.browser
+
+        await slot.close()
+        slot.browser = await self._playwright.chromium.launch(
+            headless=True,
+            args=CHROMIUM_ARGS,
+        )
+        log.info(f"Запущен браузер #{slot.number}")
+        return slot.browser
+
+    @asynccontextmanager
+    async def context(self, **options) -> AsyncIterator[BrowserContext]:
+        """
+        Выдаёт изолированный контекст браузера. Ждёт, если все браузеры заняты.
+        Контекст закрывается всегда, даже если внутри было исключение.
+        """
+        if self._idle is None:
+            await self.start(warm=False)
+
+        if self._closed:
+            raise RuntimeError("Пул браузеров останавливается")
+
+        slot: _Slot = await self._idle.get()
+        if self._closed:
+            self._release(slot)
+            raise RuntimeError("Пул браузеров останавливается")
+
+        try:
+            browser = await self._launch(slot)
+            context = await browser.new_context(**options)
+            try:
+                yield context
+            finally:
+                try:
+                    await context.close()
+                except Exception:
+                    log.debug("Контекст уже закрыт", exc_info=True)
+        except BaseException:
+            if slot.browser is not None and not slot.browser.is_connected():
+                log.warning(f"Браузер #{slot.number} упал, будет перезапущен")
+                await slot.close()
+            raise
+        finally:
+            # Неудачные скачивания тоже изнашивают браузер
+            try:
+                if slot.browser is not None:
+                    slot.uses += 1
+                    if slot.uses >= self.max_uses:
+                        log.info(f"Браузер #{slot.number} отработал {slot.uses} раз, перезапуск")
+                        await slot.close()
+            finally:
+                self._release(slot)
+
+    def _release(self, slot: _Slot) -> None:
+        if self._idle is not None:
+            self._idle.put_nowait(slot)
+            self._released.set()
+
+
+browser_pool = BrowserPool(
+    size=settings.browser_pool_size,
+    max_uses=settings.browser_max_uses,
+)
@@ -0,0 +1,215 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import itertools
+import threading
+import multiprocessing as mp
+from multiprocessing import util as mp_util
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+from ..config import settings
+
+
+log = logging.getLogger("core.download_workers")
+
+# Асинхронный колбэк прогресса для обработчиков: (ключ фазы, **подробности)
+AsyncProgress = Callable[..., Awaitable[None]]
+
+
+class DownloadError(Exception):
+    """
+    Ошибка скачивания в рабочем процессе. Исключения Playwright не всегда
+    переживают pickle, поэтому наружу передаётся только текст.
+    """
+
+
+# ----------------------------------------------------------------------
+# Код рабочего процесса
+
+_worker_loop: Optional[asyncio.AbstractEventLoop] = None
+_worker_progress = None
+
+
+def _init_worker(progress_queue, debug: bool) -> None:
+    global _worker_loop, _worker_progress
+
+    logging.basicConfig(
+        level=logging.DEBUG if debug else logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+    )
+
+    # Один цикл на весь процесс: пул браузеров остаётся прогретым между задачами
+    _worker_loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(_worker_loop)
+    _worker_progress = progress_queue
+
+    # Процесс выполняет одну задачу за раз — второй браузер ему не нужен
+    from .browser_pool import browser_pool
+    browser_pool.size = 1
+
+    mp_util.Finalize(None, _close_worker, exitpriority=10)
+
+
+def _close_worker() -> None:
+    from .browser_pool import browser_pool
+    from .export_replay import close_http_session
+
+    if _worker_loop is None or _worker_loop.is_closed():
+        return
+    try:
+        _worker_loop.run_until_complete(browser_pool.close())
+        _worker_loop.run_until_complete(close_http_session())
+    finally:
+        _worker_loop.close()
+
+
+def _run_job(job_id: int, url: str, save_path: str) -> str:
+    from .parser import download_schedule
+
+    def report(phase: str) -> None:
+        _worker_progress.put((job_id, phase))
+
+    try:
+        return _worker_loop.run_until_complete(download_schedule(url, save_path, on_progress=report))
+    except Exception as e:
+        raise DownloadError(str(e)) from None
+
+
+# ----------------------------------------------------------------------
+# Сторона бота
+
+
+class DownloadWorkers:
+    """
+    Скачивание расписаний в отдельных процессах: Chromium, page.content()
+    и падения браузера не делят цикл событий с обработчиками Telegram/Discord.
+
+    Задачи уходят в очередь ProcessPoolExecutor, прогресс возвращается
+    через multiprocessing.Queue и вызывает колбэки обработчиков.
+    При workers=0 скачивание идёт в процессе бота, как раньше.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(workers, 0)
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # Пересоздание упавшего пула: несколько задач могут узнать о падении разом
+        self._executor_lock = threading.Lock()
+        self._progress_queue = None
+        self._progress_task: Optional[asyncio.Task] = None
+        self._listeners: Dict[int, AsyncProgress] = {}
+        self._notify_tasks: Set[asyncio.Task] = set()
+        self._job_ids = itertools.count(1)
+
+    @property
+    def in_process(self) -> bool:
+        return self.workers == 0
+
+    async def start(self) -> None:
+        if self.in_process:
+            from .browser_pool import browser_pool
+            await browser_pool.start()
+            return
+
+        if self._executor is not None:
+            return
+
+        ctx = mp.get_context("spawn")
+        self._progress_queue = ctx.Queue()
+        self._executor = self._new_executor()
+        self._progress_task = asyncio.create_task(self._drain_progress(), name="download-progress")
+        log.info(f"Запущено процессов скачивания: {self.workers}")
+
+    async def stop(self) -> None:
+        if self.in_process:
+            from .browser_pool import browser_pool
+            await browser_pool.close()
+            return
+
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            await asyncio.get_running_loop().run_in_executor(None, executor.shutdown)
+
+        if self._progress_task is not None:
+            self._progress_queue.put(None)
+            await self._progress_task
+            self._progress_task = None
+
+    def _new_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=mp.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self._progress_queue, settings.debug),
+        )
+
+    async def _drain_progress(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            item = await loop.run_in_executor(None, self._progress_queue.get)
+            if item is None:
+                return
+
+            job_id, phase = item
+            listener = self._listeners.get(job_id)
+            if listener is None:
+                continue
+
+            # Медленное редактирование сообщения не должно задерживать прогресс других задач
+            task = asyncio.create_task(self._notify(listener, phase))
+            self._notify_tasks.add(task)
+            task.add_done_callback(self._notify_tasks.discard)
+
+    @staticmethod
+    async def _notify(listener: AsyncProgress, phase: str) -> None:
+        try:
+            await listener(phase)
+        except Exception:
+            log.debug("Ошибка в колбэке прогресса", exc_info=True)
+
+    async def download(
+        self,
+        url: str,
+        save_path: str,
+        on_progress: Optional[AsyncProgress] = None,
+    ) -> str:
+        if self.in_process:
+            from .parser import download_schedule
+
+            loop = asyncio.get_running_loop()
+            report = None
+            if on_progress is not None:
+                report = lambda phase: loop.create_task(on_progress(phase))
+            return await download_schedule(url, save_path, on_progress=report)
+
+        if self._executor is None:
+            await self.start()
+
+        job_id = next(self._job_ids)
+        if on_progress is not None:
+            self._listeners[job_id] = on_progress
+
+        loop = asyncio.get_running_loop()
+        executor = self._executor
+        try:
+            return await loop.run_in_executor(executor, _run_job, job_id, url, save_path)
+        except BrokenProcessPool:
+            # Рабочий процесс умер (например, Chromium съел всю память) — пересоздаём пул.
+            # Только если его ещё не пересоздала другая задача с того же пула и не остановил stop()
+            with self._executor_lock:
+                restart = self._executor is executor
+                if restart:
+                    self._executor = self._new_executor()
+            if restart:
+                log.error("Процесс скачивания упал, пул перезапускается")
+                executor.shutdown(wait=False)
+            raise DownloadError("❌ Процесс скачивания упал, попробуйте ещё раз")
+        finally:
+            self._listeners.pop(job_id, None)
+
+
+download_workers = DownloadWorkers(workers=settings.download_workers)
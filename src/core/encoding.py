@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import os
+import json
+import codecs
+import logging
+import tempfile
+from typing import Optional
+
+from .schedule_cache import file_version
+
+
+# Сколько байт смотреть для выбора между cp1250 и cp1251
+SNIFF_PREFIX = 64 * 1024
+
+_BOMS = (
+    (codecs.BOM_UTF8, "utf-8-sig"),
+    (codecs.BOM_UTF16_LE, "utf-16"),
+    (codecs.BOM_UTF16_BE, "utf-16"),
+)
+
+
+def sniff_encoding(raw: bytes) -> str:
+    """
+    BOM -> строгий UTF-8 -> эвристика cp1250/cp1251 по префиксу.
+
+    В cp1251 кириллица целиком лежит в 0xC0–0xFF, поэтому в русском тексте
+    таких байт больше, чем латиницы. В польском тексте (cp1250) это только
+    редкие диакритики (ó, ę, ń ...), а основная масса букв — ASCII.
+    """
+    for bom, encoding in _BOMS:
+        if raw.startswith(bom):
+            return encoding
+
+    try:
+        raw.decode("utf-8")
+        return "utf-8"
+    except UnicodeDecodeError:
+        pass
+
+    prefix = raw[:SNIFF_PREFIX]
+    ascii_letters = sum(1 for b in prefix if 0x41 <= b <= 0x5A or 0x61 <= b <= 0x7A)
+    upper_half = sum(1 for b in prefix if b >= 0xC0)
+
+    if upper_half > ascii_letters:
+        return "cp1251"
+    return "cp1250"
+
+
+def _meta_path(path: str) -> str:
+    return f"{path}.meta.json"
+
+
+def read_meta(path: str) -> dict:
+    """
+    Метаданные файла расписания, записанные при загрузке. Если файл с тех пор
+    изменился, метаданные считаются устаревшими.
+    """
+    try:
+        with open(_meta_path(path), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+    version = file_version(path)
+    if version is None or meta.get("version") != list(version):
+        return {}
+    return meta
+
+
+def write_meta(path: str, **values) -> dict:
+    meta = read_meta(path)
+    meta.update(values)
+
+    version = file_version(path)
+    meta["version"] = list(version) if version else None
+
+    # Уникальный временный файл: метаданные одного CSV могут писать несколько потоков
+    meta_path = _meta_path(path)
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{os.path.basename(meta_path)}.", suffix=".tmp", dir=os.path.dirname(meta_path) or None
+    )
+    try:
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False)
+        os.replace(tmp_path, meta_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return meta
+
+
+def detect_file_encoding(path: str, raw: Optional[bytes] = None) -> str:
+    """
+    Кодировка определяется один раз и записывается рядом с файлом.
+    """
+    encoding = read_meta(path).get("encoding")
+    if encoding:
+        return encoding
+
+    if raw is None:
+        with open(path, "rb") as f:
+            raw = f.read()
+
+    encoding = sniff_encoding(raw)
+    logging.info(f"Определена кодировка файла {path}: {encoding}")
+
+    try:
+        write_meta(path, encoding=encoding)
+    except OSError as e:
+        logging.warning(f"Не удалось сохранить метаданные {path}: {e}")
+
+    return encoding
@@ -0,0 +1,181 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import uuid
+import asyncio
+import hashlib
+import logging
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import aiohttp
+
+from ..config import settings, safe_json_read
+from .schedule_csv import looks_like_schedule_csv
+
+
+log = logging.getLogger("core.export_replay")
+
+# Один файл на ссылку расписания: воркеры записывают свои рецепты,
+# не перезаписывая чужие, а читают всегда с диска.
+# В рецептах открытым текстом лежат cookies сессии сайта, поэтому каталог
+# и файлы доступны только владельцу процесса (0o700 / 0o600)
+RECIPES_DIR = settings.data_dir / "export_requests"
+
+# Заголовки, которые браузер выставляет сам и которые нельзя/не нужно повторять
+_SKIP_HEADERS = {"host", "content-length", "cookie", "connection", "accept-encoding"}
+
+# Сколько байт ответа читать в поисках заголовка дня, прежде чем решить
+HEAD_LIMIT = 256 * 1024
+CHUNK_SIZE = 64 * 1024
+
+_session: Optional[aiohttp.ClientSession] = None
+
+
+def _recipe_file(schedule_url: str) -> Path:
+    name = hashlib.sha1(schedule_url.encode("utf-8")).hexdigest()
+    return RECIPES_DIR / f"{name}.json"
+
+
+def _load_recipe(schedule_url: str) -> Optional[Dict[str, Any]]:
+    recipe = safe_json_read(_recipe_file(schedule_url))
+    # Защита от коллизии имён: в файле хранится сама ссылка
+    if recipe.get("schedule_url") != schedule_url:
+        return None
+    return recipe
+
+
+def _save_recipe(schedule_url: str, recipe: Dict[str, Any]) -> None:
+    RECIPES_DIR.mkdir(mode=0o700, parents=True, exist_ok=True)
+    path = _recipe_file(schedule_url)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    try:
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with open(fd, "w", encoding="utf-8") as f:
+            json.dump(recipe, f, indent=4, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+async def record_export_request(
+    schedule_url: str,
+    request_url: str,
+    method: str,
+    headers: Dict[str, str],
+    post_data: Optional[str],
+    cookies: List[Dict[str, Any]],
+) -> None:
+    """
+    Запоминает запрос WydrukTokuCsv, который браузер отправил для этой ссылки:
+    адрес с параметрами фильтра, тело формы (если есть) и cookies.
+    Cookies хранятся без шифрования в файле с правами 0o600.
+    """
+    recipe = {
+        "schedule_url": schedule_url,
+        "url": request_url,
+        "method": method,
+        "headers": {k: v for k, v in headers.items() if k.lower() not in _SKIP_HEADERS},
+        "data": post_data,
+        "cookies": {c["name"]: c["value"] for c in cookies},
+        "recorded_at": int(time.time()),
+    }
+    await asyncio.to_thread(_save_recipe, schedule_url, recipe)
+
+    log.info(f"Запрос выгрузки CSV сохранён для {schedule_url}")
+
+
+def has_export_request(schedule_url: str) -> bool:
+    return _load_recipe(schedule_url) is not None
+
+
+async def get_http_session() -> aiohttp.ClientSession:
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=settings.http_pool_size),
+            timeout=aiohttp.ClientTimeout(total=settings.replay_timeout),
+        )
+    return _session
+
+
+async def close_http_session() -> None:
+    global _session
+    if _session is not None and not _session.closed:
+        await _session.close()
+    _session = None
+
+
+def _looks_like_csv(content_type: str, head: bytes) -> bool:
+    if "html" in content_type.lower():
+        return False
+    return looks_like_schedule_csv(head)
+
+
+async def _read_head(content: aiohttp.StreamReader) -> bytes:
+    """
+    Читает начало ответа до первого заголовка дня или до конца:
+    один read() может вернуть короткий кусок, а пустая выгрузка
+    (только шапка) заголовков дней не содержит вовсе.
+    """
+    head = bytearray()
+    while b"Data Zajec" not in head and len(head) < HEAD_LIMIT:
+        chunk = await content.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        head += chunk
+    return bytes(head)
+
+
+async def replay_export(schedule_url: str, save_path: str) -> bool:
+    """
+    Быстрый путь без браузера: повторяет сохранённый запрос выгрузки через
+    общий HTTP-клиент. Возвращает False, если запроса нет, сайт ответил
+    ошибкой или вернул не CSV — тогда нужен полный сценарий в Chromium.
+    """
+    recipe = await asyncio.to_thread(_load_recipe, schedule_url)
+    if recipe is None:
+        return False
+
+    started = time.perf_counter()
+    tmp_path = f"{save_path}.part"
+
+    try:
+        session = await get_http_session()
+        async with session.request(
+            recipe.get("method", "GET"),
+            recipe["url"],
+            headers=recipe.get("headers") or None,
+            cookies=recipe.get("cookies") or None,
+            data=recipe.get("data"),
+        ) as resp:
+            if resp.status != 200:
+                log.info(f"Повтор выгрузки не удался: HTTP {resp.status}")
+                return False
+
+            head = await _read_head(resp.content)
+            if not _looks_like_csv(resp.headers.get("Content-Type", ""), head):
+                log.info("Повтор выгрузки вернул не CSV (вероятно, истекла сессия)")
+                return False
+
+            f = await asyncio.to_thread(open, tmp_path, "wb")
+            try:
+                await asyncio.to_thread(f.write, head)
+                async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+                    await asyncio.to_thread(f.write, chunk)
+            finally:
+                await asyncio.to_thread(f.close)
+
+        await asyncio.to_thread(os.replace, tmp_path, save_path)
+    except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+        log.info(f"Повтор выгрузки не удался: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    log.info(f"CSV получен без браузера за {time.perf_counter() - started:.2f}s")
+    return True
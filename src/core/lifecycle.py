@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import time
+import signal
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional
+
+
+log = logging.getLogger("core.lifecycle")
+
+
+def stop_on_signals() -> asyncio.Event:
+    """
+    Событие, которое выставляется по SIGINT/SIGTERM (Railway шлёт SIGTERM при деплое).
+    """
+    stop_event = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop_event.set)
+        except (NotImplementedError, RuntimeError):
+            # Windows: остаётся KeyboardInterrupt
+            pass
+    return stop_event
+
+
+@dataclass
+class AdapterHealth:
+    """
+    Состояние одного адаптера (Telegram, Discord) для раннера и /health.
+    """
+
+    name: str
+    state: str = "stopped"  # starting / running / stopped / failed
+    error: Optional[str] = None
+    started_at: Optional[float] = None
+    probe: Optional[Callable[[], Dict[str, Any]]] = field(default=None, repr=False)
+
+    def set(self, state: str, error: Optional[str] = None) -> None:
+        self.state = state
+        self.error = error
+        if state == "running":
+            self.started_at = time.time()
+        log.info(f"Адаптер {self.name}: {state}" + (f" ({error})" if error else ""))
+
+    @property
+    def healthy(self) -> bool:
+        return self.state == "running"
+
+    def snapshot(self) -> Dict[str, Any]:
+        data: Dict[str, Any] = {"state": self.state}
+        if self.error:
+            data["error"] = self.error
+        if self.started_at is not None:
+            data["uptime"] = round(time.time() - self.started_at)
+        if self.probe is not None and self.healthy:
+            try:
+                data.update(self.probe())
+            except Exception as e:
+                data["probe_error"] = str(e)
+        return data
+
+
+class CoreServices:
+    """
+    Общее ядро для адаптеров: общее состояние воркеров, хранилище
+    пользователей, процессы скачивания, фоновое обновление, очереди
+    отправки и пул разбора расписаний.
+
+    Запуск и остановка считаются по ссылкам: каждый адаптер вызывает
+    start()/stop() сам, поэтому он работает и отдельно, и в общем раннере,
+    где ядро поднимается один раз на всех.
+    """
+
+    def __init__(self):
+        self._users = 0
+
+    @property
+    def running(self) -> bool:
+        return self._users > 0
+
+    async def start(self) -> None:
+        self._users += 1
+        if self._users > 1:
+            return
+
+        from .shared_state import shared_state
+        from .state_store import state_store
+        from .download_workers import download_workers
+        from .services.background_refresh import background_refresher
+
+        await shared_state.start()
+        await state_store.start()
+        await download_workers.start()
+        await background_refresher.start()
+        log.info("Ядро запущено")
+
+    async def stop(self) -> None:
+        if self._users == 0:
+            return
+        self._users -= 1
+        if self._users > 0:
+            return
+
+        from .state_store import state_store
+        from .download_workers import download_workers
+        from .export_replay import close_http_session
+        from .outbound import stop_outbound
+        from .schedule_executor import schedule_executor
+        from .shared_state import shared_state
+        from .services.background_refresh import background_refresher
+
+        await background_refresher.stop()
+        await download_workers.stop()
+        await close_http_session()
+        await stop_outbound()
+        await schedule_executor.stop()
+        await state_store.stop()
+        await shared_state.stop()
+        log.info("Ядро остановлено")
+
+    def stats(self) -> Dict[str, Any]:
+        from .admission import scrape_admission
+        from .outbound import telegram_outbound, discord_outbound
+        from .schedule_cache import schedule_cache, rendered_cache
+        from .schedule_executor import schedule_executor
+        from .shared_state import shared_state
+        from ..config import settings
+
+        return {
+            "schedule_cache": schedule_cache.stats(),
+            "rendered_cache": rendered_cache.stats(),
+            "schedule_executor": schedule_executor.stats(),
+            "shared_state": {"backend": settings.shared_state_backend, "received": shared_state.received},
+            "scrape_queue": {"queued": scrape_admission.queued, "running": scrape_admission.running},
+            "outbound": {
+                "telegram": telegram_outbound.stats(),
+                "discord": discord_outbound.stats(),
+            },
+        }
+
+
+core = CoreServices()
@@ -0,0 +1,361 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, Optional, Set, Tuple
+
+from ..config import settings
+
+
+log = logging.getLogger("core.outbound")
+
+# Полосы очереди: меньше — раньше
+INTERACTIVE = 0
+BROADCAST = 1
+LANES = (INTERACTIVE, BROADCAST)
+
+
+class TokenBucket:
+    """
+    Классический token bucket: rate токенов в секунду, не больше burst в запасе.
+    pause() запрещает выдачу до указанного момента (ответ retry_after).
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = max(rate, 0.001)
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, now: float) -> float:
+        """
+        Через сколько секунд будет доступен токен (0 — уже доступен).
+        """
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+    def pause(self, until: float) -> None:
+        self.paused_until = max(self.paused_until, until)
+
+    def idle(self, now: float) -> bool:
+        self._refill(now)
+        return self.tokens >= self.burst and now >= self.paused_until
+
+
+class _Job:
+    def __init__(self, chat_id: Hashable, call: Callable[[], Awaitable[Any]], lane: int):
+        self.chat_id = chat_id
+        self.call = call
+        self.lane = lane
+        self.attempts = 0
+        self.future: asyncio.Future = asyncio.get_running_loop().create_future()
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    # aiogram TelegramRetryAfter и discord.RateLimited несут retry_after в секундах
+    value = getattr(error, "retry_after", None)
+    if isinstance(value, (int, float)) and value >= 0:
+        return float(value)
+    return None
+
+
+class OutboundDispatcher:
+    """
+    Общая очередь исходящих сообщений одной платформы.
+
+    Отправка идёт через глобальный token bucket платформы и отдельный
+    bucket для каждого чата. Ответы пользователям (INTERACTIVE) всегда
+    выбираются раньше рассылок (BROADCAST); внутри полосы порядок
+    сообщений одного чата сохраняется. Вызовы одного чата выполняются
+    по одному: следующий уходит только после завершения предыдущего,
+    поэтому и на стороне платформы они применяются в порядке очереди
+    (поздняя правка прогресса не перекроет итоговую). Если платформа ответила
+    retry_after, чат ставится на паузу, а сообщение возвращается
+    в начало своей полосы.
+    """
+
+    # Раз в столько отправок удаляются bucket'ы простаивающих чатов
+    PRUNE_EVERY = 1000
+
+    def __init__(
+        self,
+        name: str,
+        rate: float,
+        burst: int,
+        chat_rate: float,
+        chat_burst: int,
+        max_retries: int = 3,
+    ):
+        self.name = name
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.max_retries = max_retries
+
+        self._bucket = TokenBucket(rate, burst)
+        self._chats: Dict[Hashable, TokenBucket] = {}
+        self._lanes: Dict[int, Deque[_Job]] = {lane: deque() for lane in LANES}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running: Set[asyncio.Task] = set()
+        # Чаты, у которых вызов сейчас выполняется
+        self._busy: Set[Hashable] = set()
+
+        self.sent = 0
+        self.retried = 0
+        self.failed = 0
+        self.max_depth = 0
+
+    # ------------------------------------------------------------------
+    # Публичный интерфейс
+
+    async def send(self, chat_id: Hashable, call: Callable[[], Awaitable[Any]], lane: int = INTERACTIVE) -> Any:
+        """
+        Ставит вызов API в очередь и ждёт его результата.
+        call — функция без аргументов, возвращающая корутину отправки.
+        """
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(), name=f"outbound-{self.name}")
+
+        job = _Job(chat_id, call, lane)
+        self._lanes[lane].append(job)
+        self.max_depth = max(self.max_depth, self.depth)
+        self._wakeup.set()
+
+        try:
+            return await job.future
+        except asyncio.CancelledError:
+            # Отправитель больше не ждёт — убираем сообщение из очереди
+            try:
+                self._lanes[lane].remove(job)
+            except ValueError:
+                pass
+            raise
+
+    @property
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self._lanes.values())
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "interactive": len(self._lanes[INTERACTIVE]),
+            "broadcast": len(self._lanes[BROADCAST]),
+            "in_flight": len(self._running),
+            "max_depth": self.max_depth,
+            "sent": self.sent,
+            "retried": self.retried,
+            "failed": self.failed,
+            "chats": len(self._chats),
+        }
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+
+        for queue in self._lanes.values():
+            while queue:
+                job = queue.popleft()
+                if not job.future.done():
+                    job.future.cancel()
+
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+        log.info(f"Очередь {self.name} остановлена: {self.stats()}")
+
+    # ------------------------------------------------------------------
+    # Планировщик
+
+    def _chat_bucket(self, chat_id: Hashable) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            bucket = self._chats[chat_id] = TokenBucket(self.chat_rate, self.chat_burst)
+        return bucket
+
+    def _next_job(self) -> Tuple[Optional[_Job], Optional[float]]:
+        """
+        Возвращает (задача, None) или (None, сколько ждать; None — ждать новых задач).
+        """
+        if not self.depth:
+            return None, None
+
+        now = time.monotonic()
+        wait = self._bucket.delay(now)
+        if wait > 0:
+            return None, wait
+
+        blocked: Set[Hashable] = set()
+        for lane in LANES:
+            queue = self._lanes[lane]
+            for index, job in enumerate(queue):
+                if job.chat_id in blocked:
+                    continue
+                if job.chat_id in self._busy:
+                    # Дождёмся завершения текущего вызова чата (он разбудит цикл)
+                    blocked.add(job.chat_id)
+                    continue
+
+                chat_wait = self._chat_bucket(job.chat_id).delay(now)
+                if chat_wait == 0:
+                    del queue[index]
+                    self._bucket.take(now)
+                    self._chats[job.chat_id].take(now)
+                    return job, None
+
+                # Следующие сообщения этого чата ждут, чтобы не нарушить порядок
+                blocked.add(job.chat_id)
+                wait = chat_wait if wait == 0 else min(wait, chat_wait)
+
+        return None, wait or None
+
+    async def _run(self) -> None:
+        dispatched = 0
+        while True:
+            job, wait = self._next_job()
+            if job is None:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            self._busy.add(job.chat_id)
+            task = asyncio.create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+            dispatched += 1
+            if dispatched % self.PRUNE_EVERY == 0:
+                self._prune()
+
+    async def _execute(self, job: _Job) -> None:
+        try:
+            await self._call(job)
+        finally:
+            self._busy.discard(job.chat_id)
+            self._wakeup.set()
+
+    async def _call(self, job: _Job) -> None:
+        try:
+            result = await job.call()
+        except asyncio.CancelledError:
+            if not job.future.done():
+                job.future.cancel()
+            raise
+        except Exception as e:
+            retry_after = _retry_after(e)
+            if retry_after is not None and job.attempts < self.max_retries:
+                job.attempts += 1
+                self.retried += 1
+                log.warning(f"{self.name}: лимит для чата {job.chat_id}, повтор через {retry_after:.1f}s")
+                self._chat_bucket(job.chat_id).pause(time.monotonic() + retry_after)
+                self._lanes[job.lane].appendleft(job)
+                return
+
+            self.failed += 1
+            if not job.future.done():
+                job.future.set_exception(e)
+            return
+
+        self.sent += 1
+        if not job.future.done():
+            job.future.set_result(result)
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        queued = {job.chat_id for queue in self._lanes.values() for job in queue}
+        for chat_id in [c for c, b in self._chats.items() if c not in queued and b.idle(now)]:
+            del self._chats[chat_id]
+
+
+class ProgressMessage:
+    """
+    Сообщение-индикатор долгой операции («⏳ Обновляю... (скачиваю CSV)»).
+
+    Фазы прогресса приходят из фоновых задач и другого процесса, поэтому
+    правки схлопываются: выполняется не больше одной, из накопившихся
+    отправляется только последняя. finish() закрывает сообщение: ожидающие
+    правки отменяются, выполняющаяся дожидается, а поздние фазы
+    игнорируются — итоговый текст всегда остаётся последним.
+    """
+
+    def __init__(self, edit: Callable[..., Awaitable[Any]], text: str, labels: Dict[str, str]):
+        self._edit = edit
+        self.text = text
+        self.labels = labels
+        self._pending: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self._closed = False
+
+    async def report(self, phase: str, **details) -> None:
+        """
+        Колбэк on_progress: не ждёт отправки правки.
+        """
+        if self._closed:
+            return
+        label = self.labels.get(phase, phase).format(**details)
+        self._pending = f"{self.text} ({label})"
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending is not None and not self._closed:
+            text, self._pending = self._pending, None
+            try:
+                await self._edit(text)
+            except Exception:
+                log.debug("Не удалось обновить сообщение прогресса", exc_info=True)
+
+    async def finish(self, text: str, **kwargs) -> Any:
+        self._closed = True
+        self._pending = None
+        task, self._task = self._task, None
+        if task is not None and not task.done():
+            # Ещё не отправленная правка убирается из очереди, уже
+            # отправленная завершится раньше итоговой (вызовы чата идут по одному)
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        return await self._edit(text, **kwargs)
+
+
+# Telegram: ~30 сообщений в секунду на бота и около одного в секунду на чат
+telegram_outbound = OutboundDispatcher(
+    "telegram",
+    rate=settings.telegram_send_rate,
+    burst=settings.telegram_send_rate,
+    chat_rate=1,
+    chat_burst=settings.telegram_chat_burst,
+)
+
+# Discord: глобальный лимит 50 запросов в секунду, 5 сообщений за 5 секунд на канал
+discord_outbound = OutboundDispatcher(
+    "discord",
+    rate=settings.discord_send_rate,
+    burst=settings.discord_send_rate,
+    chat_rate=1,
+    chat_burst=settings.discord_channel_burst,
+)
+
+
+async def stop_outbound() -> None:
+    await asyncio.gather(telegram_outbound.stop(), discord_outbound.stop())
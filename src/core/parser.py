@@ -1,49 +1,232 @@
+import time
 import asyncio
-from playwright.async_api import async_playwright
 import logging
+from typing import Callable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+from playwright.async_api import Page, Response
 from playwright_stealth import stealth_async
 
+from .browser_pool import browser_pool
+from .export_replay import replay_export, record_export_request
+from ..config import settings
+
+
+# Ссылка на CSV видна и не заблокирована
+_LINK_ENABLED_JS = """
+(link) => !!link
+    && link.offsetParent !== null
+    && !link.classList.contains("disabled")
+    && link.getAttribute("aria-disabled") !== "true"
+"""
+
+# Снимок результатов поиска: сравнивается со снимком до клика Szukaj,
+# чтобы не принять за готовность старую таблицу или уже активную ссылку
+_RESULTS_STATE_JS = """
+() => {
+    const table = document.querySelector("table");
+    const link = document.querySelector("a[href*='WydrukTokuCsv']");
+    let tableState = null;
+    if (table) {
+        const text = table.innerText;
+        tableState = `${table.querySelectorAll("tr").length}:${text.length}:${text.slice(0, 300)}`;
+    }
+    return {
+        table: tableState,
+        link: link ? link.href : null,
+        linkEnabled: (__LINK_ENABLED__)(link),
+    };
+}
+""".replace("__LINK_ENABLED__", _LINK_ENABLED_JS)
+
+# Индикатор загрузки ещё виден — результаты не готовы
+_BUSY_JS = """
+() => {
+    const busy = document.querySelector(".spinner-border, .spinner-grow, .loading, [aria-busy='true']");
+    return !!busy && busy.offsetParent !== null;
+}
+"""
+
+_RESULTS_CHANGED_JS = """
+(before) => {
+    if ((__BUSY__)()) return false;
+    const now = (__STATE__)();
+    return now.table !== null && now.table !== before.table;
+}
+""".replace("__BUSY__", _BUSY_JS).replace("__STATE__", _RESULTS_STATE_JS)
+
+# Ссылка стала доступной после клика: до него её не было или она была
+# заблокирована. Адрес ссылки у сайта часто одинаковый для любого поиска,
+# поэтому смена href — лишь дополнительный признак для уже активной ссылки
+_CSV_LINK_ENABLED_JS = """
+(before) => {
+    if ((__BUSY__)()) return false;
+    const link = document.querySelector("a[href*='WydrukTokuCsv']");
+    if (!(__LINK_ENABLED__)(link)) return false;
+    return !before.linkEnabled || link.href !== before.link;
+}
+""".replace("__BUSY__", _BUSY_JS).replace("__LINK_ENABLED__", _LINK_ENABLED_JS)
+
+SEARCH_SIGNAL = "ответ поиска"
+
+# Как часто проверять DOM, мс: снимок таблицы дороже MutationObserver
+DOM_POLL_MS = 250
+
+
+# Колбэк прогресса: получает ключ фазы ("open", "search", "download")
+ProgressCallback = Callable[[str], None]
+
+
+def _report(on_progress: Optional[ProgressCallback], phase: str) -> None:
+    if on_progress is None:
+        return
+    try:
+        on_progress(phase)
+    except Exception:
+        logging.debug("Ошибка в колбэке прогресса", exc_info=True)
+
+
+class PhaseTimer:
+    def __init__(self):
+        self._started = self._last = time.perf_counter()
+        self._phases: List[Tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        now = time.perf_counter()
+        self._phases.append((phase, now - self._last))
+        self._last = now
+
+    def log(self) -> None:
+        total = self._last - self._started
+        parts = ", ".join(f"{name}={elapsed:.1f}s" for name, elapsed in self._phases)
+        logging.info(f"Фазы скачивания: {parts}, всего={total:.1f}s")
+
+
+def _is_search_response(response: Response, page_url: str) -> bool:
+    """
+    Ответ на сам поиск: отправка формы (POST) или запрос к адресу страницы
+    с новыми параметрами. Аналитика, шрифты и прочие XHR не подходят.
+    """
+    request = response.request
+    if request.resource_type not in ("xhr", "fetch", "document") or response.status >= 400:
+        return False
+    if "WydrukTokuCsv" in response.url:
+        return False
+
+    page = urlsplit(page_url)
+    target = urlsplit(response.url)
+    if target.netloc != page.netloc:
+        return False
+    return request.method == "POST" or target.path == page.path
+
+
+def _start_ready_waiters(page: Page, before: dict, timeout: float) -> dict:
+    """
+    Запускается до клика, чтобы не пропустить быстрый ответ сайта.
+    before — снимок _RESULTS_STATE_JS, сделанный до клика.
+    """
+    timeout_ms = timeout * 1000
+    page_url = page.url
+    return {
+        SEARCH_SIGNAL: asyncio.ensure_future(page.wait_for_response(
+            lambda r: _is_search_response(r, page_url),
+            timeout=timeout_ms,
+        )),
+        "таблица": asyncio.ensure_future(page.wait_for_function(
+            _RESULTS_CHANGED_JS, arg=before,
+            polling=DOM_POLL_MS, timeout=timeout_ms,
+        )),
+        "ссылка CSV": asyncio.ensure_future(page.wait_for_function(
+            _CSV_LINK_ENABLED_JS, arg=before,
+            polling=DOM_POLL_MS, timeout=timeout_ms,
+        )),
+    }
 
-async def download_schedule(url: str, save_path: str) -> str:
+
+async def _wait_ready(waiters: dict, timeout: float) -> Optional[str]:
+    """
+    Ждёт первого из сигналов готовности, но не дольше timeout секунд.
+    После ответа поиска ещё коротко ждём, пока его результат попадёт в DOM.
+    """
+    names = {task: name for name, task in waiters.items()}
+    pending = set(names)
+    deadline = time.monotonic() + timeout
+    signal = None
+
+    try:
+        while pending and signal is None:
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=max(deadline - time.monotonic(), 0),
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                break
+            for task in done:
+                if task.exception() is None:
+                    signal = names[task]
+                    break
+
+        if signal == SEARCH_SIGNAL:
+            dom_waiters = [t for t in pending if names[t] != SEARCH_SIGNAL]
+            if dom_waiters:
+                done, _ = await asyncio.wait(dom_waiters, timeout=2, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        signal = f"{SEARCH_SIGNAL} + {names[task]}"
+    finally:
+        for task in names:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*names, return_exceptions=True)
+
+    return signal
+
+
+async def download_schedule(
+    url: str,
+    save_path: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> str:
     logging.info("▶ Старт скачивания расписания")
 
-    chromium_args = [
-        "--disable-dev-shm-usage",
-        "--no-sandbox",
-        "--disable-setuid-sandbox",
-        "--disable-gpu",
-        "--disable-web-security",
-        "--disable-features=IsolateOrigins,site-per-process",
-        "--disable-blink-features=AutomationControlled",
-    ]
-
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=True,
-            args=chromium_args
-        )
+    # Быстрый путь: повтор уже известного запроса выгрузки без Chromium
+    if await replay_export(url, save_path):
+        return save_path
 
-        context = await browser.new_context(
-            user_agent=(
-                "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36 (KHTML, like Gecko) "
-                "Chrome/120.0.0.0 Safari/537.36"
-            ),
-            viewport={"width": 1280, "height": 800},
-            java_script_enabled=True,
-        )
+    return await _download_with_browser(url, save_path, on_progress)
 
+
+async def _download_with_browser(
+    url: str,
+    save_path: str,
+    on_progress: Optional[ProgressCallback] = None,
+) -> str:
+    timings = PhaseTimer()
+
+    async with browser_pool.context(
+        user_agent=(
+            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+            "AppleWebKit/537.36 (KHTML, like Gecko) "
+            "Chrome/120.0.0.0 Safari/537.36"
+        ),
+        viewport={"width": 1280, "height": 800},
+        java_script_enabled=True,
+    ) as context:
         page = await context.new_page()
         await stealth_async(page)
 
         # --- Загружаем страницу ---
         logging.info("Открываем страницу...")
+        _report(on_progress, "open")
         try:
             await page.goto(url, wait_until="load", timeout=120000)
         except Exception:
             await page.screenshot(path="debug_goto_failed.png")
             raise Exception("❌ Сайт не загрузился — вероятная блокировка серверного IP")
 
+        timings.mark("загрузка")
+
         # --- Проверяем, что HTML не пустой ---
         html = await page.content()
         if len(html) < 50000:
@@ -71,13 +254,18 @@ async def download_schedule(url: str, save_path: str) -> str:
         except Exception as e:
             logging.error(f"Ошибка выбора фильтра: {e}")
 
+        timings.mark("фильтры")
+
         # --- Кнопка Szukaj ---
-        html_before = len(await page.content())
-        
+        _report(on_progress, "search")
+        waiters = {}
         try:
             button = page.locator("#SzukajLogout")
             await button.wait_for(state="visible", timeout=90000)
 
+            before = await page.evaluate(_RESULTS_STATE_JS)
+            waiters = _start_ready_waiters(page, before, settings.scrape_ready_timeout)
+
             try:
                 await button.click()
             except:
@@ -85,34 +273,30 @@ async def download_schedule(url: str, save_path: str) -> str:
 
             logging.info("Нажата кнопка Szukaj")
 
-            await asyncio.sleep(22)
-            
         except Exception as e:
+            for task in waiters.values():
+                task.cancel()
+            await asyncio.gather(*waiters.values(), return_exceptions=True)
             await page.screenshot(path="debug_szukaj.png")
             raise Exception(f"❌ Ошибка клика Szukaj: {e}")
 
-        # ============================================================
-        # 🔥 Новый блок: ждём, пока таблица ОБНОВИТСЯ после фильтра
-        # ============================================================
-        
-        loaded = False
-        
-        for i in range(30):  # максимум 30 секунд
-            await asyncio.sleep(1)
-            html_now = len(await page.content())
-            logging.info(f"html before = {html_before} and html now = {html_now}")
-        
-            if html_now > html_before:
-                loaded = True
-                logging.info("Таблица загружена полностью")
-                break
-        
-        if not loaded:
+        # --- Ждём результатов поиска по событиям, а не по таймеру ---
+        signal = await _wait_ready(waiters, settings.scrape_ready_timeout)
+        if signal:
+            logging.info(f"Таблица обновилась (сигнал: {signal})")
+        else:
             logging.warning("Таблица могла не успеть обновиться. Все равно продолжаем.")
 
-        # ============================================================
+        timings.mark("поиск")
 
         # --- Скачивание CSV ---
+        _report(on_progress, "download")
+        export_requests = []
+        page.on(
+            "request",
+            lambda request: export_requests.append(request) if "WydrukTokuCsv" in request.url else None,
+        )
+
         try:
             link = page.locator("a[href*='WydrukTokuCsv']")
             await link.wait_for(state="visible", timeout=120000)
@@ -131,5 +315,21 @@ async def download_schedule(url: str, save_path: str) -> str:
             await page.screenshot(path="debug_download.png")
             raise Exception(f"❌ Ошибка скачивания CSV: {e}")
 
-        await browser.close()
+        timings.mark("скачивание")
+        timings.log()
+
+        if export_requests:
+            request = export_requests[-1]
+            try:
+                await record_export_request(
+                    url,
+                    request.url,
+                    request.method,
+                    await request.all_headers(),
+                    request.post_data,
+                    await context.cookies(),
+                )
+            except Exception:
+                logging.warning("Не удалось сохранить запрос выгрузки CSV", exc_info=True)
+
         return save_path
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import os
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+from ..config import settings
+
+
+# (mtime_ns, size, inode) — меняется при любой перезаписи файла
+FileVersion = Tuple[int, int, int]
+
+
+def file_version(path: str) -> Optional[FileVersion]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class LRUCache:
+    """
+    LRU-кэш с ограничением по числу записей и по суммарному размеру.
+    Каждая запись хранит версию источника: при несовпадении версии
+    запись считается устаревшей и выбрасывается. Потокобезопасен:
+    к нему обращаются потоки schedule_executor.
+    """
+
+    def __init__(
+        self,
+        max_entries: int,
+        max_bytes: int,
+        sizeof: Callable[[Any], int] = lambda value: 0,
+    ):
+        self.max_entries = max(max_entries, 0)
+        self.max_bytes = max(max_bytes, 0)
+        self.sizeof = sizeof
+
+        self._data: "OrderedDict[Hashable, Tuple[Any, Any, int]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.RLock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+    def get(self, key: Hashable, version: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            cached_version, value, _ = entry
+            if cached_version != version:
+                self.invalidate(key)
+                self.misses += 1
+                return None
+
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, version: Any, value: Any) -> None:
+        if self.max_entries == 0:
+            return
+
+        size = self.sizeof(value)
+        with self._lock:
+            if self.max_bytes and size > self.max_bytes:
+                # Запись больше всего бюджета — не кэшируем вовсе
+                self.invalidate(key)
+                return
+
+            self.invalidate(key)
+            self._data[key] = (version, value, size)
+            self._bytes += size
+            self._evict()
+
+    def invalidate(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            if entry is None:
+                return False
+            self._bytes -= entry[2]
+            return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._data),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _evict(self) -> None:
+        while self._data and (
+            len(self._data) > self.max_entries
+            or (self.max_bytes and self._bytes > self.max_bytes)
+        ):
+            key, (_, _, size) = self._data.popitem(last=False)
+            self._bytes -= size
+            self.evictions += 1
+            logging.debug(f"Кэш расписаний: вытеснена запись {key}")
+
+
+def _table_size(table: Any) -> int:
+    return int(getattr(table, "nbytes", 0))
+
+
+# Общий для процесса кэш разобранных расписаний: user_id -> Timetable
+schedule_cache = LRUCache(
+    max_entries=settings.schedule_cache_entries,
+    max_bytes=settings.schedule_cache_mb * 1024 * 1024,
+    sizeof=_table_size,
+)
+
+
+# Готовые тексты расписаний. Ключ — (версия CSV, начало, конец, группа, платформа),
+# без user_id: у студентов одного потока общий файл (жёсткая ссылка на blob),
+# поэтому одна запись обслуживает всю группу.
+rendered_cache = LRUCache(
+    max_entries=settings.render_cache_entries,
+    max_bytes=settings.render_cache_mb * 1024 * 1024,
+    sizeof=lambda text: len(text.encode("utf-8")),
+)
+
+
+def invalidate_schedule(user_id: int) -> None:
+    """
+    Сбрасывает кэш пользователя. Вызывается после записи нового файла расписания.
+    """
+    if schedule_cache.invalidate(user_id):
+        logging.info(f"Кэш расписания пользователя {user_id} сброшен")
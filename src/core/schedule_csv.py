@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime
+from typing import Iterator, Optional
+
+from .encoding import detect_file_encoding
+from .timetable import Lesson, parse_minutes
+
+
+# Формат выгрузки Harmonogramy (разделитель ";"):
+#
+#   ;;;;;;;;;czwartek, 4 grudnia 2025                      <- шапка, 2 строки
+#   Plan dla toku: ...;;;;;;;;;
+#   Czas od;;Czas do;Liczba godzin;Grupy;Zajecia;Sala;...  <- заголовок колонок
+#   Data Zajec: 2025.10.01 sroda ;;;;;;;;;                 <- дата для строк ниже
+#   ;9:00;10:30;2h00m;Infor. 1st 1sem WykS ;Algorytmy ...  <- занятие
+#
+# Колонки строки занятия (как default_cols в pandas-версии)
+COL_START = 1
+COL_END = 2
+COL_GROUP = 4
+COL_SUBJECT = 5
+COL_ROOM = 6
+
+PREAMBLE_ROWS = 2
+
+
+def looks_like_schedule_csv(head: bytes) -> bool:
+    """
+    Быстрая проверка начала файла: разделитель ";" и заголовки дней
+    или, у пустой выгрузки, заголовок колонок.
+    """
+    return b";" in head and (b"Data Zajec" in head or b"Czas od;" in head)
+
+
+def parse_header_date(cell: str) -> Optional[date]:
+    """
+    "Data Zajec: 2025.10.01 sroda" -> date(2025, 10, 1)
+    """
+    try:
+        return datetime.strptime(cell.split()[2], "%Y.%m.%d").date()
+    except (IndexError, ValueError):
+        return None
+
+
+def _get(row: list, idx: int) -> str:
+    return row[idx].strip() if idx < len(row) else ""
+
+
+def iter_lessons(path: str, encoding: Optional[str] = None) -> Iterator[Lesson]:
+    """
+    Потоково читает CSV и отдаёт занятия с уже подставленной датой
+    из ближайшего заголовка "Data Zajec" выше. Без pandas.
+    """
+    if encoding is None:
+        encoding = detect_file_encoding(path)
+
+    with open(path, "r", encoding=encoding, errors="replace", newline="") as f:
+        reader = csv.reader(f, delimiter=";", skipinitialspace=True)
+        current_date: Optional[date] = None
+
+        for line_no, row in enumerate(reader):
+            if line_no < PREAMBLE_ROWS or not row:
+                continue
+
+            first_col = row[0].strip()
+            if first_col.startswith("Data Zajec"):
+                current_date = parse_header_date(first_col)
+                continue
+
+            if current_date is None:
+                continue
+
+            start = _get(row, COL_START)
+            if not start:
+                continue
+
+            yield Lesson(
+                date=current_date,
+                start=parse_minutes(start),
+                end=parse_minutes(_get(row, COL_END)),
+                group=_get(row, COL_GROUP),
+                subject=_get(row, COL_SUBJECT),
+                room=_get(row, COL_ROOM),
+            )
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+import asyncio
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from .singleflight import SingleFlight
+from ..config import settings
+
+
+log = logging.getLogger("core.schedule_executor")
+
+# Работа дольше этого порога попадает в лог как медленная
+SLOW_RUN_SECONDS = 1.0
+
+
+class _Timing:
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds: float) -> None:
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "avg_ms": round(1000 * self.total / self.count, 2) if self.count else 0.0,
+            "max_ms": round(1000 * self.max, 2),
+        }
+
+
+class ScheduleExecutor:
+    """
+    Ограниченный пул потоков для чтения, компиляции и отрисовки расписаний,
+    чтобы разбор большого файла одного пользователя не останавливал
+    цикл событий Telegram/Discord.
+
+    Одинаковые одновременные запросы (один ключ) выполняются один раз.
+    Для каждой задачи измеряются ожидание в очереди и время выполнения.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = max(workers, 1)
+
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._flights = SingleFlight()
+        self._lock = threading.Lock()
+
+        self.queue_wait = _Timing()
+        self.run_time = _Timing()
+        self.submitted = 0
+        self.deduplicated = 0
+
+    def _executor(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="schedule")
+        return self._pool
+
+    async def run(self, key: Hashable, fn: Callable[..., Any], *args: Any) -> Any:
+        if self._flights.in_flight(key):
+            self.deduplicated += 1
+        return await self._flights.do(key, lambda: self._submit(fn, *args))
+
+    async def _submit(self, fn: Callable[..., Any], *args: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        queued = time.perf_counter()
+        self.submitted += 1
+
+        def job() -> Any:
+            started = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                finished = time.perf_counter()
+                with self._lock:
+                    self.queue_wait.add(started - queued)
+                    self.run_time.add(finished - started)
+                if finished - started > SLOW_RUN_SECONDS:
+                    log.warning(f"{fn.__name__} выполнялся {finished - started:.2f}s")
+
+        return await loop.run_in_executor(self._executor(), job)
+
+    @property
+    def pending(self) -> int:
+        return self.submitted - self.run_time.count
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "pending": self.pending,
+                "deduplicated": self.deduplicated,
+                "queue_wait": self.queue_wait.stats(),
+                "run_time": self.run_time.stats(),
+            }
+
+    async def stop(self) -> None:
+        pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.get_running_loop().run_in_executor(None, pool.shutdown)
+
+
+schedule_executor = ScheduleExecutor(workers=settings.schedule_workers)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import logging
+import pandas as pd
+
+from .encoding import detect_file_encoding
+from .timetable import Lesson, parse_minutes
+
+
+# Разбор выгрузки через pandas. Опционален: по умолчанию используется
+# потоковый парсер из schedule_csv (SCHEDULE_PARSER=pandas включает этот).
+
+
+def read_frame_lessons(path: str, user_id: int) -> list[Lesson]:
+    return _frame_to_lessons(read_frame(path, user_id))
+
+
+def _cell(value) -> str:
+    if value is None or (isinstance(value, float) and value != value):
+        return ""
+    return str(value).strip()
+
+
+def _frame_to_lessons(df: pd.DataFrame) -> list[Lesson]:
+    if df.empty:
+        return []
+
+    def column(name: str) -> list:
+        return df[name].tolist() if name in df.columns else [None] * len(df)
+
+    return [
+        Lesson(
+            date=date_val,
+            start=parse_minutes(start),
+            end=parse_minutes(end),
+            group=_cell(group),
+            subject=_cell(subject),
+            room=_cell(room),
+        )
+        for date_val, start, end, group, subject, room in zip(
+            column("Data_dt"), column("Czas od"), column("Czas do"),
+            column("Grupy"), column("Zajecia"), column("Sala"),
+        )
+    ]
+
+
+def read_frame(path: str, user_id: int) -> pd.DataFrame:
+    df = None
+
+    try:
+        encoding = detect_file_encoding(path)
+    except Exception as e:
+        logging.error(f"Ошибка определения кодировки: {e}")
+        encoding = "utf-8"
+
+    for enc in dict.fromkeys([encoding, "utf-8", "cp1250", "cp1251"]):
+        # C-движок в разы быстрее; python-движок — только если C не справился с форматом
+        for engine in ("c", "python"):
+            try:
+                df = pd.read_csv(
+                    path,
+                    sep=';',
+                    skiprows=2,
+                    header=None,
+                    skipinitialspace=True,
+                    encoding=enc,
+                    engine=engine
+                )
+                logging.info(f"Файл успешно прочитан с кодировкой: {enc} ({engine})")
+                break
+            except pd.errors.ParserError as e:
+                logging.warning(f"Движок {engine} не смог разобрать файл: {e}")
+                df = None
+            except Exception as e:
+                logging.warning(f"Ошибка чтения с кодировкой {enc}: {e}")
+                df = None
+                break
+
+        if df is not None:
+            break
+
+    if df is None:
+        logging.error(f"❌ Не удалось прочитать CSV для пользователя {user_id}")
+        return pd.DataFrame()
+
+    df.dropna(how="all", inplace=True)
+    if df.empty:
+        return pd.DataFrame()
+
+    default_cols = ["temp0", "Czas od", "Czas do", "Liczba godzin", "Grupy",
+                    "Zajecia", "Sala", "Forma zaliczenia", "Uwagi", "temp_extra"]
+
+    if df.shape[1] > len(default_cols):
+        extra = [f"temp{idx}" for idx in range(len(default_cols), df.shape[1])]
+        cols = default_cols + extra
+    else:
+        cols = default_cols[:df.shape[1]]
+
+    df.columns = cols
+
+    # Строки "Data Zajec: 2025.10.01 sroda" задают дату для всех строк до следующего
+    # такого заголовка. Номер блока = число заголовков выше строки, дата блока
+    # берётся из его заголовка (битый заголовок даёт блок без даты, как и раньше).
+    first_col = df["temp0"].astype(str).str.strip()
+    is_header = first_col.str.startswith("Data Zajec")
+    if not is_header.any():
+        return pd.DataFrame()
+
+    header_dates = pd.to_datetime(
+        first_col[is_header].str.split().str[2],
+        format="%Y.%m.%d",
+        errors="coerce",
+    )
+    block = is_header.cumsum()
+    block_dates = pd.Series(header_dates.to_numpy(), index=range(1, len(header_dates) + 1))
+    dates = block.map(block_dates)
+
+    keep = ~is_header & dates.notna()
+    df["Data_dt"] = None
+    df.loc[keep, "Data_dt"] = dates[keep].dt.date
+
+    df = df[keep & df["Czas od"].notna()]
+
+    return df
@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import random
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from ..shared_state import shared_state
+from ..state_store import state_store
+from ..storage import get_user_blob, prune_blobs
+from .refresh_service import fetch_schedule_blob, apply_schedule_blob_async
+from ..admission import BACKGROUND
+from ...config import settings
+
+
+log = logging.getLogger("core.background_refresh")
+
+
+class BackgroundRefresher:
+    """
+    Периодически обходит все сохранённые ссылки и скачивает их заранее,
+    чтобы кнопка «Обновить» обычно отдавала уже свежую копию.
+
+    Одна ссылка скачивается один раз на всех её пользователей; если хэш
+    содержимого не изменился, файлы и кэши пользователей не трогаются.
+    При нескольких воркерах обход делает только владелец аренды.
+    """
+
+    def __init__(self, interval: float, concurrency: int, jitter: float):
+        self.interval = interval
+        self.concurrency = max(concurrency, 1)
+        self.jitter = max(jitter, 0)
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.interval > 0
+
+    async def start(self) -> None:
+        if not self.enabled or self._task is not None:
+            return
+        shared_state.want_lease("background-refresh")
+        self._task = asyncio.create_task(self._run(), name="background-refresh")
+        log.info(f"Фоновое обновление расписаний: каждые {self.interval:.0f}s")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                if shared_state.is_leader("background-refresh"):
+                    await self.refresh_all()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Ошибка фонового обновления")
+            await asyncio.sleep(self.interval)
+
+    async def refresh_all(self) -> Dict[str, int]:
+        users_by_url: Dict[str, List[int]] = defaultdict(list)
+        for user_id, url in (await asyncio.to_thread(state_store.users_with_url)).items():
+            users_by_url[url].append(user_id)
+
+        semaphore = asyncio.Semaphore(self.concurrency)
+        results = await asyncio.gather(
+            *(self._refresh_url(url, users, semaphore) for url, users in users_by_url.items()),
+            return_exceptions=True,
+        )
+
+        stats = {"urls": len(users_by_url), "changed": 0, "unchanged": 0, "failed": 0}
+        for result in results:
+            if isinstance(result, BaseException):
+                stats["failed"] += 1
+            else:
+                stats["changed"] += result
+                stats["unchanged"] += 0 if result else 1
+
+        stats["pruned"] = await asyncio.to_thread(prune_blobs)
+
+        log.info(
+            f"Фоновое обновление: ссылок {stats['urls']}, изменилось {stats['changed']}, "
+            f"без изменений {stats['unchanged']}, ошибок {stats['failed']}, "
+            f"удалено blob'ов {stats['pruned']}"
+        )
+        return stats
+
+    async def _refresh_url(self, url: str, users: List[int], semaphore: asyncio.Semaphore) -> int:
+        # Разносим запросы во времени, чтобы не бить по сайту пачкой
+        await asyncio.sleep(random.uniform(0, self.jitter))
+
+        async with semaphore:
+            try:
+                digest = await fetch_schedule_blob(url, priority=BACKGROUND)
+            except Exception as e:
+                log.warning(f"Не удалось обновить {url}: {e}")
+                raise
+
+        changed = [user_id for user_id in users if get_user_blob(user_id) != digest]
+        for user_id in changed:
+            await apply_schedule_blob_async(user_id, digest)
+
+        return 1 if changed else 0
+
+
+background_refresher = BackgroundRefresher(
+    interval=settings.refresh_interval,
+    concurrency=settings.refresh_concurrency,
+    jitter=settings.refresh_jitter,
+)
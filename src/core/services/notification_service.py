@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import time
+import heapq
+import asyncio
+import logging
+import itertools
+from datetime import date, datetime, time as dtime, timedelta, tzinfo
+from typing import Awaitable, Callable, Dict, List, Optional, Set, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from ..shared_state import shared_state
+from ..state_store import state_store, get_user_group, get_user_notifications
+from ..timetable import NO_TIME, Timetable
+from .schedule_service import load_schedule, on_schedule_changed, remove_schedule_listener
+from ...config import settings
+
+
+log = logging.getLogger("core.notifications")
+
+# Отправка напоминания: (user_id, текст)
+ReminderSender = Callable[[int, str], Awaitable[None]]
+
+# Событие кучи: (время срабатывания, порядковый номер, user_id, поколение, строки занятий).
+# Пустой кортеж строк — служебное событие «догрузить следующее окно».
+_Event = Tuple[float, int, int, int, Tuple[int, ...]]
+
+# Сколько подписчиков планировать одновременно при запуске
+STARTUP_BATCH = 64
+
+
+def _load_timezone(name: str) -> Optional[tzinfo]:
+    try:
+        return ZoneInfo(name)
+    except (ZoneInfoNotFoundError, ValueError):
+        log.warning(f"Часовой пояс {name} не найден, используется локальное время")
+        return None
+
+
+class ReminderEngine:
+    """
+    Напоминания «занятие через N минут» для пользователей с включёнными уведомлениями.
+
+    Все ближайшие занятия подписчиков лежат в одной min-куче по времени
+    срабатывания; единственная задача спит до первого события. В кучу
+    попадают только занятия в пределах horizon — по его окончании для
+    пользователя догружается следующее окно.
+
+    При смене расписания, фильтра группы или флага уведомлений у пользователя
+    растёт «поколение»: его старые события остаются в куче и пропускаются
+    при извлечении, а новые добавляются сразу — без перестройки всей кучи.
+
+    При нескольких воркерах кучу держит каждый (изменения приходят
+    сообщениями), а отправляет только владелец аренды «reminders».
+
+    Расписания читаются через load_schedule (пул schedule_executor):
+    промах кэша означает компиляцию CSV, и цикл событий её не ждёт.
+    """
+
+    def __init__(self, lead_minutes: int, horizon_hours: int, timezone: str):
+        self.lead = timedelta(minutes=max(lead_minutes, 1))
+        self.horizon = timedelta(hours=max(horizon_hours, 1))
+        self.tz = _load_timezone(timezone)
+
+        self.sender: Optional[ReminderSender] = None
+
+        self._heap: List[_Event] = []
+        self._generation: Dict[int, int] = {}
+        self._seq = itertools.count()
+        self._generations = itertools.count(1)
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._listener: Optional[Callable[[int], None]] = None
+        # Догрузка окон, отправка напоминаний и первичное планирование
+        self._jobs: Set[asyncio.Task] = set()
+
+        self.sent = 0
+
+    @property
+    def pending(self) -> int:
+        return len(self._heap)
+
+    @property
+    def subscribers(self) -> int:
+        return len(self._generation)
+
+    # ------------------------------------------------------------------
+    # Жизненный цикл
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        # ingest_schedule вызывается из потоков schedule_executor — куча живёт в цикле событий
+        loop = asyncio.get_running_loop()
+        self._listener = lambda user_id: loop.call_soon_threadsafe(self.reschedule, user_id)
+        on_schedule_changed(self._listener)
+
+        shared_state.want_lease("reminders")
+        self._task = asyncio.create_task(self._run(), name="reminders")
+        self._spawn(self._schedule_subscribers())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is None:
+            return
+        # Обработчик держит ссылку на цикл событий, который после остановки закроется
+        remove_schedule_listener(self._listener)
+        self._listener = None
+        for job in list(self._jobs):
+            job.cancel()
+        task.cancel()
+        await asyncio.gather(task, *self._jobs, return_exceptions=True)
+
+    async def _schedule_subscribers(self) -> None:
+        """
+        Первичное планирование всех подписчиков пачками, в фоне:
+        запуск бота не ждёт чтения сотен расписаний.
+        """
+        user_ids = await asyncio.to_thread(state_store.notification_subscribers)
+        for i in range(0, len(user_ids), STARTUP_BATCH):
+            batch = user_ids[i:i + STARTUP_BATCH]
+            await asyncio.gather(*(self._reschedule(user_id) for user_id in batch))
+
+        log.info(
+            f"Напоминания запущены: подписчиков {self.subscribers}, событий {self.pending}"
+        )
+
+    def _spawn(self, coro: Awaitable[None]) -> None:
+        task = asyncio.create_task(coro)
+        self._jobs.add(task)
+        task.add_done_callback(self._jobs.discard)
+
+    # ------------------------------------------------------------------
+    # Планирование
+
+    def reschedule(self, user_id: int) -> None:
+        """
+        Пересобирает события одного пользователя: после смены расписания,
+        фильтра группы или включения/выключения напоминаний.
+        Старые события отключаются сразу, новые добавляются, когда
+        расписание прочитано в пуле.
+        """
+        generation = self._new_generation(user_id)
+        if generation is not None:
+            self._spawn(self._load_window(user_id, generation, self._now()))
+
+    async def _reschedule(self, user_id: int) -> None:
+        generation = self._new_generation(user_id)
+        if generation is not None:
+            await self._load_window(user_id, generation, self._now())
+
+    def _new_generation(self, user_id: int) -> Optional[int]:
+        if not get_user_notifications(user_id):
+            # Старые события пропустятся по отсутствию поколения
+            self._generation.pop(user_id, None)
+            return None
+
+        generation = self._generation[user_id] = next(self._generations)
+        return generation
+
+    def on_users_changed(self, message: dict) -> None:
+        """
+        Другой воркер изменил настройки пользователей (группа, уведомления).
+        """
+        if self._task is None:
+            return
+        for user_id in message["ids"]:
+            self.reschedule(user_id)
+
+    async def _load_window(self, user_id: int, generation: int, start: datetime) -> None:
+        try:
+            table = await load_schedule(user_id)
+            # Пока читали, пользователя могли перепланировать или отписать
+            if self._generation.get(user_id) == generation:
+                self._push_window(table, user_id, generation, start)
+        except Exception:
+            log.exception(f"Не удалось запланировать напоминания пользователя {user_id}")
+
+    def _push_window(self, table: Timetable, user_id: int, generation: int, start: datetime) -> None:
+        end = start + self.horizon
+
+        if not table.empty:
+            rows = table.rows_between(start.date(), end.date())
+            selected = table.views.rows(get_user_group(user_id), rows)
+
+            # Занятия, начинающиеся одновременно, — одно напоминание
+            by_start: Dict[datetime, List[int]] = {}
+            for i in selected:
+                if table.starts[i] == NO_TIME:
+                    continue
+                begins = self._lesson_start(table, i)
+                if start < begins <= end:
+                    by_start.setdefault(begins, []).append(i)
+
+            for begins, group_rows in by_start.items():
+                fire_at = (begins - self.lead).timestamp()
+                self._push(fire_at, user_id, generation, tuple(group_rows))
+
+        # Служебное событие: догрузить следующее окно
+        self._push(end.timestamp(), user_id, generation, ())
+
+    def _push(self, fire_at: float, user_id: int, generation: int, rows: Tuple[int, ...]) -> None:
+        earliest = self._heap[0][0] if self._heap else None
+        heapq.heappush(self._heap, (fire_at, next(self._seq), user_id, generation, rows))
+        if earliest is None or fire_at < earliest:
+            self._wakeup.set()
+
+    def _now(self) -> datetime:
+        return datetime.now(self.tz) if self.tz is not None else datetime.now().astimezone()
+
+    def _lesson_start(self, table: Timetable, i: int) -> datetime:
+        minutes = table.starts[i]
+        day = date.fromordinal(table.dates[i])
+        naive = datetime.combine(day, dtime(minutes // 60, minutes % 60))
+        return naive.replace(tzinfo=self.tz) if self.tz is not None else naive.astimezone()
+
+    # ------------------------------------------------------------------
+    # Таймер
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                # Просыпаемся раньше, если в кучу добавили более раннее событие
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, _, user_id, generation, rows = heapq.heappop(self._heap)
+            if self._generation.get(user_id) != generation:
+                continue
+
+            # Чтение расписания и отправка не задерживают остальные события
+            if rows:
+                self._spawn(self._fire(user_id, rows))
+            else:
+                self._spawn(self._load_window(user_id, generation, self._now()))
+
+    async def _fire(self, user_id: int, rows: Tuple[int, ...]) -> None:
+        if self.sender is None or not shared_state.is_leader("reminders"):
+            return
+        try:
+            table = await load_schedule(user_id)
+            if any(i >= len(table) for i in rows):
+                return
+            text = self._reminder_text(table, rows)
+        except Exception:
+            log.exception(f"Ошибка напоминания для пользователя {user_id}")
+            return
+
+        if text is not None:
+            await self._send(user_id, text)
+
+    def _reminder_text(self, table: Timetable, rows: Tuple[int, ...]) -> Optional[str]:
+        begins = self._lesson_start(table, rows[0])
+        minutes = round((begins - self._now()).total_seconds() / 60)
+        if minutes < 0:
+            return None
+
+        lines = [f"🔔 Через {minutes} мин:"]
+        for i in rows:
+            lesson = table.lesson(i)
+            lines.append(
+                f"⏰ {lesson.start_text} - {lesson.end_text}\n"
+                f"👥 {table.group_label(i)}\n"
+                f"📖 {lesson.subject}\n"
+                f"🏫 {lesson.room}"
+            )
+        return "\n\n".join(lines)
+
+    async def _send(self, user_id: int, text: str) -> None:
+        try:
+            await self.sender(user_id, text)
+            self.sent += 1
+        except Exception as e:
+            log.warning(f"Не удалось отправить напоминание пользователю {user_id}: {e}")
+
+
+reminder_engine = ReminderEngine(
+    lead_minutes=settings.reminder_lead_minutes,
+    horizon_hours=settings.reminder_horizon_hours,
+    timezone=settings.schedule_timezone,
+)
+shared_state.subscribe("users", reminder_engine.on_users_changed)
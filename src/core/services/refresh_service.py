@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import os
+import time
+import logging
+from typing import Dict, List, Optional, Tuple
+
+from ..admission import scrape_admission, INTERACTIVE
+from ..download_workers import download_workers, AsyncProgress
+from ..singleflight import SingleFlight
+from ..schedule_executor import schedule_executor
+from ..storage import (
+    new_blob_tmp_path, store_blob, link_user_schedule, get_user_blob,
+    get_user_schedule_file, get_blob_file,
+)
+from ..timetable import Timetable
+from .schedule_service import ingest_schedule, read_schedule
+from ...config import settings
+
+
+log = logging.getLogger("core.refresh")
+
+# Одна загрузка на ссылку, сколько бы пользователей её ни ждали
+_downloads = SingleFlight()
+
+# url -> (time.monotonic() последней успешной загрузки, хэш)
+_last_fetched: Dict[str, Tuple[float, str]] = {}
+
+# url -> колбэки прогресса всех, кто ждёт эту загрузку
+_progress_listeners: Dict[str, List[AsyncProgress]] = {}
+
+
+def fresh_blob(url: str, max_age: float) -> Optional[str]:
+    """
+    Хэш последней загрузки ссылки, если она не старше max_age секунд.
+    """
+    entry = _last_fetched.get(url)
+    if entry is None:
+        return None
+
+    fetched_at, digest = entry
+    if time.monotonic() - fetched_at > max_age or not os.path.exists(get_blob_file(digest)):
+        return None
+    return digest
+
+
+async def fetch_schedule_blob(
+    url: str,
+    on_progress: Optional[AsyncProgress] = None,
+    priority: int = INTERACTIVE,
+) -> str:
+    """
+    Скачивает расписание по ссылке в хранилище blob'ов и возвращает его хэш.
+    Одновременные запросы одной и той же ссылки ждут одну загрузку,
+    прогресс которой получают все ожидающие.
+    """
+    listeners = _progress_listeners.setdefault(url, [])
+    if on_progress is not None:
+        listeners.append(on_progress)
+
+    if _downloads.in_flight(url):
+        log.info(f"Загрузка {url} уже идёт — ждём её результат")
+        scrape_admission.promote(url, priority)
+        scrape_admission.renotify(url)
+
+    try:
+        digest = await _downloads.do(url, lambda: _download_blob(url, priority))
+    finally:
+        if on_progress is not None:
+            listeners.remove(on_progress)
+        if not listeners:
+            _progress_listeners.pop(url, None)
+
+    _last_fetched[url] = (time.monotonic(), digest)
+    return digest
+
+
+async def _broadcast_progress(url: str, phase: str, **details) -> None:
+    for listener in list(_progress_listeners.get(url, ())):
+        try:
+            await listener(phase, **details)
+        except Exception:
+            log.debug("Ошибка в колбэке прогресса", exc_info=True)
+
+
+async def _download_blob(url: str, priority: int) -> str:
+    tmp_path = new_blob_tmp_path()
+    try:
+        async with scrape_admission.slot(
+            url, priority,
+            on_queue=lambda position, eta: _broadcast_progress(url, "queued", position=position, eta=eta),
+        ):
+            await download_workers.download(
+                url, tmp_path,
+                on_progress=lambda phase: _broadcast_progress(url, phase),
+            )
+        return store_blob(tmp_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def apply_schedule_blob(user_id: int, digest: str) -> Timetable:
+    """
+    Переключает пользователя на blob. Если содержимое не изменилось,
+    файл не перезаписывается и кэши остаются как есть.
+    """
+    if get_user_blob(user_id) == digest and os.path.exists(get_user_schedule_file(user_id)):
+        return read_schedule(user_id)
+
+    link_user_schedule(user_id, digest)
+    return ingest_schedule(user_id)
+
+
+async def apply_schedule_blob_async(user_id: int, digest: str) -> Timetable:
+    """
+    apply_schedule_blob в пуле schedule_executor: компиляция не блокирует цикл событий.
+    """
+    return await schedule_executor.run(("apply", user_id, digest), apply_schedule_blob, user_id, digest)
+
+
+async def refresh_user_schedule(
+    user_id: int,
+    url: str,
+    max_age: Optional[float] = None,
+    on_progress: Optional[AsyncProgress] = None,
+) -> Timetable:
+    """
+    Обновление по кнопке: если фоновое обновление недавно уже скачало эту
+    ссылку, свежая копия отдаётся сразу, без похода на сайт.
+    """
+    if max_age is None:
+        max_age = settings.refresh_fresh_for
+
+    digest = fresh_blob(url, max_age) if max_age > 0 else None
+    if digest is None:
+        # Присоединиться к уже идущей загрузке можно всегда, новую — не чаще cooldown
+        if not _downloads.in_flight(url):
+            scrape_admission.check_cooldown(user_id)
+            scrape_admission.touch(user_id)
+        digest = await fetch_schedule_blob(url, on_progress)
+    else:
+        log.info(f"Ссылка {url} недавно обновлялась — берём готовую копию")
+
+    return await apply_schedule_blob_async(user_id, digest)
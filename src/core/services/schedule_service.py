@@ -1,136 +1,240 @@
-from datetime import datetime, date
-import os
+from datetime import date
 import logging
-import pandas as pd
+import threading
+from typing import Callable, List, Optional
 
-from ..storage import user_groups, get_user_schedule_file
-import chardet
+from ..storage import get_user_schedule_file, get_user_compiled_file
+from ..state_store import get_user_group
+from ..schedule_cache import schedule_cache, rendered_cache, file_version, invalidate_schedule
+from ..timetable import Lesson, Timetable, classify_group, load_compiled
+from ..schedule_csv import iter_lessons
+from ..schedule_executor import schedule_executor
+from ..shared_state import shared_state
+from ...config import settings
 
 
+# Компиляция расписания одного пользователя не должна идти в двух потоках сразу.
+# Блокировки выбираются по user_id из фиксированного набора, чтобы не держать
+# по одной на каждого пользователя; совпадение лишь изредка ставит чужую
+# компиляцию в очередь
+COMPILE_LOCK_STRIPES = 64
+_compile_locks = [threading.Lock() for _ in range(COMPILE_LOCK_STRIPES)]
+
+
+def _compile_lock(user_id: int) -> threading.Lock:
+    return _compile_locks[user_id % COMPILE_LOCK_STRIPES]
+
+# Подписчики на смену расписания пользователя (например, движок напоминаний)
+_schedule_listeners: List[Callable[[int], None]] = []
+
+
+def on_schedule_changed(listener: Callable[[int], None]) -> None:
+    if listener not in _schedule_listeners:
+        _schedule_listeners.append(listener)
+
+
+def remove_schedule_listener(listener: Callable[[int], None]) -> None:
+    if listener in _schedule_listeners:
+        _schedule_listeners.remove(listener)
+
+
+def _notify_schedule_changed(user_id: int) -> None:
+    for listener in _schedule_listeners:
+        try:
+            listener(user_id)
+        except Exception:
+            logging.exception(f"Ошибка обработчика смены расписания пользователя {user_id}")
+
+
+def _on_remote_schedule(message: dict) -> None:
+    # Файл на общем диске уже новый — сбрасываем кэш и оповещаем подписчиков у себя
+    invalidate_schedule(message["user_id"])
+    _notify_schedule_changed(message["user_id"])
+
+
+shared_state.subscribe("schedule", _on_remote_schedule)
+
 
 def parse_group_info(grupa_val: str) -> str:
     if not isinstance(grupa_val, str):
         return ""
-    grupa_val = grupa_val.strip()
-    if "WykS" in grupa_val:
-        return "Wykład"
-    elif "Cw" in grupa_val:
-        import re
-        match = re.search(r"Cw(\d+)S", grupa_val)
-        if match:
-            return f"Ćwiczenia (grupa {match.group(1)})"
-        else:
-            return "Ćwiczenia"
-    return grupa_val
+    return classify_group(grupa_val)[2]
 
 
-def read_schedule(user_id: int) -> pd.DataFrame:
+def read_schedule(user_id: int) -> Timetable:
     SCHEDULE_FILE = get_user_schedule_file(user_id)
-    df = None
+    COMPILED_FILE = get_user_compiled_file(user_id)
+
+    csv_version = file_version(SCHEDULE_FILE)
+    compiled_version = file_version(COMPILED_FILE)
 
-    if not os.path.exists(SCHEDULE_FILE):
+    if csv_version is None and compiled_version is None:
         logging.info(f"Файл расписания для пользователя {user_id} не найден")
-        return pd.DataFrame()
+        schedule_cache.invalidate(user_id)
+        return Timetable.empty_table()
+
+    version = (csv_version, compiled_version)
+    table = schedule_cache.get(user_id, version)
+    if table is not None:
+        return table
+
+    with _compile_lock(user_id):
+        # Пока ждали блокировку, другой поток мог уже всё сделать
+        table = schedule_cache.get(user_id, version)
+        if table is not None:
+            return table
+
+        table = load_compiled(COMPILED_FILE, csv_version)
+        if table is None:
+            table = compile_schedule(user_id)
+            version = (csv_version, file_version(COMPILED_FILE))
+
+        table.prepare()
+        schedule_cache.put(user_id, version, table)
+        return table
+
+
+def compile_schedule(user_id: int, lessons: Optional[List[Lesson]] = None) -> Timetable:
+    """
+    Разбирает CSV пользователя и сохраняет компактную бинарную версию рядом с ним.
+    Уже разобранные занятия (lessons) повторно не читаются из файла.
+    """
+    SCHEDULE_FILE = get_user_schedule_file(user_id)
+
+    csv_version = file_version(SCHEDULE_FILE)
+    if csv_version is None:
+        return Timetable.empty_table()
+
+    if lessons is None:
+        lessons = parse_lessons(SCHEDULE_FILE, user_id)
+    table = Timetable.from_lessons(lessons, source_version=csv_version)
+    table.save(get_user_compiled_file(user_id))
+
+    logging.info(f"Расписание пользователя {user_id} скомпилировано: {len(table)} занятий")
+    return table
+
+
+def parse_lessons(path: str, user_id: int, encoding: Optional[str] = None) -> List[Lesson]:
+    """
+    По умолчанию CSV разбирается стандартным csv-модулем; pandas
+    подключается только при SCHEDULE_PARSER=pandas и если он установлен.
+    """
+    if settings.schedule_parser == "pandas":
+        try:
+            from ..schedule_frame import read_frame_lessons
+        except ImportError:
+            logging.warning("SCHEDULE_PARSER=pandas, но pandas не установлен — используется csv")
+        else:
+            return list(read_frame_lessons(path, user_id))
 
     try:
-        with open(SCHEDULE_FILE, "rb") as f:
-            raw = f.read()
-            detected = chardet.detect(raw)
-            encoding = detected["encoding"] or "utf-8"
-            logging.info(f"Определена кодировка файла {SCHEDULE_FILE}: {encoding}")
+        return list(iter_lessons(path, encoding))
     except Exception as e:
-        logging.error(f"Ошибка определения кодировки: {e}")
-        encoding = "utf-8"
+        logging.error(f"❌ Не удалось прочитать CSV для пользователя {user_id}: {e}")
+        return []
 
-    for enc in [encoding, "utf-8", "cp1250", "cp1251"]:
-        try:
-            df = pd.read_csv(
-                SCHEDULE_FILE,
-                sep=';',
-                skiprows=2,
-                header=None,
-                skipinitialspace=True,
-                encoding=enc,
-                engine="python"
-            )
-            logging.info(f"Файл успешно прочитан с кодировкой: {enc}")
-            break
-        except Exception as e:
-            logging.warning(f"Ошибка чтения с кодировкой {enc}: {e}")
-            df = None
-
-    if df is None:
-        logging.error(f"❌ Не удалось прочитать CSV для пользователя {user_id}")
-        return pd.DataFrame()
-
-    df.dropna(how="all", inplace=True)
-    if df.empty:
-        return pd.DataFrame()
-
-    default_cols = ["temp0", "Czas od", "Czas do", "Liczba godzin", "Grupy",
-                    "Zajecia", "Sala", "Forma zaliczenia", "Uwagi", "temp_extra"]
-
-    if df.shape[1] > len(default_cols):
-        extra = [f"temp{idx}" for idx in range(len(default_cols), df.shape[1])]
-        cols = default_cols + extra
-    else:
-        cols = default_cols[:df.shape[1]]
 
-    df.columns = cols
+def ingest_schedule(user_id: int, lessons: Optional[List[Lesson]] = None) -> Timetable:
+    """
+    Вызывается после загрузки или скачивания нового файла:
+    компилирует расписание и обновляет кэш.
+    """
+    invalidate_schedule(user_id)
+    if lessons is not None:
+        with _compile_lock(user_id):
+            compile_schedule(user_id, lessons)
+    table = read_schedule(user_id)
 
-    current_date = None
-    dates = []
-
-    for _, row in df.iterrows():
-        first_col = str(row.iloc[0]).strip()
-        if first_col.startswith("Data Zajec"):
-            try:
-                parts = first_col.split()
-                current_date = datetime.strptime(parts[2], "%Y.%m.%d").date()
-            except:
-                current_date = None
-            dates.append(None)
-        else:
-            dates.append(current_date)
+    _notify_schedule_changed(user_id)
+    shared_state.publish("schedule", user_id=user_id)
+    return table
 
-    df["Data_dt"] = dates
 
-    df = df[df["Data_dt"].notna() & df["Czas od"].notna()]
+def format_schedule(lessons: list[Lesson], title: str, user_id: int) -> str:
+    table = Timetable.from_lessons(lessons)
+    return _render(table, range(len(table)), title, get_user_group(user_id))
 
-    return df
 
-def format_schedule(df: pd.DataFrame, title: str, user_id: int) -> str:
-    if df.empty:
+def _render(table: Timetable, rows: range, title: str, group_num: int) -> str:
+    if not rows:
         return f"{title} пусто 📭"
 
-    group_num = user_groups.get(user_id, 0)
-    if group_num > 0:
-        df = df[df["Grupy"].astype(str).str.contains(f"Cw{group_num}S") | df["Grupy"].astype(str).str.contains("WykS")]
-
-    if df.empty:
+    # Срез по группе подготовлен при загрузке расписания — здесь только выборка
+    selected = table.views.rows(group_num, rows)
+    if not selected:
         return f"{title} (после фильтра) пусто 📭"
 
     days = ["Понедельник","Вторник","Среда","Четверг","Пятница","Суббота","Воскресенье"]
     out = [f"📅 {title}:\n"]
 
-    for date_val, group in df.groupby("Data_dt"):
-        out.append(f"🗓️ {days[date_val.weekday()]}, {date_val:%d.%m.%Y}\n")
-
-        group['czas_dt'] = pd.to_datetime(group['Czas od'], format="%H:%M", errors='coerce')
+    # Занятия в Timetable уже отсортированы по дате и времени начала
+    current_date = None
+    for i in selected:
+        lesson = table.lesson(i)
+        if lesson.date != current_date:
+            current_date = lesson.date
+            out.append(f"🗓️ {days[current_date.weekday()]}, {current_date:%d.%m.%Y}\n")
 
-        for _, row in group.sort_values("czas_dt").iterrows():
-            zajecia_type = parse_group_info(row["Grupy"])
-            out.append(f"⏰ {row['Czas od']} - {row['Czas do']}")
-            out.append(f"👥 {zajecia_type}")
-            out.append(f"📖 {row['Zajecia']}")
-            out.append(f"🏫 {row['Sala']}\n")
+        out.append(f"⏰ {lesson.start_text} - {lesson.end_text}")
+        out.append(f"👥 {table.group_label(i)}")
+        out.append(f"📖 {lesson.subject}")
+        out.append(f"🏫 {lesson.room}\n")
 
     return "\n".join(out)
 
 
-async def get_schedule_data_for_day(date: date, user_id: int) -> str:
-    df = read_schedule(user_id)
-    if df.empty:
+def get_lessons(user_id: int, start: date, end: date) -> list[Lesson]:
+    """
+    Занятия пользователя с start по end включительно (бинарный поиск по индексу дат).
+    """
+    table = read_schedule(user_id)
+    return table.lessons(table.rows_between(start, end))
+
+
+async def load_schedule(user_id: int) -> Timetable:
+    """
+    read_schedule в пуле schedule_executor — для вызова из обработчиков.
+    """
+    return await schedule_executor.run(("read", user_id), read_schedule, user_id)
+
+
+async def get_schedule_data_for_day(date: date, user_id: int, platform: str = "telegram") -> str:
+    return await get_schedule_data_for_range(date, date, user_id, platform)
+
+
+async def get_schedule_data_for_range(
+    start: date,
+    end: date,
+    user_id: int,
+    platform: str = "telegram",
+) -> str:
+    # Чтение файла, компиляция и отрисовка идут в пуле потоков;
+    # одинаковые одновременные запросы выполняются один раз. Группа в ключе:
+    # после toggle_group запрос не должен получить текст, начатый со старым фильтром
+    return await schedule_executor.run(
+        ("text", user_id, start, end, platform, get_user_group(user_id)),
+        schedule_text, start, end, user_id, platform,
+    )
+
+
+def schedule_text(start: date, end: date, user_id: int, platform: str = "telegram") -> str:
+    table = read_schedule(user_id)
+    if table.empty:
         return "❌ Ваш файл расписания не найден или пуст."
-    df_day = df[df["Data_dt"] == date]
-    return format_schedule(df_day, f"Расписание на {date:%d.%m.%Y}", user_id)
+
+    # Версия файла в ключе сбрасывает запись при новом CSV,
+    # группа — при переключении фильтра (toggle_group)
+    group_num = get_user_group(user_id)
+    key = (table.source_version, start, end, group_num, platform)
+    text = rendered_cache.get(key)
+    if text is not None:
+        return text
+
+    if start == end:
+        title = f"Расписание на {start:%d.%m.%Y}"
+    else:
+        title = f"Расписание с {start:%d.%m.%Y} по {end:%d.%m.%Y}"
+
+    text = _render(table, table.rows_between(start, end), title, group_num)
+    rendered_cache.put(key, None, text)
+    return text
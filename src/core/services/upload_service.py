@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import os
+import asyncio
+import hashlib
+import logging
+from typing import AsyncIterator, List, Optional
+
+import aiohttp
+
+from ..encoding import sniff_encoding, write_meta
+from ..export_replay import get_http_session
+from ..schedule_csv import looks_like_schedule_csv
+from ..schedule_executor import schedule_executor
+from ..storage import (
+    new_blob_tmp_path, store_blob, get_user_blob, get_user_schedule_file, link_user_schedule,
+)
+from ..timetable import Lesson, Timetable
+from .schedule_service import parse_lessons, ingest_schedule, read_schedule
+from ...config import settings
+
+
+log = logging.getLogger("core.upload")
+
+CHUNK_SIZE = 64 * 1024
+
+# Сколько байт от начала файла нужно для быстрой проверки формата
+HEAD_SIZE = 64 * 1024
+
+
+class UploadError(Exception):
+    pass
+
+
+class UploadTooLarge(UploadError):
+    def __init__(self, limit_mb: int):
+        self.limit_mb = limit_mb
+        super().__init__(f"❗ Файл больше {limit_mb} МБ")
+
+
+async def stream_url(url: str) -> AsyncIterator[bytes]:
+    """
+    Отдаёт содержимое по ссылке частями через общий HTTP-клиент
+    (вложения Discord; файлы Telegram идут через сессию aiogram).
+    """
+    session = await get_http_session()
+    async with session.get(url) as resp:
+        resp.raise_for_status()
+        async for chunk in resp.content.iter_chunked(CHUNK_SIZE):
+            yield chunk
+
+
+async def ingest_upload(
+    user_id: int,
+    chunks: AsyncIterator[bytes],
+    declared_size: Optional[int] = None,
+) -> Timetable:
+    """
+    Загрузка файла расписания пользователем:
+      1. поток частей пишется во временный файл, лимит размера проверяется на лету,
+         попутно считается sha256;
+      2. начало файла и разбор проверяют, что это расписание;
+      3. файл атомарно становится blob'ом и файлом пользователя,
+         тут же компилируется и обновляет кэши.
+    Старое расписание остаётся на месте, пока новое не прошло проверку.
+    """
+    limit_mb = settings.upload_max_mb
+    limit = limit_mb * 1024 * 1024
+    if declared_size is not None and declared_size > limit:
+        raise UploadTooLarge(limit_mb)
+
+    tmp_path = new_blob_tmp_path()
+    digest = hashlib.sha256()
+    head = bytearray()
+    size = 0
+
+    try:
+        f = await asyncio.to_thread(open, tmp_path, "wb")
+        try:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > limit:
+                    raise UploadTooLarge(limit_mb)
+                if len(head) < HEAD_SIZE:
+                    head += chunk[:HEAD_SIZE - len(head)]
+                digest.update(chunk)
+                await asyncio.to_thread(f.write, chunk)
+        finally:
+            await asyncio.to_thread(f.close)
+            # Прерванный поток (лимит, ошибка) закрываем сразу, не дожидаясь GC
+            if hasattr(chunks, "aclose"):
+                await chunks.aclose()
+
+        if not looks_like_schedule_csv(bytes(head)):
+            raise UploadError("❗ Это не похоже на CSV-выгрузку расписания")
+
+        table = await schedule_executor.run(
+            ("upload", user_id, digest.hexdigest()),
+            _install_upload, user_id, tmp_path, digest.hexdigest(),
+        )
+    except aiohttp.ClientError as e:
+        # В тексте ClientResponseError есть ссылка (у Telegram — с токеном бота)
+        status = getattr(e, "status", None)
+        log.warning(f"Не удалось получить файл пользователя {user_id}: {type(e).__name__} {status or ''}")
+        raise UploadError("❌ Не удалось получить файл, попробуйте ещё раз") from None
+    finally:
+        for path in (tmp_path, f"{tmp_path}.meta.json"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    log.info(f"Пользователь {user_id} загрузил расписание: {size} байт, {len(table)} занятий")
+    return table
+
+
+def _install_upload(user_id: int, tmp_path: str, digest: str) -> Timetable:
+    if get_user_blob(user_id) == digest and os.path.exists(get_user_schedule_file(user_id)):
+        return read_schedule(user_id)
+
+    with open(tmp_path, "rb") as f:
+        encoding = sniff_encoding(f.read())
+
+    lessons: List[Lesson] = parse_lessons(tmp_path, user_id, encoding)
+    if not lessons:
+        raise UploadError("❗ В файле не найдено ни одного занятия")
+
+    path = link_user_schedule(user_id, store_blob(tmp_path, digest))
+    write_meta(path, encoding=encoding)
+    return ingest_schedule(user_id, lessons)
@@ -0,0 +1,423 @@
+from __future__ import annotations
+
+import os
+import json
+import time
+import socket
+import sqlite3
+import asyncio
+import logging
+import threading
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from ..config import settings
+
+
+log = logging.getLogger("core.shared_state")
+
+# Уникален для процесса: по нему воркер пропускает собственные сообщения и держит аренды
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+# Сколько хранятся сообщения между воркерами
+MESSAGE_RETENTION = 10 * 60
+
+# Сообщение шины: (id, канал, отправитель, данные)
+Message = Tuple[int, str, str, Dict[str, Any]]
+
+
+class StateBackend(ABC):
+    """
+    Хранилище, общее для воркеров: ключ-значение с временем жизни,
+    сообщения между процессами и аренды (кто из воркеров выполняет
+    работу, которая должна идти в одном экземпляре).
+
+    Ключ-значение backend обязан реализовать; сообщения и аренды
+    по умолчанию — поведение одного процесса.
+    """
+
+    # False — один процесс: сообщения не нужны, любая аренда своя
+    shared = False
+
+    @abstractmethod
+    def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Значения нескольких ключей за одно обращение; отсутствующих нет в ответе.
+        """
+        values = {key: self.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def publish(self, channel: str, origin: str, payload: Dict[str, Any]) -> None:
+        pass
+
+    def read_messages(self, after_id: int) -> List[Message]:
+        return []
+
+    def last_message_id(self) -> int:
+        return 0
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return True
+
+    def release_lease(self, name: str, owner: str) -> None:
+        pass
+
+    def cleanup(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """
+    Состояние в памяти процесса — поведение одиночного бота как раньше.
+    """
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[Any, Optional[float]]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires is not None and expires < time.time():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._data[key] = (value, time.time() + ttl if ttl else None)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def cleanup(self) -> None:
+        now = time.time()
+        with self._lock:
+            for key in [k for k, (_, exp) in self._data.items() if exp is not None and exp < now]:
+                del self._data[key]
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS kv (
+    key     TEXT PRIMARY KEY,
+    value   TEXT NOT NULL,
+    expires REAL
+);
+CREATE TABLE IF NOT EXISTS messages (
+    id      INTEGER PRIMARY KEY AUTOINCREMENT,
+    channel TEXT NOT NULL,
+    origin  TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS leases (
+    name    TEXT PRIMARY KEY,
+    owner   TEXT NOT NULL,
+    expires REAL NOT NULL
+);
+"""
+
+
+class SqliteBackend(StateBackend):
+    """
+    Общий SQLite-файл (WAL) для нескольких воркеров на одной машине
+    или на общем томе. Значения хранятся в JSON.
+    """
+
+    shared = True
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SQLITE_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT value FROM kv WHERE key = ? AND (expires IS NULL OR expires >= ?)",
+                (key, time.time()),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        keys = list(keys)
+        if not keys:
+            return {}
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT key, value FROM kv WHERE key IN ({', '.join('?' * len(keys))}) "
+                "AND (expires IS NULL OR expires >= ?)",
+                (*keys, time.time()),
+            ).fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT OR REPLACE INTO kv (key, value, expires) VALUES (?, ?, ?)",
+                (key, json.dumps(value, ensure_ascii=False), time.time() + ttl if ttl else None),
+            )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._connection().execute("DELETE FROM kv WHERE key = ?", (key,))
+
+    def publish(self, channel: str, origin: str, payload: Dict[str, Any]) -> None:
+        with self._lock:
+            self._connection().execute(
+                "INSERT INTO messages (channel, origin, payload, created) VALUES (?, ?, ?, ?)",
+                (channel, origin, json.dumps(payload), time.time()),
+            )
+
+    def read_messages(self, after_id: int) -> List[Message]:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT id, channel, origin, payload FROM messages WHERE id > ? ORDER BY id",
+                (after_id,),
+            ).fetchall()
+        return [(id_, channel, origin, json.loads(payload)) for id_, channel, origin, payload in rows]
+
+    def last_message_id(self) -> int:
+        with self._lock:
+            row = self._connection().execute("SELECT MAX(id) FROM messages").fetchone()
+        return row[0] or 0
+
+    def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires) VALUES (?, ?, ?) "
+                "ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE leases.owner = excluded.owner OR leases.expires < ?",
+                (name, owner, now + ttl, now),
+            )
+            row = conn.execute("SELECT owner FROM leases WHERE name = ?", (name,)).fetchone()
+        return row is not None and row[0] == owner
+
+    def release_lease(self, name: str, owner: str) -> None:
+        with self._lock:
+            self._connection().execute(
+                "DELETE FROM leases WHERE name = ? AND owner = ?", (name, owner)
+            )
+
+    def cleanup(self) -> None:
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute("DELETE FROM kv WHERE expires IS NOT NULL AND expires < ?", (now,))
+            conn.execute("DELETE FROM messages WHERE created < ?", (now - MESSAGE_RETENTION,))
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+BACKENDS: Dict[str, Callable[[], StateBackend]] = {
+    "memory": MemoryBackend,
+    "sqlite": lambda: SqliteBackend(settings.shared_state_path),
+}
+
+
+def make_backend(name: str) -> StateBackend:
+    factory = BACKENDS.get(name)
+    if factory is None:
+        raise RuntimeError(f"Неизвестный SHARED_STATE={name!r}, доступны: {', '.join(BACKENDS)}")
+    return factory()
+
+
+class SharedState:
+    """
+    Общее состояние воркеров поверх выбранного backend'а:
+      - get/set/delete — FSM Telegram, флаги ожидания ввода в Discord;
+      - publish/subscribe — сообщения об изменениях (сброс кэшей у других воркеров),
+        свои сообщения воркер не получает;
+      - аренды — работа в одном экземпляре (напоминания, фоновое обновление).
+
+    Фоновая задача раз в poll_interval читает новые сообщения и продлевает аренды.
+
+    Из обработчиков нужно вызывать асинхронные aget/aset/adelete/aget_many:
+    у общего backend'а (SQLite) это запросы к диску с ожиданием блокировки,
+    и они выполняются в потоке, а не в цикле событий.
+    """
+
+    def __init__(self, backend: StateBackend, poll_interval: float, lease_ttl: float):
+        self.backend = backend
+        self.poll_interval = poll_interval
+        self.lease_ttl = max(lease_ttl, 3 * poll_interval)
+        self.worker_id = WORKER_ID
+
+        self._handlers: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+        self._wanted: Set[str] = set()
+        self._held_until: Dict[str, float] = {}
+        self._last_id = 0
+        self._task: Optional[asyncio.Task] = None
+
+        self.received = 0
+
+    # ------------------------------------------------------------------
+    # Ключ-значение
+
+    def get(self, key: str) -> Any:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        self.backend.set(key, value, ttl)
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    async def _call(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self.backend.shared:
+            # Словарь в памяти — быстрее, чем переход в поток
+            return fn(*args)
+        return await asyncio.to_thread(fn, *args)
+
+    async def aget(self, key: str) -> Any:
+        return await self._call(self.backend.get, key)
+
+    async def aget_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        return await self._call(self.backend.get_many, list(keys))
+
+    async def aset(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        await self._call(self.backend.set, key, value, ttl)
+
+    async def adelete(self, key: str) -> None:
+        await self._call(self.backend.delete, key)
+
+    # ------------------------------------------------------------------
+    # Сообщения между воркерами
+
+    def subscribe(self, channel: str, handler: Callable[[Dict[str, Any]], None]) -> None:
+        self._handlers.setdefault(channel, []).append(handler)
+
+    def publish(self, channel: str, **payload: Any) -> None:
+        if not self.backend.shared:
+            return
+        try:
+            self.backend.publish(channel, self.worker_id, payload)
+        except sqlite3.Error:
+            log.exception(f"Не удалось отправить сообщение {channel}")
+
+    def _dispatch(self, messages: List[Message]) -> None:
+        for id_, channel, origin, payload in messages:
+            self._last_id = id_
+            if origin == self.worker_id:
+                continue
+            self.received += 1
+            for handler in self._handlers.get(channel, ()):
+                try:
+                    handler(payload)
+                except Exception:
+                    log.exception(f"Ошибка обработчика сообщения {channel}")
+
+    # ------------------------------------------------------------------
+    # Аренды
+
+    def want_lease(self, name: str) -> None:
+        self._wanted.add(name)
+        self._renew(name)
+
+    def is_leader(self, name: str) -> bool:
+        if not self.backend.shared:
+            return True
+        return self._held_until.get(name, 0.0) > time.monotonic()
+
+    def _renew(self, name: str) -> None:
+        if not self.backend.shared:
+            return
+        was_leader = self.is_leader(name)
+        started = time.monotonic()
+        if self.backend.acquire_lease(name, self.worker_id, self.lease_ttl):
+            self._held_until[name] = started + self.lease_ttl
+        else:
+            self._held_until.pop(name, None)
+        if was_leader != self.is_leader(name):
+            log.info(f"{name}: {'выполняет этот воркер' if not was_leader else 'передано другому воркеру'}")
+
+    # ------------------------------------------------------------------
+    # Жизненный цикл
+
+    async def start(self) -> None:
+        if self._task is not None or not self.backend.shared:
+            return
+        self._last_id = self.backend.last_message_id()
+        self._task = asyncio.create_task(self._run(), name="shared-state")
+        log.info(f"Общее состояние: {type(self.backend).__name__}, воркер {self.worker_id}")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        for name in self._wanted:
+            if self._held_until.pop(name, None) is not None:
+                self.backend.release_lease(name, self.worker_id)
+        self._wanted.clear()
+        self.backend.close()
+
+    def _poll(self, cleanup: bool) -> List[Message]:
+        """
+        Запросы к backend'у одного цикла опроса, в потоке.
+        """
+        for name in list(self._wanted):
+            self._renew(name)
+        if cleanup:
+            self.backend.cleanup()
+        return self.backend.read_messages(self._last_id)
+
+    async def _run(self) -> None:
+        last_cleanup = time.monotonic()
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            cleanup = time.monotonic() - last_cleanup > 60
+            try:
+                messages = await asyncio.to_thread(self._poll, cleanup)
+            except sqlite3.Error:
+                log.exception("Ошибка общего состояния")
+                continue
+            if cleanup:
+                last_cleanup = time.monotonic()
+            # Обработчики (сброс кэшей, перепланирование) — в цикле событий
+            self._dispatch(messages)
+
+
+shared_state = SharedState(
+    make_backend(settings.shared_state_backend),
+    poll_interval=settings.shared_poll_interval_ms / 1000,
+    lease_ttl=settings.shared_lease_seconds,
+)
@@ -0,0 +1,364 @@
+from __future__ import annotations
+
+import json
+import atexit
+import sqlite3
+import asyncio
+import logging
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from .shared_state import shared_state
+from ..config import settings, ensure_data_dir
+
+
+log = logging.getLogger("core.state_store")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS users (
+    user_id       INTEGER PRIMARY KEY,
+    url           TEXT,
+    group_num     INTEGER NOT NULL DEFAULT 0,
+    notifications INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+# Поле UserState -> колонка таблицы users
+_COLUMNS = {"url": "url", "group": "group_num", "notifications": "notifications"}
+
+
+def _upsert(fields: Tuple[str, ...]) -> str:
+    """
+    Запись только изменённых колонок: остальные поля строки могли
+    поменять другие воркеры, и значения из нашего кэша их бы затёрли.
+    """
+    columns = [_COLUMNS[name] for name in fields]
+    return (
+        f"INSERT INTO users (user_id, {', '.join(columns)}) "
+        f"VALUES (?{', ?' * len(columns)}) "
+        f"ON CONFLICT(user_id) DO UPDATE SET "
+        + ", ".join(f"{column} = excluded.{column}" for column in columns)
+    )
+
+
+@dataclass
+class UserState:
+    url: Optional[str] = None
+    group: int = 0
+    notifications: bool = False
+
+
+class StateStore:
+    """
+    Состояние пользователей (ссылка, фильтр группы, напоминания) в SQLite (WAL).
+
+    Чтение идёт через кэш в памяти: после первого обращения к пользователю
+    все запросы — поиск в словаре. Изменения копятся и пишутся пачкой
+    одной транзакцией: по таймеру, при накоплении batch_size записей
+    и при остановке.
+
+    При нескольких воркерах (SHARED_STATE=sqlite) после записи остальные
+    получают список изменённых пользователей и перечитывают их из базы.
+    Записываются только изменённые поля, поэтому правки разных полей
+    одного пользователя в разных воркерах не затирают друг друга.
+
+    После start() цикл событий SQLite не трогает: таблица целиком загружена
+    в кэш (промах — новый пользователь со значениями по умолчанию), а запись
+    и перечитывание идут в потоках. Блокировка кэша на время запросов
+    к базе не держится.
+    """
+
+    def __init__(self, path: Path, flush_interval: float, batch_size: int):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.batch_size = max(batch_size, 1)
+
+        self._conn: Optional[sqlite3.Connection] = None
+        # _lock — кэш и списки изменений, _write_lock — одна запись в базу за раз
+        self._lock = threading.RLock()
+        self._write_lock = threading.Lock()
+        self._cache: Dict[int, UserState] = {}
+        # user_id -> имена изменённых, но ещё не записанных полей
+        self._dirty: Dict[int, Set[str]] = {}
+        # Пользователи, которых другой воркер изменил, пока у нас были
+        # незаписанные правки: после записи перечитываются из базы
+        self._stale: Set[int] = set()
+        # Вся таблица в кэше: промах не требует запроса к базе
+        self._loaded = False
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+
+    # ------------------------------------------------------------------
+    # Подключение
+
+    def _connection(self) -> sqlite3.Connection:
+        with self._lock:
+            if self._conn is None:
+                ensure_data_dir()
+                conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute(_SCHEMA)
+                self._conn = conn
+                self._migrate_legacy_urls()
+            return self._conn
+
+    def _migrate_legacy_urls(self) -> None:
+        """
+        Однократный перенос ссылок из старого user_urls.json.
+        """
+        legacy = settings.data_dir / "user_urls.json"
+        if not legacy.exists():
+            return
+        if self._conn.execute("SELECT 1 FROM users LIMIT 1").fetchone():
+            return
+
+        try:
+            with legacy.open("r", encoding="utf-8") as f:
+                urls = json.load(f)
+        except (OSError, ValueError):
+            log.warning(f"Не удалось прочитать {legacy}", exc_info=True)
+            return
+
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR IGNORE INTO users (user_id, url) VALUES (?, ?)",
+                [(int(user_id), url) for user_id, url in urls.items()],
+            )
+        log.info(f"Перенесено ссылок из {legacy.name}: {len(urls)}")
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        conn = self._conn
+        conn.execute("BEGIN")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+
+    # ------------------------------------------------------------------
+    # Чтение и запись
+
+    def get(self, user_id: int) -> UserState:
+        with self._lock:
+            state = self._cache.get(user_id)
+            if state is None:
+                row = None
+                if not self._loaded:
+                    row = self._connection().execute(
+                        "SELECT url, group_num, notifications FROM users WHERE user_id = ?",
+                        (user_id,),
+                    ).fetchone()
+                state = UserState(row[0], row[1], bool(row[2])) if row else UserState()
+                self._cache[user_id] = state
+            return state
+
+    def _read_rows(self, user_ids: Optional[List[int]] = None) -> Dict[int, UserState]:
+        query = "SELECT user_id, url, group_num, notifications FROM users"
+        if user_ids is None:
+            rows = self._connection().execute(query).fetchall()
+        else:
+            rows = []
+            for i in range(0, len(user_ids), 500):
+                chunk = user_ids[i:i + 500]
+                rows += self._connection().execute(
+                    f"{query} WHERE user_id IN ({', '.join('?' * len(chunk))})", chunk
+                ).fetchall()
+        return {row[0]: UserState(row[1], row[2], bool(row[3])) for row in rows}
+
+    def load(self) -> None:
+        """
+        Загружает всю таблицу в кэш; уже прочитанные и изменённые записи не трогает.
+        """
+        states = self._read_rows()
+        with self._lock:
+            for user_id, state in states.items():
+                self._cache.setdefault(user_id, state)
+            self._loaded = True
+        log.info(f"Состояние пользователей загружено: {len(states)}")
+
+    def _reload(self, user_ids: List[int]) -> None:
+        """
+        Перечитывает пользователей из базы. Тех, у кого появились незаписанные
+        правки, перечитает следующая запись.
+        """
+        states = self._read_rows(user_ids)
+        with self._lock:
+            for user_id in user_ids:
+                if user_id in self._dirty:
+                    self._stale.add(user_id)
+                else:
+                    self._cache[user_id] = states.get(user_id) or UserState()
+
+    def update(self, user_id: int, **changes) -> UserState:
+        with self._lock:
+            state = self.get(user_id)
+            for name, value in changes.items():
+                if name not in _COLUMNS:
+                    raise AttributeError(f"Неизвестное поле состояния: {name}")
+                setattr(state, name, value)
+            self._dirty.setdefault(user_id, set()).update(changes)
+            full = len(self._dirty) >= self.batch_size
+
+        if full:
+            if self._loop is None:
+                self.flush()
+            else:
+                # Пишет фоновая задача в потоке — вызывающий не ждёт SQLite
+                self._loop.call_soon_threadsafe(self._wakeup.set)
+        return state
+
+    def flush(self) -> int:
+        with self._write_lock:
+            # Под блокировкой кэша только снимок изменений, запрос к базе — без неё
+            with self._lock:
+                if not self._dirty:
+                    return 0
+
+                dirty, self._dirty = self._dirty, {}
+                stale, self._stale = self._stale, set()
+                batches: Dict[Tuple[str, ...], list] = {}
+                for user_id, names in dirty.items():
+                    state = self._cache[user_id]
+                    fields = tuple(name for name in _COLUMNS if name in names)
+                    values = [getattr(state, name) for name in fields]
+                    batches.setdefault(fields, []).append(
+                        (user_id, *(int(v) if isinstance(v, bool) else v for v in values))
+                    )
+
+            try:
+                self._connection()
+                with self._transaction() as conn:
+                    for fields, rows in batches.items():
+                        conn.executemany(_upsert(fields), rows)
+            except BaseException:
+                # Не записалось — изменения остаются до следующей попытки
+                with self._lock:
+                    for user_id, names in dirty.items():
+                        self._dirty.setdefault(user_id, set()).update(names)
+                    self._stale |= stale
+                raise
+
+            if stale:
+                self._reload(list(stale))
+
+        shared_state.publish("users", ids=list(dirty))
+        return len(dirty)
+
+    def forget(self, user_ids: List[int]) -> None:
+        """
+        Пользователей изменил другой воркер. Без загруженной таблицы они
+        просто сбрасываются из кэша, иначе перечитываются в потоке,
+        а до тех пор отдаются прежние значения.
+        """
+        reload = []
+        with self._lock:
+            for user_id in user_ids:
+                if user_id in self._dirty:
+                    self._stale.add(user_id)
+                elif self._loaded:
+                    reload.append(user_id)
+                else:
+                    self._cache.pop(user_id, None)
+
+        if not reload:
+            return
+        if self._loop is None:
+            self._reload(reload)
+        else:
+            asyncio.run_coroutine_threadsafe(self._reload_async(reload), self._loop)
+
+    async def _reload_async(self, user_ids: List[int]) -> None:
+        try:
+            await asyncio.to_thread(self._reload, user_ids)
+        except sqlite3.Error:
+            log.exception("Ошибка чтения состояния пользователей")
+
+    def users_with_url(self) -> Dict[int, str]:
+        self.flush()
+        rows = self._connection().execute(
+            "SELECT user_id, url FROM users WHERE url IS NOT NULL"
+        ).fetchall()
+        return {user_id: url for user_id, url in rows}
+
+    def notification_subscribers(self) -> List[int]:
+        self.flush()
+        rows = self._connection().execute(
+            "SELECT user_id FROM users WHERE notifications = 1"
+        ).fetchall()
+        return [user_id for (user_id,) in rows]
+
+    # ------------------------------------------------------------------
+    # Жизненный цикл
+
+    async def start(self) -> None:
+        if self._task is None:
+            await asyncio.to_thread(self.load)
+            self._wakeup = asyncio.Event()
+            self._loop = asyncio.get_running_loop()
+            self._task = asyncio.create_task(self._flush_loop(), name="state-flush")
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        self._loop = None
+        await asyncio.to_thread(self.close)
+
+    def close(self) -> None:
+        if self._conn is None:
+            return
+        self.flush()
+        with self._write_lock, self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._loaded = False
+
+    async def _flush_loop(self) -> None:
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                await asyncio.to_thread(self.flush)
+            except sqlite3.Error:
+                log.exception("Ошибка записи состояния пользователей")
+
+
+state_store = StateStore(
+    path=settings.data_dir / "state.db",
+    flush_interval=settings.state_flush_interval_ms / 1000,
+    batch_size=settings.state_batch_size,
+)
+atexit.register(state_store.close)
+shared_state.subscribe("users", lambda message: state_store.forget(message["ids"]))
+
+
+def get_user_group(user_id: int) -> int:
+    return state_store.get(user_id).group
+
+
+def set_user_group(user_id: int, group: int) -> None:
+    state_store.update(user_id, group=group)
+
+
+def get_user_notifications(user_id: int) -> bool:
+    return state_store.get(user_id).notifications
+
+
+def set_user_notifications(user_id: int, enabled: bool) -> None:
+    state_store.update(user_id, notifications=enabled)
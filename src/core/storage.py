@@ -1,11 +1,55 @@
 import os
-from typing import Dict
+import time
+import uuid
+import shutil
+import hashlib
+import logging
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
 
-USER_SCHEDULES_DIR = os.path.join(os.path.dirname(__file__), "data", "user_schedules")
+try:
+    import fcntl
+except ImportError:  # Windows: блокировка только внутри процесса
+    fcntl = None
 
+from .encoding import read_meta, write_meta
+from ..config import settings
 
-user_groups: Dict[int, int] = {}
-user_notifications: Dict[int, bool] = {}
+USER_SCHEDULES_DIR = str(settings.data_dir / "user_schedules")
+
+# Общие файлы расписаний, адресуемые по sha256 содержимого.
+# Файл пользователя — жёсткая ссылка на blob, так что одинаковые
+# расписания одногруппников хранятся на диске один раз.
+BLOBS_DIR = str(settings.data_dir / "schedule_blobs")
+
+# Свежий blob не удаляется, даже если на него ещё никто не ссылается:
+# между store_blob и link_user_schedule (и повторным использованием
+# недавней загрузки в refresh_service) проходит время. Время сохранения
+# отмечается отдельным файлом <hash>.pin: mtime самого blob'а трогать
+# нельзя — это mtime файлов всех пользователей, ссылающихся на него.
+BLOB_GRACE = settings.refresh_fresh_for + 5 * 60
+
+_blob_thread_lock = threading.Lock()
+
+
+@contextmanager
+def _blob_lock() -> Iterator[None]:
+    """
+    Исключает удаление blob'а между проверкой его наличия и созданием
+    ссылки на него — в потоках процесса и, где есть fcntl, между воркерами.
+    """
+    with _blob_thread_lock:
+        if fcntl is None:
+            yield
+            return
+        ensure_blobs_dir()
+        with open(os.path.join(BLOBS_DIR, ".lock"), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
 
 
 def ensure_user_dir() -> None:
@@ -15,3 +59,128 @@ def ensure_user_dir() -> None:
 def get_user_schedule_file(user_id: int) -> str:
     ensure_user_dir()
     return os.path.join(USER_SCHEDULES_DIR, f"{user_id}.csv")
+
+
+def get_user_compiled_file(user_id: int) -> str:
+    ensure_user_dir()
+    return os.path.join(USER_SCHEDULES_DIR, f"{user_id}.timetable")
+
+
+def ensure_blobs_dir() -> None:
+    os.makedirs(BLOBS_DIR, exist_ok=True)
+
+
+def get_blob_file(digest: str) -> str:
+    return os.path.join(BLOBS_DIR, f"{digest}.csv")
+
+
+def _pin_file(digest: str) -> str:
+    return os.path.join(BLOBS_DIR, f"{digest}.pin")
+
+
+def new_blob_tmp_path() -> str:
+    ensure_blobs_dir()
+    return os.path.join(BLOBS_DIR, f"{uuid.uuid4().hex}.part")
+
+
+def file_digest(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def store_blob(tmp_path: str, digest: Optional[str] = None) -> str:
+    """
+    Переносит скачанный/загруженный файл в хранилище по хэшу содержимого.
+    Если такой blob уже есть, временный файл просто удаляется.
+    Хэш, посчитанный при потоковой записи, можно передать в digest.
+    """
+    if digest is None:
+        digest = file_digest(tmp_path)
+    blob_path = get_blob_file(digest)
+
+    with _blob_lock():
+        # На blob скоро сошлются — защищаем его от prune_blob
+        with open(_pin_file(digest), "a"):
+            pass
+        os.utime(_pin_file(digest))
+
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+        else:
+            os.replace(tmp_path, blob_path)
+
+    return digest
+
+
+def get_user_blob(user_id: int) -> Optional[str]:
+    return read_meta(get_user_schedule_file(user_id)).get("blob")
+
+
+def link_user_schedule(user_id: int, digest: str) -> str:
+    """
+    Атомарно направляет файл расписания пользователя на blob.
+    """
+    path = get_user_schedule_file(user_id)
+    old_digest = get_user_blob(user_id)
+    if old_digest == digest and os.path.exists(path):
+        return path
+
+    blob_path = get_blob_file(digest)
+    tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with _blob_lock():
+        try:
+            os.link(blob_path, tmp_path)
+        except FileNotFoundError:
+            raise
+        except OSError:
+            # ФС без жёстких ссылок — обычная копия
+            shutil.copyfile(blob_path, tmp_path)
+    os.replace(tmp_path, path)
+
+    write_meta(path, blob=digest)
+
+    if old_digest and old_digest != digest:
+        prune_blob(old_digest)
+
+    return path
+
+
+def prune_blob(digest: str) -> bool:
+    """
+    Удаляет blob, на который больше не ссылается ни один пользователь
+    и который не был сохранён только что (BLOB_GRACE).
+    """
+    blob_path = get_blob_file(digest)
+    pin_path = _pin_file(digest)
+    with _blob_lock():
+        if os.path.exists(pin_path):
+            if time.time() - os.stat(pin_path).st_mtime <= BLOB_GRACE:
+                return False
+            os.remove(pin_path)
+
+        try:
+            if os.stat(blob_path).st_nlink > 1:
+                return False
+            os.remove(blob_path)
+        except FileNotFoundError:
+            return False
+
+    logging.info(f"Удалён неиспользуемый blob {digest[:12]}")
+    return True
+
+
+def prune_blobs() -> int:
+    """
+    Обход всего хранилища: удаляет blob'ы, которые при смене файла
+    пользователя ещё были в BLOB_GRACE и поэтому остались.
+    """
+    if not os.path.isdir(BLOBS_DIR):
+        return 0
+    digests = {
+        name.rsplit(".", 1)[0] for name in os.listdir(BLOBS_DIR)
+        if name.endswith((".csv", ".pin"))
+    }
+    return sum(prune_blob(digest) for digest in digests)
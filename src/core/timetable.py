@@ -0,0 +1,438 @@
+from __future__ import annotations
+
+import os
+import re
+import sys
+import mmap
+import struct
+import logging
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, FrozenSet, Iterable, List, Optional, Sequence, Tuple
+
+
+# Бинарный формат скомпилированного расписания (little-endian):
+#
+#   header   MAGIC, версия формата, версия исходного CSV (mtime_ns, size, inode), число строк
+#   strings  три таблицы строк: предметы, аудитории, группы
+#            (count:u32, offsets:u32[count + 1], utf-8 blob, выравнивание до 4 байт)
+#   columns  dates:u32[n] (date.toordinal, отсортированы), starts:u16[n], ends:u16[n],
+#            subject:u32[n], room:u32[n], group:u32[n]
+#
+# Строки отсортированы по (дата, время начала), поэтому файл можно читать
+# через mmap без pandas и без повторной сортировки.
+
+MAGIC = b"SCHT"
+FORMAT_VERSION = 1
+
+NO_TIME = 0xFFFF
+
+_HEADER = struct.Struct("<4sHHqqqI")
+_U32 = struct.Struct("<I")
+
+# (mtime_ns, size, inode) исходного CSV
+SourceVersion = Tuple[int, int, int]
+
+# Типы занятий по полю «Grupy»
+LECTURE = 0
+EXERCISE = 1
+OTHER = 2
+
+# Сколько групп перебирает фильтр, если в файле их не больше
+DEFAULT_GROUP_COUNT = 3
+
+_EXERCISE_RE = re.compile(r"Cw(\d+)S")
+
+
+def parse_minutes(value: object) -> int:
+    """
+    "9:00" -> 540. Непарсящееся время -> NO_TIME (сортируется в конец дня).
+    """
+    try:
+        hours, minutes = str(value).strip().split(":")[:2]
+        result = int(hours) * 60 + int(minutes)
+    except (ValueError, TypeError):
+        return NO_TIME
+    return result if 0 <= result < NO_TIME else NO_TIME
+
+
+def format_minutes(value: int) -> str:
+    if value == NO_TIME:
+        return "?"
+    return f"{value // 60}:{value % 60:02d}"
+
+
+def classify_group(value: str) -> Tuple[int, FrozenSet[int], str]:
+    """
+    "WykS" -> лекция, "Cw2S" -> упражнения группы 2.
+    Возвращает (тип, номера групп упражнений, подпись для сообщения).
+    """
+    value = value.strip()
+    numbers = frozenset(int(n) for n in _EXERCISE_RE.findall(value))
+
+    if "WykS" in value:
+        return LECTURE, numbers, "Wykład"
+    if "Cw" in value:
+        match = _EXERCISE_RE.search(value)
+        label = f"Ćwiczenia (grupa {match.group(1)})" if match else "Ćwiczenia"
+        return EXERCISE, numbers, label
+    return OTHER, numbers, value
+
+
+@dataclass(frozen=True)
+class Lesson:
+    date: date
+    start: int
+    end: int
+    group: str
+    subject: str
+    room: str
+
+    @property
+    def start_text(self) -> str:
+        return format_minutes(self.start)
+
+    @property
+    def end_text(self) -> str:
+        return format_minutes(self.end)
+
+
+class DateIndex:
+    """
+    Отсортированный список дней с занятиями и смещения их первых строк:
+    строки дня days[k] — это [offsets[k], offsets[k + 1]).
+    """
+
+    def __init__(self, dates: Sequence[int]):
+        self.days = array("I")
+        self.offsets = array("I")
+
+        previous = None
+        for row, value in enumerate(dates):
+            if value != previous:
+                self.days.append(value)
+                self.offsets.append(row)
+                previous = value
+        self.offsets.append(len(dates))
+
+    def __len__(self) -> int:
+        return len(self.days)
+
+    def rows(self, start: date, end: date) -> range:
+        """
+        Строки занятий с start по end включительно, O(log n).
+        """
+        lo = bisect_left(self.days, start.toordinal())
+        hi = bisect_right(self.days, end.toordinal())
+        if lo >= hi:
+            return range(0)
+        return range(self.offsets[lo], self.offsets[hi])
+
+
+class GroupViews:
+    """
+    Занятия, заранее разложенные по значениям фильтра группы.
+
+    Каждая уникальная строка «Grupy» классифицируется один раз, затем
+    за один проход по строкам для каждого номера группы собирается
+    отсортированный список строк (лекции + упражнения этой группы).
+    Фильтр 0 означает «все группы» и списка не требует.
+    """
+
+    def __init__(self, groups: Sequence[str], group_idx: Sequence[int]):
+        kinds: List[int] = []
+        members: List[FrozenSet[int]] = []
+        self.labels: List[str] = []
+
+        for value in groups:
+            kind, numbers, label = classify_group(value)
+            kinds.append(kind)
+            members.append(numbers)
+            self.labels.append(label)
+
+        self.max_group = max((n for numbers in members for n in numbers), default=0)
+
+        self.lectures = array("I")
+        self._rows: Dict[int, array] = {g: array("I") for g in range(1, self.max_group + 1)}
+        for row, idx in enumerate(group_idx):
+            if kinds[idx] == LECTURE:
+                self.lectures.append(row)
+                for rows in self._rows.values():
+                    rows.append(row)
+            else:
+                for g in members[idx]:
+                    self._rows[g].append(row)
+
+    @property
+    def group_count(self) -> int:
+        return max(self.max_group, DEFAULT_GROUP_COUNT)
+
+    @property
+    def nbytes(self) -> int:
+        return 4 * (len(self.lectures) + sum(len(rows) for rows in self._rows.values()))
+
+    def rows(self, group: int, rows: range) -> Sequence[int]:
+        """
+        Строки из диапазона rows, проходящие фильтр group, O(log n).
+        """
+        if group <= 0:
+            return rows
+        # Группы, которой нет в файле, соответствуют только лекции
+        selected = self._rows.get(group, self.lectures)
+        lo = bisect_left(selected, rows.start)
+        hi = bisect_left(selected, rows.stop)
+        return selected[lo:hi]
+
+
+class Timetable:
+    """
+    Колоночное представление расписания пользователя.
+    """
+
+    def __init__(
+        self,
+        dates: Sequence[int],
+        starts: Sequence[int],
+        ends: Sequence[int],
+        subject_idx: Sequence[int],
+        room_idx: Sequence[int],
+        group_idx: Sequence[int],
+        subjects: List[str],
+        rooms: List[str],
+        groups: List[str],
+        source_version: Optional[SourceVersion] = None,
+    ):
+        self.dates = dates
+        self.starts = starts
+        self.ends = ends
+        self.subject_idx = subject_idx
+        self.room_idx = room_idx
+        self.group_idx = group_idx
+        self.subjects = subjects
+        self.rooms = rooms
+        self.groups = groups
+        self.source_version = source_version
+        self._index: Optional[DateIndex] = None
+        self._views: Optional[GroupViews] = None
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.dates) == 0
+
+    @property
+    def nbytes(self) -> int:
+        n = len(self.dates)
+        strings = sum(len(s) for table in (self.subjects, self.rooms, self.groups) for s in table)
+        index = 8 * len(self._index) if self._index is not None else 0
+        views = self._views.nbytes if self._views is not None else 0
+        return n * (4 + 2 + 2 + 4 * 3) + strings + index + views
+
+    @property
+    def index(self) -> DateIndex:
+        # Строится один раз на разобранное расписание
+        if self._index is None:
+            self._index = DateIndex(self.dates)
+        return self._index
+
+    @property
+    def views(self) -> GroupViews:
+        if self._views is None:
+            self._views = GroupViews(self.groups, self.group_idx)
+        return self._views
+
+    def prepare(self) -> "Timetable":
+        """
+        Строит индекс дат и срезы по группам заранее, при загрузке расписания,
+        чтобы запросы пользователей только выбирали готовые строки.
+        """
+        self.index
+        self.views
+        return self
+
+    def rows_between(self, start: date, end: date) -> range:
+        return self.index.rows(start, end)
+
+    def group_label(self, i: int) -> str:
+        return self.views.labels[self.group_idx[i]]
+
+    def lesson(self, i: int) -> Lesson:
+        return Lesson(
+            date=date.fromordinal(self.dates[i]),
+            start=self.starts[i],
+            end=self.ends[i],
+            group=self.groups[self.group_idx[i]],
+            subject=self.subjects[self.subject_idx[i]],
+            room=self.rooms[self.room_idx[i]],
+        )
+
+    def lessons(self, rows: Optional[Iterable[int]] = None) -> List[Lesson]:
+        if rows is None:
+            rows = range(len(self))
+        return [self.lesson(i) for i in rows]
+
+    # ------------------------------------------------------------------
+    # Построение
+
+    @classmethod
+    def empty_table(cls) -> "Timetable":
+        return cls.from_lessons([])
+
+    @classmethod
+    def from_lessons(
+        cls,
+        lessons: Iterable[Lesson],
+        source_version: Optional[SourceVersion] = None,
+    ) -> "Timetable":
+        rows = sorted(lessons, key=lambda item: (item.date.toordinal(), item.start))
+
+        tables: Tuple[dict, dict, dict] = ({}, {}, {})
+        columns = (array("I"), array("I"), array("I"))
+        dates, starts, ends = array("I"), array("H"), array("H")
+
+        for item in rows:
+            dates.append(item.date.toordinal())
+            starts.append(item.start)
+            ends.append(item.end)
+            for table, column, value in zip(tables, columns, (item.subject, item.room, item.group)):
+                idx = table.get(value)
+                if idx is None:
+                    idx = table[value] = len(table)
+                column.append(idx)
+
+        return cls(
+            dates, starts, ends, *columns,
+            subjects=list(tables[0]),
+            rooms=list(tables[1]),
+            groups=list(tables[2]),
+            source_version=source_version,
+        )
+
+    # ------------------------------------------------------------------
+    # Сериализация
+
+    def save(self, path: str) -> None:
+        """
+        Атомарно записывает расписание в бинарный файл.
+        """
+        version = self.source_version or (0, 0, 0)
+        chunks = [_HEADER.pack(MAGIC, FORMAT_VERSION, 0, *version, len(self))]
+
+        for table in (self.subjects, self.rooms, self.groups):
+            blob = bytearray()
+            offsets = array("I", [0])
+            for value in table:
+                blob += value.encode("utf-8")
+                offsets.append(len(blob))
+            chunks.append(_U32.pack(len(table)))
+            chunks.append(_le_bytes(offsets))
+            chunks.append(bytes(blob) + b"\0" * (-len(blob) % 4))
+
+        for typecode, column in (
+            ("I", self.dates), ("H", self.starts), ("H", self.ends),
+            ("I", self.subject_idx), ("I", self.room_idx), ("I", self.group_idx),
+        ):
+            data = _le_bytes(array(typecode, column))
+            chunks.append(data + b"\0" * (-len(data) % 4))
+
+        # Уникальное имя: компиляция может идти в нескольких потоках
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(b"".join(chunks))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, use_mmap: Optional[bool] = None) -> "Timetable":
+        """
+        Загружает скомпилированное расписание. Числовые колонки читаются
+        напрямую из mmap без копирования (на Windows mmap не используется,
+        иначе открытый файл нельзя заменить через os.replace).
+        """
+        if use_mmap is None:
+            use_mmap = os.name != "nt"
+
+        with open(path, "rb") as f:
+            if use_mmap:
+                buf = memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+            else:
+                buf = memoryview(f.read())
+
+        if len(buf) < _HEADER.size:
+            raise ValueError(f"Файл {path} повреждён")
+
+        magic, fmt, _, mtime_ns, size, ino, n = _HEADER.unpack_from(buf, 0)
+        if magic != MAGIC or fmt != FORMAT_VERSION:
+            raise ValueError(f"Неподдерживаемый формат файла {path}")
+
+        offset = _HEADER.size
+        tables = []
+        for _ in range(3):
+            (count,) = _U32.unpack_from(buf, offset)
+            offset += _U32.size
+            offsets = _column(buf, offset, "I", count + 1)
+            offset += (count + 1) * 4
+            blob = bytes(buf[offset:offset + offsets[-1]])
+            offset += offsets[-1] + (-offsets[-1] % 4)
+            tables.append([
+                blob[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(count)
+            ])
+
+        columns = []
+        for typecode in ("I", "H", "H", "I", "I", "I"):
+            columns.append(_column(buf, offset, typecode, n))
+            width = 4 if typecode == "I" else 2
+            offset += n * width + (-(n * width) % 4)
+
+        return cls(
+            *columns,
+            subjects=tables[0],
+            rooms=tables[1],
+            groups=tables[2],
+            source_version=(mtime_ns, size, ino),
+        )
+
+
+def _le_bytes(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _column(buf: memoryview, offset: int, typecode: str, count: int) -> Sequence[int]:
+    width = 4 if typecode == "I" else 2
+    raw = buf[offset:offset + count * width]
+    if len(raw) != count * width:
+        raise ValueError("Файл расписания обрезан")
+
+    if sys.byteorder == "little":
+        return raw.cast(typecode)
+
+    values = array(typecode, raw.tobytes())
+    values.byteswap()
+    return values
+
+
+def load_compiled(path: str, source_version: Optional[SourceVersion]) -> Optional[Timetable]:
+    """
+    Возвращает скомпилированное расписание, если оно есть и не устарело
+    относительно исходного CSV. Без CSV (source_version=None) скомпилированный
+    файл считается актуальным.
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        table = Timetable.load(path)
+    except (OSError, ValueError, struct.error) as e:
+        logging.warning(f"Не удалось прочитать скомпилированное расписание {path}: {e}")
+        return None
+
+    if source_version is not None and table.source_version != source_version:
+        return None
+    return table
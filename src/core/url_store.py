@@ -1,30 +1,23 @@
-import json
-import os
+from .state_store import state_store
 
-URLS_FILE = "C:\\Users\\G5\\VSCode_projects\\schedule_bots\\src\\core\\data\\user_urls.json"
+
+# Ссылки на расписания хранятся в общем хранилище состояния (state_store);
+# модуль оставлен как прежний интерфейс для обработчиков.
 
 
 def load_urls() -> dict:
-    if not os.path.exists(URLS_FILE):
-        return {}
-    try:
-        with open(URLS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except:
-        return {}
+    return {str(user_id): url for user_id, url in state_store.users_with_url().items()}
 
 
 def save_urls(urls: dict):
-    with open(URLS_FILE, "w", encoding="utf-8") as f:
-        json.dump(urls, f, indent=4, ensure_ascii=False)
+    for user_id, url in urls.items():
+        state_store.update(int(user_id), url=url)
+    state_store.flush()
 
 
 def get_user_url(user_id: int) -> str | None:
-    urls = load_urls()
-    return urls.get(str(user_id))
+    return state_store.get(user_id).url
 
 
 def set_user_url(user_id: int, url: str):
-    urls = load_urls()
-    urls[str(user_id)] = url
-    save_urls(urls)
+    state_store.update(user_id, url=url)
@@ -1,11 +1,14 @@
 import logging
 import asyncio
 import sys
+from typing import Optional
 
 import discord
 from discord.ext import commands
 
 from src.config import settings
+from src.core.lifecycle import AdapterHealth, core, stop_on_signals
+from src.core.outbound import discord_outbound
 
 
 def setup_logging(debug: bool = False) -> None:
@@ -16,10 +19,36 @@ def setup_logging(debug: bool = False) -> None:
     )
 
 
-def create_bot() -> commands.Bot:
+def _shard_options() -> dict:
+    """
+    DISCORD_SHARD_COUNT/DISCORD_SHARD_IDS делят шарды между процессами:
+    например, два процесса с DISCORD_SHARD_COUNT=4 и DISCORD_SHARD_IDS=0,1 / 2,3.
+    Без них число шардов выбирает Discord, и все они в этом процессе.
+    """
+    options: dict = {}
+    if settings.discord_shard_count > 0:
+        options["shard_count"] = settings.discord_shard_count
+    if settings.discord_shard_ids:
+        if "shard_count" not in options:
+            raise RuntimeError("DISCORD_SHARD_IDS требует DISCORD_SHARD_COUNT.")
+        options["shard_ids"] = [int(i) for i in settings.discord_shard_ids.split(",") if i.strip()]
+    return options
+
+
+def create_bot(autoshard: Optional[bool] = None) -> commands.Bot:
     intents = discord.Intents.default()
     intents.message_content = True
 
+    if autoshard is None:
+        autoshard = settings.discord_autoshard
+
+    if autoshard:
+        return commands.AutoShardedBot(
+            command_prefix="!",
+            intents=intents,
+            **_shard_options(),
+        )
+
     bot = commands.Bot(
         command_prefix="!",
         intents=intents,
@@ -39,8 +68,11 @@ async def load_cogs(bot: commands.Bot):
         raise
 
 
-async def start_discord_bot() -> None:
-    setup_logging(settings.debug)
+async def run_discord(stop_event: asyncio.Event, health: Optional[AdapterHealth] = None) -> None:
+    """
+    Работает до stop_event. Используется и отдельным запуском,
+    и общим раннером (src.main) — ядро тогда общее с Telegram.
+    """
     log = logging.getLogger("discord.entry")
 
     if not settings.discord_token:
@@ -49,10 +81,44 @@ async def start_discord_bot() -> None:
     bot = create_bot()
     await load_cogs(bot)
 
+    if health is not None:
+        health.probe = lambda: {
+            "ready": bot.is_ready(),
+            "latency_ms": round(1000 * bot.latency, 1) if bot.is_ready() else None,
+            "guilds": len(bot.guilds),
+            "shards": len(bot.shards) if isinstance(bot, commands.AutoShardedBot) else None,
+            "outbound": discord_outbound.stats(),
+        }
+
+        @bot.listen("on_ready")
+        async def mark_running() -> None:
+            health.set("running")
+
     log.info("Discord-бот запускается...")
 
+    await core.start()
+    try:
+        client = asyncio.create_task(bot.start(settings.discord_token))
+        stopper = asyncio.create_task(stop_event.wait())
+        try:
+            await asyncio.wait({client, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopper.cancel()
+            if not client.done():
+                await bot.close()
+        await client
+    finally:
+        if not bot.is_closed():
+            await bot.close()
+        await core.stop()
+
+
+async def start_discord_bot() -> None:
+    setup_logging(settings.debug)
+    log = logging.getLogger("discord.entry")
+
     try:
-        await bot.start(settings.discord_token)
+        await run_discord(stop_on_signals())
     except Exception:
         log.exception("Ошибка в работе Discord-бота")
         raise
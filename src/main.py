@@ -0,0 +1,162 @@
+"""
+Общий раннер: Telegram и Discord в одном процессе и одном цикле событий.
+
+Кэш расписаний, пул браузеров, процессы скачивания, хранилище состояния
+и пул разбора расписаний поднимаются один раз и общие для обоих адаптеров.
+Падение одного адаптера не останавливает второй — его состояние видно
+в логах и на /health (если задан HEALTH_PORT).
+
+    python -m src.main                      # все адаптеры, для которых задан токен
+    RUN_ADAPTERS=telegram python -m src.main
+
+Каждый адаптер по-прежнему запускается и отдельно: python -m src.tg_bot / src.ds_bot.
+"""
+import sys
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from aiohttp import web
+
+from .config import settings, setup_logging
+from .core.lifecycle import AdapterHealth, core, stop_on_signals
+
+
+log = logging.getLogger("runner")
+
+AdapterRun = Callable[[asyncio.Event, AdapterHealth], Awaitable[None]]
+
+
+def _load_telegram() -> AdapterRun:
+    # Импорт создаёт Bot и требует токен, поэтому только по требованию
+    from .tg_bot import run_telegram
+    return run_telegram
+
+
+def _load_discord() -> AdapterRun:
+    from .ds_bot import run_discord
+    return run_discord
+
+
+ADAPTERS: Dict[str, Callable[[], AdapterRun]] = {
+    "telegram": _load_telegram,
+    "discord": _load_discord,
+}
+
+
+def selected_adapters() -> List[str]:
+    """
+    RUN_ADAPTERS=telegram,discord; по умолчанию — все, для которых задан токен.
+    """
+    if settings.run_adapters:
+        names = [n.strip().lower() for n in settings.run_adapters.split(",") if n.strip()]
+        unknown = [n for n in names if n not in ADAPTERS]
+        if unknown:
+            raise RuntimeError(f"Неизвестные адаптеры в RUN_ADAPTERS: {', '.join(unknown)}")
+        return names
+
+    names = []
+    if settings.telegram_token:
+        names.append("telegram")
+    if settings.discord_token:
+        names.append("discord")
+    return names
+
+
+class Runner:
+    """
+    Запускает адаптеры задачами в одном цикле событий поверх общего ядра.
+    Хуки on_startup/on_shutdown вызываются до запуска адаптеров
+    и после их остановки соответственно.
+    """
+
+    def __init__(self, names: List[str]):
+        self.health: Dict[str, AdapterHealth] = {name: AdapterHealth(name) for name in names}
+        self.on_startup: List[Callable[[], Awaitable[None]]] = []
+        self.on_shutdown: List[Callable[[], Awaitable[None]]] = []
+
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._health_runner: Optional[web.AppRunner] = None
+
+    def stats(self) -> dict:
+        return {
+            "adapters": {name: h.snapshot() for name, h in self.health.items()},
+            "core": core.stats() if core.running else None,
+        }
+
+    async def run(self, stop_event: asyncio.Event) -> None:
+        await core.start()
+        try:
+            for hook in self.on_startup:
+                await hook()
+            await self._start_health()
+
+            for name, health in self.health.items():
+                self._tasks[name] = asyncio.create_task(self._run_adapter(name, health, stop_event))
+
+            # Ждём сигнала остановки или завершения всех адаптеров
+            waiter = asyncio.create_task(stop_event.wait())
+            adapters = asyncio.gather(*self._tasks.values())
+            await asyncio.wait({waiter, adapters}, return_when=asyncio.FIRST_COMPLETED)
+            waiter.cancel()
+
+            stop_event.set()
+            await adapters
+        finally:
+            await self._stop_health()
+            for hook in self.on_shutdown:
+                try:
+                    await hook()
+                except Exception:
+                    log.exception("Ошибка в хуке остановки")
+            await core.stop()
+
+    async def _run_adapter(self, name: str, health: AdapterHealth, stop_event: asyncio.Event) -> None:
+        health.set("starting")
+        try:
+            await ADAPTERS[name]()(stop_event, health)
+        except Exception as e:
+            health.set("failed", f"{type(e).__name__}: {e}")
+            log.exception(f"Адаптер {name} упал, остальные продолжают работу")
+        else:
+            health.set("stopped")
+
+    async def _health(self, request: web.Request) -> web.Response:
+        ok = all(h.healthy for h in self.health.values())
+        return web.json_response(self.stats(), status=200 if ok else 503)
+
+    async def _start_health(self) -> None:
+        if not settings.health_port:
+            return
+        app = web.Application()
+        app.router.add_get("/health", self._health)
+        self._health_runner = web.AppRunner(app, access_log=None)
+        await self._health_runner.setup()
+        await web.TCPSite(self._health_runner, settings.webhook_host, settings.health_port).start()
+        log.info(f"/health слушает порт {settings.health_port}")
+
+    async def _stop_health(self) -> None:
+        if self._health_runner is not None:
+            await self._health_runner.cleanup()
+            self._health_runner = None
+
+
+async def main() -> None:
+    setup_logging(settings.debug)
+
+    names = selected_adapters()
+    if not names:
+        raise RuntimeError("Не задан ни TELEGRAM_TOKEN, ни DISCORD_TOKEN.")
+
+    log.info(f"Запуск адаптеров: {', '.join(names)}")
+    runner = Runner(names)
+    await runner.run(stop_on_signals())
+    log.info(f"Раннер остановлен: {runner.stats()['adapters']}")
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(main())
+    except (KeyboardInterrupt, SystemExit):
+        logging.getLogger("runner").info("Бот остановлен!")
+        sys.exit(0)
@@ -1,13 +1,21 @@
 import asyncio
 import logging
 import sys
+from typing import Optional
 
 from aiogram import Dispatcher
 
 from .adapters.telegram.handlers.start import router as start_router
 from .adapters.telegram.handlers.schedule import router as schedule_router
 from .adapters.telegram.bot_instence import bot
+from .adapters.telegram.fsm_storage import SharedStateStorage
+from .adapters.telegram.outbound import send_message
+from .adapters.telegram.webhook import run_webhook
 from .config import settings
+from .core.lifecycle import AdapterHealth, core, stop_on_signals
+from .core.outbound import BROADCAST, telegram_outbound
+from .core.shared_state import shared_state
+from .core.services.notification_service import reminder_engine
 
 
 def setup_logging(debug: bool = False) -> None:
@@ -18,24 +26,84 @@ def setup_logging(debug: bool = False) -> None:
     )
 
 
-async def main() -> None:
-    setup_logging(settings.debug)
+async def send_reminder(user_id: int, text: str) -> None:
+    await send_message(user_id, text, lane=BROADCAST)
+
+
+def build_dispatcher() -> Dispatcher:
+    # FSM в общем состоянии: при нескольких webhook-воркерах диалог продолжит любой
+    dp = Dispatcher(storage=SharedStateStorage(shared_state, ttl=settings.pending_input_ttl))
+
+    reminder_engine.sender = send_reminder
+
+    dp.include_router(start_router)
+    dp.include_router(schedule_router)
+
+    # Ядро общее с Discord: в общем раннере оно уже запущено, и core.start
+    # только увеличит счётчик
+    dp.startup.register(core.start)
+    dp.startup.register(reminder_engine.start)
+    dp.shutdown.register(reminder_engine.stop)
+    dp.shutdown.register(core.stop)
+
+    return dp
+
+
+async def run_telegram(stop_event: asyncio.Event, health: Optional[AdapterHealth] = None) -> None:
+    """
+    Работает до stop_event в режиме polling или webhook.
+    Используется и отдельным запуском, и общим раннером (src.main).
+    """
     log = logging.getLogger("telegram.entry")
 
     if not settings.telegram_token:
         raise RuntimeError("TELEGRAM_TOKEN не задан.")
 
-    dp = Dispatcher()
+    dp = build_dispatcher()
+    if health is not None:
+        health.probe = lambda: {"mode": settings.telegram_mode, "outbound": telegram_outbound.stats()}
 
-    dp.include_router(start_router)
-    dp.include_router(schedule_router)
+        async def mark_running() -> None:
+            health.set("running")
+
+        dp.startup.register(mark_running)
+
+    log.info(f"Telegram-бот запускается ({settings.telegram_mode})...")
+
+    if settings.telegram_mode == "webhook":
+        await run_webhook(dp, bot, stop_event)
+        return
+
+    # Если раньше работал webhook, getUpdates без этого вернёт конфликт
+    await bot.delete_webhook()
 
-    log.info("Telegram-бот запускается...")
+    polling = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+    stopper = asyncio.create_task(stop_event.wait())
+    try:
+        done, _ = await asyncio.wait({polling, stopper}, return_when=asyncio.FIRST_COMPLETED)
+        if stopper in done and not polling.done():
+            try:
+                await dp.stop_polling()
+            except RuntimeError:
+                # polling ещё не успел запуститься
+                polling.cancel()
+        try:
+            await polling
+        except asyncio.CancelledError:
+            if not stop_event.is_set():
+                raise
+    finally:
+        stopper.cancel()
+
+
+async def main() -> None:
+    setup_logging(settings.debug)
+    log = logging.getLogger("telegram.entry")
 
     try:
-        await dp.start_polling(bot)
+        await run_telegram(stop_on_signals())
     except Exception:
-        log.exception("Ошибка в поллинге")
+        log.exception("Ошибка в работе Telegram-бота")
         raise
 
 
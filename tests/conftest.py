@@ -0,0 +1,12 @@
+"""
+Общая настройка тестов: данные пишутся во временный DATA_DIR,
+а не в src/core/data. Переменные выставляются до первого импорта src.
+"""
+import os
+import tempfile
+
+_data_dir = tempfile.TemporaryDirectory(prefix="schedule-tests-")
+
+os.environ["DATA_DIR"] = _data_dir.name
+os.environ.setdefault("TELEGRAM_TOKEN", "123456:TEST")
+os.environ.setdefault("SHARED_STATE", "memory")
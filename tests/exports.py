@@ -0,0 +1,72 @@
+"""
+Синтетические выгрузки Harmonogramy для тестов: две строки шапки,
+заголовок колонок, дни «Data Zajec: ...», занятия с кодами групп
+WykS / Cw<n>S и польской диакритикой, CRLF. Детерминированы по seed.
+"""
+from __future__ import annotations
+
+import random
+from datetime import date, timedelta
+from typing import List
+
+DAY_NAMES = ["poniedzialek", "wtorek", "sroda", "czwartek", "piatek", "sobota", "niedziela"]
+SUBJECTS = ["Analiza matematyczna", "Programowanie obiektowe", "Bazy danych",
+            "Inżynieria oprogramowania", "Język angielski B2", "Bezpieczeństwo systemów"]
+ROOMS = ["A-101", "B-2.14", "Lab. 3.12", "Aula Główna"]
+TEACHERS = ["dr Jan Kowalski", "dr hab. Anna Wiśniewska", "mgr inż. Łukasz Wójcik"]
+SLOTS = [(8 * 60, 9 * 60 + 30), (9 * 60 + 45, 11 * 60 + 15), (11 * 60 + 30, 13 * 60),
+         (13 * 60 + 15, 14 * 60 + 45), (15 * 60, 16 * 60 + 30), (16 * 60 + 45, 18 * 60 + 15)]
+COLUMNS = 10
+
+
+def _row(*cells: str) -> str:
+    return ";".join(list(cells) + [""] * (COLUMNS - len(cells)))
+
+
+def generate_lines(
+    weeks: int,
+    start: date = date(2025, 10, 1),
+    groups: int = 3,
+    seed: int = 0,
+    weekends: bool = False,
+) -> List[str]:
+    rng = random.Random(seed)
+    lines = [
+        _row(*[""] * 9, f"{DAY_NAMES[start.weekday()]}, {start:%d.%m.%Y}"),
+        _row("Plan dla toku: Informatyka, studia I stopnia, stacjonarne, semestr 1"),
+        _row("Czas od", "", "Czas do", "Liczba godzin", "Grupy", "Zajecia", "Sala",
+             "Prowadzacy", "Forma zaliczenia", "Uwagi"),
+    ]
+
+    day = start
+    for _ in range(weeks * 7):
+        if day.weekday() < 5 or weekends:
+            lines.append(_row(f"Data Zajec: {day:%Y.%m.%d} {DAY_NAMES[day.weekday()]} "))
+            for slot in sorted(rng.sample(range(len(SLOTS)), rng.randint(2, 5))):
+                begins, ends = SLOTS[slot]
+                if rng.random() < 0.35:
+                    codes = ["WykS"]
+                else:
+                    codes = [f"Cw{n}S" for n in range(1, groups + 1) if rng.random() < 0.7] or ["Cw1S"]
+                subject = rng.choice(SUBJECTS)
+                for code in codes:
+                    lines.append(_row(
+                        "", f"{begins // 60}:{begins % 60:02d}", f"{ends // 60}:{ends % 60:02d}",
+                        "2h00m", f"Infor. 1st 1sem {code} ", subject,
+                        rng.choice(ROOMS), rng.choice(TEACHERS), "Zaliczenie", "",
+                    ))
+        day += timedelta(days=1)
+
+    return lines
+
+
+def export_bytes(
+    weeks: int,
+    encoding: str = "utf-8",
+    groups: int = 3,
+    seed: int = 0,
+    weekends: bool = False,
+    start: date = date(2025, 10, 1),
+) -> bytes:
+    lines = generate_lines(weeks, start=start, groups=groups, seed=seed, weekends=weekends)
+    return ("\r\n".join(lines) + "\r\n").encode(encoding, errors="replace")
@@ -0,0 +1,66 @@
+import asyncio
+
+import pytest
+
+from src.core.admission import AdmissionController
+
+
+def _controller():
+    return AdmissionController(max_concurrent=1, user_cooldown=0, backoff_base=30, backoff_max=600)
+
+
+def test_cancel_after_admission_keeps_backoff():
+    async def scenario():
+        admission = _controller()
+        # Сайт уже блокировал запросы, пауза истекла, но счётчик растёт дальше
+        admission._backoff = 60.0
+
+        async def waiter():
+            async with admission.slot("b"):
+                raise AssertionError("тело не должно выполняться")
+
+        with pytest.raises(RuntimeError):
+            async with admission.slot("a"):
+                b = asyncio.create_task(waiter())
+                await asyncio.sleep(0)
+                assert admission.queued == 1
+                raise RuntimeError("boom")
+
+        # Слот уже выдан b, но b отменяют до начала скачивания
+        b.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await b
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.running == 0 and admission.queued == 0
+    assert admission._backoff == 60.0
+
+
+def test_cancel_while_waiting_drops_ticket():
+    async def scenario():
+        admission = _controller()
+        entered = asyncio.Event()
+        release = asyncio.Event()
+
+        async def holder():
+            async with admission.slot("a"):
+                entered.set()
+                await release.wait()
+
+        async def waiter():
+            async with admission.slot("b"):
+                pass
+
+        a = asyncio.create_task(holder())
+        await entered.wait()
+        b = asyncio.create_task(waiter())
+        await asyncio.sleep(0)
+        b.cancel()
+        await asyncio.gather(b, return_exceptions=True)
+        release.set()
+        await a
+        return admission
+
+    admission = asyncio.run(scenario())
+    assert admission.running == 0 and admission.queued == 0
@@ -0,0 +1,98 @@
+import asyncio
+
+import pytest
+
+pytest.importorskip("playwright")
+
+from src.core import browser_pool as pool_module
+from src.core.browser_pool import BrowserPool
+
+
+class FakeContext:
+    async def close(self):
+        pass
+
+
+class FakeBrowser:
+    def __init__(self, launched):
+        self.closed = False
+        launched.append(self)
+
+    def is_connected(self):
+        return not self.closed
+
+    async def new_context(self, **options):
+        return FakeContext()
+
+    async def close(self):
+        self.closed = True
+
+
+class FakePlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, **options):
+        return FakeBrowser(self.launched)
+
+    async def start(self):
+        return self
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    fake = FakePlaywright()
+    monkeypatch.setattr(pool_module, "async_playwright", lambda: fake)
+    return fake
+
+
+def test_failed_contexts_count_towards_recycling(playwright):
+    async def scenario():
+        pool = BrowserPool(size=1, max_uses=2)
+        for _ in range(2):
+            with pytest.raises(RuntimeError):
+                async with pool.context():
+                    raise RuntimeError("сайт не ответил")
+        async with pool.context():
+            pass
+        await pool.close()
+
+    asyncio.run(scenario())
+    first, second = playwright.launched
+    assert first.closed and second.closed
+
+
+def test_close_waits_for_checked_out_context(playwright):
+    async def scenario():
+        pool = BrowserPool(size=1, max_uses=10)
+        inside = asyncio.Event()
+        states = []
+
+        async def download():
+            async with pool.context():
+                inside.set()
+                await asyncio.sleep(0.05)
+                states.append(playwright.launched[0].closed)
+
+        async def late():
+            async with pool.context():
+                pass
+
+        task = asyncio.create_task(download())
+        await inside.wait()
+        closing = asyncio.create_task(pool.close())
+        await asyncio.sleep(0)
+        # Пока пул останавливается, новые контексты не выдаются
+        with pytest.raises(RuntimeError):
+            await late()
+        await closing
+        await task
+        return states
+
+    # Браузер закрыт только после того, как контекст вернули
+    assert asyncio.run(scenario()) == [False]
+    assert playwright.launched[0].closed
@@ -0,0 +1,79 @@
+import asyncio
+from concurrent.futures import Executor, Future
+from concurrent.futures.process import BrokenProcessPool
+
+import pytest
+
+from src.core.download_workers import DownloadError, DownloadWorkers
+
+
+class FakePool(Executor):
+    """
+    Пул процессов без процессов: задачи ждут, пока тест не «уронит» пул.
+    """
+
+    def __init__(self):
+        self.futures = []
+        self.shutdowns = 0
+
+    def submit(self, fn, *args, **kwargs):
+        self.futures.append(Future())
+        return self.futures[-1]
+
+    def crash(self):
+        for future in self.futures:
+            future.set_exception(BrokenProcessPool("процесс скачивания умер"))
+
+    def shutdown(self, wait=True, **kwargs):
+        self.shutdowns += 1
+
+
+async def _submitted(pool: FakePool, count: int) -> None:
+    while len(pool.futures) < count:
+        await asyncio.sleep(0)
+
+
+def test_broken_pool_is_rebuilt_once(monkeypatch):
+    workers = DownloadWorkers(workers=2)
+    pool = workers._executor = FakePool()
+    created = []
+
+    def new_executor():
+        created.append(FakePool())
+        return created[-1]
+
+    monkeypatch.setattr(workers, "_new_executor", new_executor)
+
+    async def scenario():
+        tasks = [
+            asyncio.ensure_future(workers.download(f"https://example/{n}", f"/tmp/{n}.csv"))
+            for n in range(3)
+        ]
+        await _submitted(pool, 3)
+        pool.crash()
+        return await asyncio.gather(*tasks, return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, DownloadError) for result in results)
+    # Все три задачи упали на одном пуле — он пересоздан один раз
+    assert len(created) == 1
+    assert workers._executor is created[0]
+    assert pool.shutdowns == 1
+
+
+def test_broken_pool_is_not_revived_after_stop(monkeypatch):
+    workers = DownloadWorkers(workers=1)
+    pool = workers._executor = FakePool()
+    monkeypatch.setattr(workers, "_new_executor", pytest.fail)
+
+    async def scenario():
+        task = asyncio.ensure_future(workers.download("https://example/1", "/tmp/1.csv"))
+        await _submitted(pool, 1)
+        # stop() убрал пул, пока задача ждала результата
+        workers._executor = None
+        pool.crash()
+        with pytest.raises(DownloadError):
+            await task
+
+    asyncio.run(scenario())
+    assert workers._executor is None
@@ -0,0 +1,17 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.encoding import read_meta, write_meta
+from tests.exports import export_bytes
+
+
+def test_concurrent_meta_writes_do_not_collide(tmp_path):
+    path = tmp_path / "schedule.csv"
+    path.write_bytes(export_bytes(1, encoding="cp1250"))
+
+    # Раньше все потоки писали в один и тот же <meta>.tmp
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda n: write_meta(str(path), encoding="cp1250", writer=n), range(200)))
+
+    assert read_meta(str(path))["encoding"] == "cp1250"
+    assert sorted(os.listdir(tmp_path)) == ["schedule.csv", "schedule.csv.meta.json"]
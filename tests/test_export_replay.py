@@ -0,0 +1,171 @@
+import asyncio
+import os
+import stat
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+pytest.importorskip("playwright")
+pytest.importorskip("playwright_stealth")
+
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from src.core import export_replay, parser
+from tests.exports import export_bytes, generate_lines
+
+SCHEDULE_URL = "https://harmonogramy.example/Plany/PlanyTokow/1234"
+
+LOGIN_PAGE = b"<html><body><form action='/Konto/Logowanie'>Zaloguj;</form></body></html>"
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+async def _serve(handler, scenario):
+    """
+    Поднимает стенд сайта, записывает рецепт на его адрес и выполняет scenario(server).
+    """
+    app = web.Application()
+    app.router.add_route("*", "/Plany/WydrukTokuCsv", handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        await export_replay.record_export_request(
+            SCHEDULE_URL,
+            str(server.make_url("/Plany/WydrukTokuCsv?id=1234")),
+            "GET",
+            {"Accept": "text/csv", "Host": "ignored"},
+            None,
+            [{"name": "ASP.NET_SessionId", "value": "abc"}],
+        )
+        return await scenario(server)
+    finally:
+        await export_replay.close_http_session()
+        await server.close()
+
+
+def _chunked(body: bytes, content_type: str, chunk: int = 7):
+    # Ответ мелкими кусками: первый read() вернёт только начало файла
+    async def handler(request):
+        assert request.cookies.get("ASP.NET_SessionId") == "abc"
+        resp = web.StreamResponse(headers={"Content-Type": content_type})
+        await resp.prepare(request)
+        for i in range(0, len(body), chunk):
+            await resp.write(body[i:i + chunk])
+            await asyncio.sleep(0)
+        await resp.write_eof()
+        return resp
+    return handler
+
+
+def test_replay_hit(tmp_path):
+    body = export_bytes(2, encoding="cp1250")
+    save_path = str(tmp_path / "schedule.csv")
+
+    async def scenario(server):
+        return await export_replay.replay_export(SCHEDULE_URL, save_path)
+
+    assert _run(_serve(_chunked(body, "text/csv; charset=windows-1250"), scenario))
+    assert (tmp_path / "schedule.csv").read_bytes() == body
+    assert not (tmp_path / "schedule.csv.part").exists()
+
+
+def test_replay_accepts_header_only_export(tmp_path):
+    body = ("\r\n".join(generate_lines(0)) + "\r\n").encode("cp1250")
+    assert b"Data Zajec" not in body
+    save_path = str(tmp_path / "empty.csv")
+
+    async def scenario(server):
+        return await export_replay.replay_export(SCHEDULE_URL, save_path)
+
+    assert _run(_serve(_chunked(body, "application/octet-stream"), scenario))
+    assert (tmp_path / "empty.csv").read_bytes() == body
+
+
+@pytest.mark.parametrize("body, content_type", [
+    (LOGIN_PAGE, "text/html; charset=utf-8"),
+    (LOGIN_PAGE, "application/octet-stream"),
+])
+def test_replay_rejects_login_page(tmp_path, body, content_type):
+    save_path = tmp_path / "schedule.csv"
+    save_path.write_bytes(b"old")
+
+    async def scenario(server):
+        return await export_replay.replay_export(SCHEDULE_URL, str(save_path))
+
+    assert not _run(_serve(_chunked(body, content_type), scenario))
+    # Старый файл не тронут, временный удалён
+    assert save_path.read_bytes() == b"old"
+    assert not (tmp_path / "schedule.csv.part").exists()
+
+
+def test_replay_rejects_http_error(tmp_path):
+    async def handler(request):
+        return web.Response(status=302, headers={"Location": "/Konto/Logowanie"})
+
+    async def scenario(server):
+        return await export_replay.replay_export(SCHEDULE_URL, str(tmp_path / "x.csv"))
+
+    assert not _run(_serve(handler, scenario))
+
+
+def test_falls_back_to_browser(tmp_path, monkeypatch):
+    calls = []
+
+    async def fake_browser(url, save_path, on_progress=None):
+        calls.append(url)
+        with open(save_path, "wb") as f:
+            f.write(b"from browser")
+        return save_path
+
+    monkeypatch.setattr(parser, "_download_with_browser", fake_browser)
+    save_path = str(tmp_path / "schedule.csv")
+
+    async def scenario(server):
+        return await parser.download_schedule(SCHEDULE_URL, save_path)
+
+    assert _run(_serve(_chunked(LOGIN_PAGE, "text/html"), scenario)) == save_path
+    assert calls == [SCHEDULE_URL]
+    assert (tmp_path / "schedule.csv").read_bytes() == b"from browser"
+
+
+def test_download_skips_browser_on_replay_hit(tmp_path, monkeypatch):
+    async def fake_browser(url, save_path, on_progress=None):
+        raise AssertionError("браузер не должен запускаться")
+
+    monkeypatch.setattr(parser, "_download_with_browser", fake_browser)
+    body = export_bytes(1)
+    save_path = str(tmp_path / "schedule.csv")
+
+    async def scenario(server):
+        return await parser.download_schedule(SCHEDULE_URL, save_path)
+
+    assert _run(_serve(_chunked(body, "text/csv"), scenario)) == save_path
+    assert (tmp_path / "schedule.csv").read_bytes() == body
+
+
+def test_recipes_are_stored_per_url():
+    async def record(url):
+        await export_replay.record_export_request(url, f"{url}/csv", "GET", {}, None, [])
+
+    urls = [f"{SCHEDULE_URL}/{n}" for n in range(5)]
+
+    async def scenario():
+        await asyncio.gather(*(record(url) for url in urls))
+
+    _run(scenario())
+    assert all(export_replay.has_export_request(url) for url in urls)
+    assert not export_replay.has_export_request(f"{SCHEDULE_URL}/missing")
+
+
+@pytest.mark.skipif(os.name != "posix", reason="права доступа POSIX")
+def test_recipe_with_cookies_is_private():
+    url = f"{SCHEDULE_URL}/private"
+    cookies = [{"name": "ASP.NET_SessionId", "value": "secret"}]
+    _run(export_replay.record_export_request(url, f"{url}/csv", "GET", {}, None, cookies))
+
+    path = export_replay._recipe_file(url)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o600
+    assert export_replay._load_recipe(url)["cookies"] == {"ASP.NET_SessionId": "secret"}
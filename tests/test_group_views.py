@@ -0,0 +1,52 @@
+from datetime import date
+
+import pytest
+
+from src.core.schedule_csv import iter_lessons
+from src.core.timetable import EXERCISE, LECTURE, OTHER, Timetable, classify_group
+from tests.exports import export_bytes
+
+
+@pytest.mark.parametrize("value, kind, numbers, label", [
+    ("Infor. 1st 1sem WykS ", LECTURE, set(), "Wykład"),
+    ("Infor. 1st 1sem Cw2S", EXERCISE, {2}, "Ćwiczenia (grupa 2)"),
+    ("Infor. 1st 1sem Cw1S Cw3S", EXERCISE, {1, 3}, "Ćwiczenia (grupa 1)"),
+    ("Lektorat B2", OTHER, set(), "Lektorat B2"),
+])
+def test_classify_group(value, kind, numbers, label):
+    assert classify_group(value) == (kind, frozenset(numbers), label)
+
+
+def _table(tmp_path, groups: int) -> Timetable:
+    path = tmp_path / "export.csv"
+    path.write_bytes(export_bytes(4, groups=groups, seed=groups))
+    return Timetable.from_lessons(list(iter_lessons(str(path), "utf-8"))).prepare()
+
+
+def _string_filter(table: Timetable, group: int, rows: range) -> list:
+    """
+    Прежний фильтр format_schedule: contains("Cw{n}S") | contains("WykS").
+    """
+    if group == 0:
+        return list(rows)
+    return [
+        i for i in rows
+        if f"Cw{group}S" in table.lesson(i).group or "WykS" in table.lesson(i).group
+    ]
+
+
+@pytest.mark.parametrize("groups", [3, 5])
+def test_views_match_string_filter(tmp_path, groups):
+    table = _table(tmp_path, groups)
+    assert table.views.group_count == max(groups, 3)
+
+    week = table.rows_between(date(2025, 10, 6), date(2025, 10, 12))
+    for rows in (range(len(table)), week, range(0)):
+        # Фильтры, которые перебирает toggle_group, и группа, которой нет в файле
+        for group in range(table.views.group_count + 2):
+            assert list(table.views.rows(group, rows)) == _string_filter(table, group, rows)
+
+
+def test_group_count_defaults_to_three(tmp_path):
+    assert _table(tmp_path, 1).views.group_count == 3
+    assert Timetable.empty_table().prepare().views.group_count == 3
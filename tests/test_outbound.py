@@ -0,0 +1,63 @@
+import asyncio
+
+from src.core.outbound import OutboundDispatcher, ProgressMessage
+
+
+def _dispatcher():
+    return OutboundDispatcher("test", rate=1000, burst=1000, chat_rate=1000, chat_burst=100)
+
+
+def test_calls_of_one_chat_complete_in_order():
+    log = []
+
+    async def scenario():
+        dispatcher = _dispatcher()
+
+        def call(name, delay):
+            async def run():
+                log.append(f"start {name}")
+                await asyncio.sleep(delay)
+                log.append(f"end {name}")
+            return run
+
+        await asyncio.gather(
+            dispatcher.send(1, call("progress", 0.05)),
+            dispatcher.send(1, call("final", 0)),
+            dispatcher.send(2, call("other", 0)),
+        )
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    # Второй вызов чата 1 стартует только после первого; чат 2 не ждёт
+    assert log.index("end progress") < log.index("start final")
+    assert log.index("end other") < log.index("end progress")
+
+
+def test_progress_edits_coalesce_and_final_is_last():
+    edits = []
+
+    async def scenario():
+        dispatcher = _dispatcher()
+
+        async def edit(text, **kwargs):
+            async def run():
+                await asyncio.sleep(0.02)
+                edits.append((text, kwargs))
+            return await dispatcher.send(1, run)
+
+        progress = ProgressMessage(edit, "⏳", {"open": "open", "download": "csv"})
+        await progress.report("open")
+        await progress.report("search")
+        await progress.report("download")
+        await asyncio.sleep(0)
+
+        await progress.finish("✅", reply_markup="kb")
+        # Фаза, доставленная после итоговой правки, игнорируется
+        await progress.report("download")
+        await asyncio.sleep(0.05)
+        await dispatcher.stop()
+
+    asyncio.run(scenario())
+    assert edits[-1] == ("✅", {"reply_markup": "kb"})
+    # Три фазы подряд схлопнулись в одну правку с последней
+    assert [text for text, _ in edits] == ["⏳ (csv)", "✅"]
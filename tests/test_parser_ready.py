@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("playwright")
+pytest.importorskip("playwright_stealth")
+
+from src.core.parser import SEARCH_SIGNAL, _is_search_response, _wait_ready
+
+PAGE_URL = "https://harmonogramy.example/Plany/PlanyTokow/1234"
+
+
+def _response(url, method="GET", resource_type="xhr", status=200):
+    return SimpleNamespace(
+        url=url, status=status,
+        request=SimpleNamespace(method=method, resource_type=resource_type),
+    )
+
+
+@pytest.mark.parametrize("response, expected", [
+    (_response("https://harmonogramy.example/Plany/Szukaj", method="POST"), True),
+    (_response(f"{PAGE_URL}?semestr=1", resource_type="document"), True),
+    (_response("https://harmonogramy.example/api/heartbeat"), False),
+    (_response("https://www.google-analytics.com/collect", method="POST"), False),
+    (_response("https://harmonogramy.example/Plany/Szukaj", method="POST", status=500), False),
+    (_response("https://harmonogramy.example/Plany/WydrukTokuCsv?id=1", method="POST"), False),
+    (_response(f"{PAGE_URL}/font.woff", resource_type="font"), False),
+])
+def test_search_response_predicate(response, expected):
+    assert _is_search_response(response, PAGE_URL) is expected
+
+
+async def _after(delay, fail=False):
+    await asyncio.sleep(delay)
+    if fail:
+        raise TimeoutError
+    return True
+
+
+def test_search_response_waits_for_dom():
+    async def scenario():
+        return await _wait_ready({
+            SEARCH_SIGNAL: asyncio.ensure_future(_after(0)),
+            "таблица": asyncio.ensure_future(_after(0.05)),
+            "ссылка CSV": asyncio.ensure_future(_after(5)),
+        }, timeout=1)
+
+    assert asyncio.run(scenario()) == f"{SEARCH_SIGNAL} + таблица"
+
+
+def test_failed_waiters_are_not_signals():
+    async def scenario():
+        return await _wait_ready({
+            SEARCH_SIGNAL: asyncio.ensure_future(_after(0, fail=True)),
+            "таблица": asyncio.ensure_future(_after(0, fail=True)),
+            "ссылка CSV": asyncio.ensure_future(_after(5)),
+        }, timeout=0.1)
+
+    assert asyncio.run(scenario()) is None
@@ -0,0 +1,67 @@
+import asyncio
+import threading
+from datetime import date, timedelta
+
+from src.core.schedule_executor import schedule_executor
+from src.core.services import schedule_service
+from src.core.services.notification_service import ReminderEngine
+from src.core.services.schedule_service import ingest_schedule
+from src.core.state_store import set_user_notifications, state_store
+from src.core.storage import get_user_schedule_file
+from tests.exports import export_bytes
+
+USERS = [780_000_001, 780_000_002, 780_000_003]
+
+
+def _install(user_id: int) -> None:
+    with open(get_user_schedule_file(user_id), "wb") as f:
+        f.write(export_bytes(2, weekends=True, start=date.today() - timedelta(days=1)))
+    ingest_schedule(user_id)
+    set_user_notifications(user_id, True)
+    schedule_service.schedule_cache.invalidate(user_id)
+
+
+def test_schedules_are_read_off_the_event_loop(monkeypatch):
+    for user_id in USERS:
+        _install(user_id)
+    state_store.flush()
+
+    threads = []
+    read_schedule = schedule_service.read_schedule
+
+    def recording_read(user_id):
+        threads.append(threading.current_thread())
+        return read_schedule(user_id)
+
+    monkeypatch.setattr(schedule_service, "read_schedule", recording_read)
+
+    async def scenario():
+        engine = ReminderEngine(lead_minutes=15, horizon_hours=48, timezone="Europe/Warsaw")
+        await engine.start()
+        await engine.start()
+        # Запуск не ждёт планирования подписчиков; повторный — не плодит обработчики
+        assert engine.pending == 0
+        assert schedule_service._schedule_listeners.count(engine._listener) == 1
+
+        for _ in range(100):
+            if engine.subscribers >= len(USERS) and not engine._jobs:
+                break
+            await asyncio.sleep(0.02)
+        pending = engine.pending
+
+        # Выключение отключает события сразу, без чтения расписания
+        set_user_notifications(USERS[0], False)
+        engine.reschedule(USERS[0])
+        subscribers = set(engine._generation)
+
+        listener = engine._listener
+        await engine.stop()
+        await schedule_executor.stop()
+        # Обработчик, держащий закрывающийся цикл событий, снят
+        assert listener not in schedule_service._schedule_listeners
+        return pending, subscribers
+
+    pending, subscribers = asyncio.run(scenario())
+    assert pending > len(USERS)
+    assert subscribers == set(USERS[1:])
+    assert threads and threading.main_thread() not in threads
@@ -0,0 +1,110 @@
+import asyncio
+import os
+import time
+from datetime import date
+
+import pytest
+
+from src.core.schedule_cache import LRUCache, rendered_cache
+from src.core.schedule_executor import schedule_executor
+from src.core.services import schedule_service
+from src.core.services.schedule_service import get_schedule_data_for_range, ingest_schedule, schedule_text
+from src.core.state_store import set_user_group
+from src.core.storage import get_user_schedule_file
+from tests.exports import export_bytes
+
+DAY = date(2025, 10, 7)
+
+
+def _install(user_id: int, seed: int) -> None:
+    with open(get_user_schedule_file(user_id), "wb") as f:
+        f.write(export_bytes(2, seed=seed))
+    ingest_schedule(user_id)
+
+
+@pytest.fixture
+def user():
+    rendered_cache.clear()
+    user_id = 770_000_001
+    _install(user_id, seed=1)
+    set_user_group(user_id, 0)
+    yield user_id
+    set_user_group(user_id, 0)
+    os.remove(get_user_schedule_file(user_id))
+
+
+def test_repeated_request_is_served_from_cache(user):
+    text = schedule_text(DAY, DAY, user)
+    hits = rendered_cache.hits
+
+    assert schedule_text(DAY, DAY, user) is text
+    assert rendered_cache.hits == hits + 1
+
+
+def test_new_file_invalidates(user):
+    before = schedule_text(DAY, DAY, user)
+    _install(user, seed=2)
+
+    after = schedule_text(DAY, DAY, user)
+    assert after != before
+    assert schedule_text(DAY, DAY, user) is after
+
+
+def test_group_toggle_changes_key(user):
+    everyone = schedule_text(DAY, DAY, user)
+    set_user_group(user, 2)
+    group = schedule_text(DAY, DAY, user)
+
+    assert group != everyone
+    assert "grupa 1)" not in group
+    set_user_group(user, 0)
+    assert schedule_text(DAY, DAY, user) is everyone
+
+
+def test_group_toggle_is_not_deduplicated_with_request_in_flight(user, monkeypatch):
+    def slow_text(*args):
+        text = schedule_text(*args)
+        time.sleep(0.1)
+        return text
+
+    monkeypatch.setattr(schedule_service, "schedule_text", slow_text)
+
+    async def scenario():
+        try:
+            everyone = asyncio.ensure_future(get_schedule_data_for_range(DAY, DAY, user))
+            await asyncio.sleep(0.02)
+            set_user_group(user, 2)
+            group = await get_schedule_data_for_range(DAY, DAY, user)
+            return await everyone, group
+        finally:
+            await schedule_executor.stop()
+
+    everyone, group = asyncio.run(scenario())
+    assert group != everyone
+    assert "grupa 1)" not in group
+
+
+def test_platforms_are_cached_separately(user):
+    telegram = schedule_text(DAY, DAY, user)
+    size = len(rendered_cache)
+    schedule_text(DAY, DAY, user, platform="discord")
+
+    assert len(rendered_cache) == size + 1
+    assert schedule_text(DAY, DAY, user) is telegram
+
+
+def test_lru_bounds():
+    cache = LRUCache(max_entries=2, max_bytes=10, sizeof=len)
+    cache.put("a", None, "aaaa")
+    cache.put("b", None, "bbbb")
+    cache.get("a")
+    cache.put("c", None, "cc")
+
+    # По числу записей вытеснена самая старая по использованию
+    assert "b" not in cache and "a" in cache and "c" in cache
+    cache.put("d", None, "dddddd")
+    # По размеру: 2 + 6 <= 10, "a" (4 байта) не помещается
+    assert "a" not in cache and cache.size_bytes <= 10
+    cache.put("huge", None, "x" * 11)
+    assert "huge" not in cache
+    assert cache.get("c", version=1) is None and "c" not in cache
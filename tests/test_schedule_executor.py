@@ -0,0 +1,90 @@
+import asyncio
+import threading
+import time
+
+from src.core.schedule_executor import ScheduleExecutor
+
+
+def test_identical_requests_run_once():
+    calls = []
+
+    def render(user_id):
+        calls.append(user_id)
+        time.sleep(0.05)
+        return f"text {user_id}"
+
+    async def scenario():
+        executor = ScheduleExecutor(workers=2)
+        try:
+            return executor, await asyncio.gather(
+                *(executor.run(("text", 1), render, 1) for _ in range(5))
+            )
+        finally:
+            await executor.stop()
+
+    executor, results = asyncio.run(scenario())
+    assert results == ["text 1"] * 5
+    assert calls == [1]
+    assert executor.deduplicated == 4
+    assert executor.stats()["run_time"]["count"] == 1
+
+
+def test_pool_is_bounded_and_loop_stays_free():
+    running = []
+    peak = []
+    lock = threading.Lock()
+
+    def compile_schedule(user_id):
+        with lock:
+            running.append(user_id)
+            peak.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(user_id)
+        return user_id
+
+    async def scenario():
+        executor = ScheduleExecutor(workers=2)
+        ticks = 0
+
+        async def ticker():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.005)
+
+        tick_task = asyncio.create_task(ticker())
+        try:
+            results = await asyncio.gather(
+                *(executor.run(("compile", n), compile_schedule, n) for n in range(6))
+            )
+        finally:
+            tick_task.cancel()
+            await executor.stop()
+        return results, ticks
+
+    results, ticks = asyncio.run(scenario())
+    assert results == list(range(6))
+    assert max(peak) == 2
+    # Пока пул занят, цикл событий продолжает обслуживать другие задачи
+    assert ticks > 10
+
+
+def test_error_reaches_every_waiter():
+    def broken(user_id):
+        time.sleep(0.02)
+        raise ValueError("битый CSV")
+
+    async def scenario():
+        executor = ScheduleExecutor(workers=1)
+        try:
+            return await asyncio.gather(
+                *(executor.run(("read", 7), broken, 7) for _ in range(3)),
+                return_exceptions=True,
+            )
+        finally:
+            await executor.stop()
+
+    results = asyncio.run(scenario())
+    assert len(results) == 3
+    assert all(isinstance(result, ValueError) for result in results)
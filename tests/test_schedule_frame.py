@@ -0,0 +1,105 @@
+import glob
+import os
+import shutil
+from datetime import datetime
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+
+from src.core.encoding import detect_file_encoding
+from src.core.schedule_frame import _frame_to_lessons, read_frame
+from tests.exports import export_bytes, generate_lines
+
+SAMPLES = sorted(glob.glob(os.path.join(
+    os.path.dirname(__file__), "..", "src", "core", "data", "user_schedules", "*.csv",
+)))
+
+
+def _legacy_frame(path: str) -> "pd.DataFrame":
+    """
+    Прежняя версия: построчный проход iterrows со strptime на каждый заголовок.
+    """
+    df = pd.read_csv(path, sep=";", skiprows=2, header=None, skipinitialspace=True,
+                     encoding=detect_file_encoding(path))
+    df.dropna(how="all", inplace=True)
+    if df.empty:
+        return pd.DataFrame()
+
+    default_cols = ["temp0", "Czas od", "Czas do", "Liczba godzin", "Grupy",
+                    "Zajecia", "Sala", "Forma zaliczenia", "Uwagi", "temp_extra"]
+    if df.shape[1] > len(default_cols):
+        cols = default_cols + [f"temp{idx}" for idx in range(len(default_cols), df.shape[1])]
+    else:
+        cols = default_cols[:df.shape[1]]
+    df.columns = cols
+
+    current_date = None
+    dates = []
+    for _, row in df.iterrows():
+        first_col = str(row.iloc[0]).strip()
+        if first_col.startswith("Data Zajec"):
+            try:
+                current_date = datetime.strptime(first_col.split()[2], "%Y.%m.%d").date()
+            except (IndexError, ValueError):
+                current_date = None
+            dates.append(None)
+        else:
+            dates.append(current_date)
+
+    df["Data_dt"] = dates
+    return df[df["Data_dt"].notna() & df["Czas od"].notna()]
+
+
+def _assert_same(path: str) -> None:
+    legacy = _frame_to_lessons(_legacy_frame(path))
+    assert _frame_to_lessons(read_frame(path, 0)) == legacy
+
+
+@pytest.mark.skipif(not SAMPLES, reason="нет образцов в data/user_schedules")
+@pytest.mark.parametrize("path", SAMPLES, ids=os.path.basename)
+def test_matches_row_loop_on_samples(tmp_path, path):
+    # Копия: определение кодировки пишет .meta.json рядом с файлом
+    copy = str(tmp_path / os.path.basename(path))
+    shutil.copyfile(path, copy)
+
+    lessons = _frame_to_lessons(read_frame(copy, 0))
+    assert lessons
+    _assert_same(copy)
+
+
+@pytest.mark.parametrize("encoding", ["utf-8", "cp1250"])
+def test_matches_row_loop_on_generated(tmp_path, encoding):
+    path = tmp_path / "multi.csv"
+    path.write_bytes(export_bytes(60, encoding=encoding, weekends=True, seed=3))
+    _assert_same(str(path))
+
+
+def test_header_only(tmp_path):
+    path = tmp_path / "empty.csv"
+    path.write_bytes(("\r\n".join(generate_lines(0)) + "\r\n").encode("utf-8"))
+
+    assert read_frame(str(path), 0).empty
+    assert _frame_to_lessons(read_frame(str(path), 0)) == []
+    _assert_same(str(path))
+
+
+@pytest.mark.parametrize("header", [
+    "Data Zajec: 2025.13.45 sroda ",
+    "Data Zajec: ",
+    "Data Zajec: jutro",
+])
+def test_malformed_header_drops_its_block(tmp_path, header):
+    lines = generate_lines(1, seed=1)
+    day_rows = [i for i, line in enumerate(lines) if line.startswith("Data Zajec")]
+    broken = day_rows[1]
+    lines[broken] = header + lines[broken][lines[broken].index(";"):]
+
+    path = tmp_path / "broken.csv"
+    path.write_bytes(("\r\n".join(lines) + "\r\n").encode("utf-8"))
+
+    lessons = _frame_to_lessons(read_frame(str(path), 0))
+    broken_day = datetime.strptime(generate_lines(1, seed=1)[broken].split()[2], "%Y.%m.%d").date()
+    # Занятия под битым заголовком не получают дату предыдущего дня
+    assert lessons and broken_day not in {lesson.date for lesson in lessons}
+    _assert_same(str(path))
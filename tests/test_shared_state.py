@@ -0,0 +1,76 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.core.shared_state import MemoryBackend, SharedState, SqliteBackend, StateBackend
+
+
+def test_backend_must_implement_key_value():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+    class Partial(StateBackend):
+        def get(self, key):
+            return None
+
+    with pytest.raises(TypeError):
+        Partial()
+
+
+@pytest.mark.parametrize("kind", ["memory", "sqlite"])
+def test_get_many(tmp_path, kind):
+    backend = MemoryBackend() if kind == "memory" else SqliteBackend(tmp_path / "shared.db")
+    backend.set("a", True)
+    backend.set("b", {"x": 1})
+    backend.set("old", True, ttl=-1)
+
+    assert backend.get_many(["a", "b", "old", "missing"]) == {"a": True, "b": {"x": 1}}
+    assert backend.get_many([]) == {}
+    backend.close()
+
+
+def test_sqlite_calls_run_off_the_loop(tmp_path):
+    threads = []
+
+    class Recording(SqliteBackend):
+        def get_many(self, keys):
+            threads.append(threading.current_thread())
+            return super().get_many(keys)
+
+    state = SharedState(Recording(tmp_path / "shared.db"), poll_interval=0.01, lease_ttl=1)
+
+    async def scenario():
+        await state.aset("k", 1, ttl=60)
+        value = await state.aget_many(["k", "other"])
+        await state.adelete("k")
+        return value, await state.aget("k")
+
+    assert asyncio.run(scenario()) == ({"k": 1}, None)
+    assert threads and threading.main_thread() not in threads
+    state.backend.close()
+
+
+def test_messages_between_workers(tmp_path):
+    path = tmp_path / "shared.db"
+    a = SharedState(SqliteBackend(path), poll_interval=0.01, lease_ttl=1)
+    b = SharedState(SqliteBackend(path), poll_interval=0.01, lease_ttl=1)
+    a.worker_id, b.worker_id = "a", "b"
+    received = []
+    b.subscribe("users", lambda message: received.append(message["ids"]))
+    a.subscribe("users", lambda message: received.append(("own", message["ids"])))
+
+    async def scenario():
+        await a.start()
+        await b.start()
+        a.publish("users", ids=[1, 2])
+        for _ in range(100):
+            if received:
+                break
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.05)
+        await a.stop()
+        await b.stop()
+
+    asyncio.run(scenario())
+    assert received == [[1, 2]]
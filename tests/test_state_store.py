@@ -0,0 +1,89 @@
+import asyncio
+import threading
+
+from src.core.state_store import StateStore
+
+
+def _store(path):
+    return StateStore(path, flush_interval=1, batch_size=100)
+
+
+def test_stores_do_not_overwrite_each_others_fields(tmp_path):
+    path = tmp_path / "state.db"
+    seed = _store(path)
+    seed.update(1, url="https://old", group=1, notifications=True)
+    seed.close()
+
+    # Оба хранилища уже держат строку пользователя в кэше
+    a, b = _store(path), _store(path)
+    assert a.get(1).group == b.get(1).group == 1
+
+    a.update(1, group=2)
+    b.update(1, url="https://new")
+    a.flush()
+    b.flush()
+
+    fresh = _store(path).get(1)
+    assert (fresh.url, fresh.group, fresh.notifications) == ("https://new", 2, True)
+
+
+def test_new_user_gets_defaults_for_untouched_columns(tmp_path):
+    store = _store(tmp_path / "state.db")
+    store.update(5, group=2)
+    store.flush()
+
+    assert _store(tmp_path / "state.db").get(5).group == 2
+    assert _store(tmp_path / "state.db").get(5).url is None
+    assert store.users_with_url() == {}
+
+
+def test_stale_dirty_user_is_reread_after_flush(tmp_path):
+    path = tmp_path / "state.db"
+    a, b = _store(path), _store(path)
+    b.update(1, notifications=True)
+
+    a.update(1, group=3)
+    a.flush()
+    # Сообщение «users» от воркера a пришло, пока у b есть незаписанная правка
+    b.forget([1])
+    assert b.get(1).notifications is True
+
+    b.flush()
+    state = b.get(1)
+    assert (state.group, state.notifications) == (3, True)
+
+
+def test_started_store_keeps_sqlite_off_the_loop(tmp_path):
+    path = tmp_path / "state.db"
+    seed = _store(path)
+    seed.update(1, group=2)
+    seed.close()
+
+    store = StateStore(path, flush_interval=60, batch_size=2)
+    threads = []
+    connection = store._connection
+
+    def recording_connection():
+        threads.append(threading.current_thread())
+        return connection()
+
+    store._connection = recording_connection
+
+    async def scenario():
+        await store.start()
+        # Таблица загружена при запуске: промах — новый пользователь, без запроса к базе
+        assert store.get(1).group == 2
+        assert store.get(99).url is None
+
+        store.update(2, notifications=True)
+        store.update(3, group=1)
+        for _ in range(100):
+            if not store._dirty:
+                break
+            await asyncio.sleep(0.01)
+        assert not store._dirty
+        await store.stop()
+
+    asyncio.run(scenario())
+    assert threads and threading.main_thread() not in threads
+    assert _store(path).notification_subscribers() == [2]
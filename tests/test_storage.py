@@ -0,0 +1,71 @@
+import os
+import time
+
+from src.core import storage
+
+
+def _store(content: bytes) -> str:
+    tmp_path = storage.new_blob_tmp_path()
+    with open(tmp_path, "wb") as f:
+        f.write(content)
+    return storage.store_blob(tmp_path)
+
+
+def _age(digest: str) -> None:
+    """
+    Blob сохранён давно: отметка вышла за BLOB_GRACE.
+    """
+    past = time.time() - storage.BLOB_GRACE - 60
+    os.utime(storage._pin_file(digest), (past, past))
+
+
+def test_fresh_blob_survives_prune_until_linked():
+    digest = _store(b"fresh")
+
+    # Другой пользователь сменил расписание и чистит старый blob
+    # ровно между store_blob и link_user_schedule
+    assert not storage.prune_blob(digest)
+
+    path = storage.link_user_schedule(901, digest)
+    with open(path, "rb") as f:
+        assert f.read() == b"fresh"
+
+
+def test_restore_does_not_touch_linked_files():
+    digest = _store(b"shared")
+    path = storage.link_user_schedule(902, digest)
+    version = os.stat(path).st_mtime_ns
+
+    time.sleep(0.01)
+    assert _store(b"shared") == digest
+    # mtime общий у blob'а и всех ссылок на него — версии кэшей не меняются
+    assert os.stat(path).st_mtime_ns == version
+
+
+def test_linked_blob_is_kept():
+    digest = _store(b"linked")
+    storage.link_user_schedule(903, digest)
+    _age(digest)
+
+    assert not storage.prune_blob(digest)
+    assert os.path.exists(storage.get_blob_file(digest))
+
+
+def test_relink_prunes_old_blob():
+    old = _store(b"old")
+    storage.link_user_schedule(904, old)
+    _age(old)
+
+    storage.link_user_schedule(904, _store(b"new"))
+    assert not os.path.exists(storage.get_blob_file(old))
+    assert not os.path.exists(storage._pin_file(old))
+
+
+def test_sweep_removes_orphans_after_grace():
+    young = _store(b"young orphan")
+    old = _store(b"old orphan")
+    _age(old)
+
+    storage.prune_blobs()
+    assert os.path.exists(storage.get_blob_file(young))
+    assert not os.path.exists(storage.get_blob_file(old))
@@ -0,0 +1,87 @@
+import asyncio
+import dataclasses
+import os
+
+import pytest
+
+pytest.importorskip("aiohttp")
+
+from src.core import storage
+from src.core.schedule_executor import schedule_executor
+from src.core.services import upload_service
+from src.core.services.upload_service import UploadError, UploadTooLarge, ingest_upload
+from tests.exports import export_bytes
+
+MB = 1024 * 1024
+
+
+async def _chunks(data: bytes, size: int = 64 * 1024, sent: list = None):
+    for i in range(0, len(data), size):
+        if sent is not None:
+            sent.append(i)
+        yield data[i:i + size]
+
+
+def _upload(user_id: int, chunks, declared_size=None):
+    async def scenario():
+        try:
+            return await ingest_upload(user_id, chunks, declared_size=declared_size)
+        finally:
+            await schedule_executor.stop()
+
+    return asyncio.run(scenario())
+
+
+def _leftovers() -> list:
+    if not os.path.isdir(storage.BLOBS_DIR):
+        return []
+    return [name for name in os.listdir(storage.BLOBS_DIR) if name.endswith(".part")]
+
+
+def test_upload_is_linked_to_a_blob():
+    user_id = 790_000_001
+    data = export_bytes(2, encoding="cp1250")
+
+    table = _upload(user_id, _chunks(data))
+
+    assert len(table) > 0
+    digest = storage.get_user_blob(user_id)
+    with open(storage.get_user_schedule_file(user_id), "rb") as f:
+        assert f.read() == data
+    assert os.path.samefile(storage.get_user_schedule_file(user_id), storage.get_blob_file(digest))
+    assert not _leftovers()
+
+
+def test_declared_size_over_limit_is_rejected_before_reading():
+    sent = []
+    with pytest.raises(UploadTooLarge):
+        _upload(790_000_002, _chunks(b"x" * 10, sent=sent), declared_size=100 * MB)
+    assert sent == []
+
+
+def test_stream_over_limit_stops_and_cleans_up(monkeypatch):
+    limited = dataclasses.replace(upload_service.settings, upload_max_mb=1)
+    monkeypatch.setattr(upload_service, "settings", limited)
+    sent = []
+    data = export_bytes(1) + b";" * (2 * MB)
+
+    with pytest.raises(UploadTooLarge):
+        _upload(790_000_003, _chunks(data, sent=sent))
+
+    # Поток закрыт сразу после превышения лимита, частичный файл удалён
+    assert len(sent) * 64 * 1024 <= MB + 64 * 1024
+    assert not _leftovers()
+    assert storage.get_user_blob(790_000_003) is None
+
+
+def test_not_a_schedule_keeps_previous_file():
+    user_id = 790_000_004
+    previous = export_bytes(1, seed=4)
+    _upload(user_id, _chunks(previous))
+
+    with pytest.raises(UploadError):
+        _upload(user_id, _chunks(b"<html><body>Zaloguj sie</body></html>"))
+
+    with open(storage.get_user_schedule_file(user_id), "rb") as f:
+        assert f.read() == previous
+    assert not _leftovers()